@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+基准测试：多页拉取的尾延迟（串行单次尝试 vs 自适应并发 + 重试 + 对冲）
+
+替身服务器（scripts/standin_server.py）注入错误、长尾延迟与在途上限（429），
+对同一份多页数据重复整表拉取，输出每次拉取耗时的 p50/p95/p99、失败次数与上游请求数。
+
+用法：
+    python scripts/bench_pull.py --pulls 30 --latency-ms 20 --error-rate 0.03 --straggler-rate 0.03
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.datacenter import EastMoneyDataCenter
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.sources.trade_daily import build_params as trade_params
+from standin_server import StandinServer
+
+MODES = {
+    # 改造前的行为：逐页串行、只尝试一次
+    "serial": dict(max_concurrency=1, max_attempts=1),
+    "adaptive": dict(max_concurrency=8, max_attempts=3, retry_backoff_s=0.05),
+    "hedged": dict(max_concurrency=8, max_attempts=3, retry_backoff_s=0.05, hedge_percentile=0.9),
+}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def run_mode(name: str, srv: StandinServer, pulls: int, page_size: int):
+    cfg = EastMoneyConfig(base_url=srv.url, **MODES[name])
+    http = HttpClient(cfg, min_interval_s=0.0)
+    dc = EastMoneyDataCenter(cfg, http=http)
+    params = trade_params(trade_date_gte="2000-01-01")
+    before = srv.request_count
+    wall, failures = [], 0
+    for _ in range(pulls):
+        t0 = time.perf_counter()
+        try:
+            dc.get_all_pages(params, page_size=page_size, max_pages=20)
+        except Exception:
+            failures += 1
+        wall.append(time.perf_counter() - t0)
+    stats = http.stats()
+    http.close()
+    return {
+        "p50_ms": _percentile(wall, 0.50) * 1000,
+        "p95_ms": _percentile(wall, 0.95) * 1000,
+        "p99_ms": _percentile(wall, 0.99) * 1000,
+        "failures": failures,
+        "requests": srv.request_count - before,
+        "limit": stats["limit"],
+        "retries": stats["retries"],
+        "hedges": stats["hedges"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="多页拉取尾延迟对比")
+    ap.add_argument("--pulls", type=int, default=30)
+    ap.add_argument("--page-size", type=int, default=400)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--error-rate", type=float, default=0.03)
+    ap.add_argument("--straggler-rate", type=float, default=0.03)
+    ap.add_argument("--straggler-ms", type=float, default=500.0)
+    ap.add_argument("--max-in-flight", type=int, default=6)
+    ap.add_argument("--modes", default=",".join(MODES))
+    args = ap.parse_args()
+
+    with StandinServer(
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        straggler_rate=args.straggler_rate,
+        straggler_ms=args.straggler_ms,
+        max_in_flight=args.max_in_flight,
+    ) as srv:
+        print(f"替身服务器：{srv.url}（延迟 {args.latency_ms}ms，错误率 {args.error_rate}，"
+              f"长尾 {args.straggler_rate}×{args.straggler_ms}ms，在途上限 {args.max_in_flight}）\n")
+        cols = ["p50_ms", "p95_ms", "p99_ms", "failures", "requests", "limit", "retries", "hedges"]
+        print(f"{'mode':<10}" + "".join(f"{c:>10}" for c in cols))
+        for name in args.modes.split(","):
+            r = run_mode(name, srv, args.pulls, args.page_size)
+            print(f"{name:<10}" + "".join(f"{r[c]:>10.1f}" if isinstance(r[c], float) else f"{r[c]:>10}" for c in cols))
+        print(f"\n注入故障：{srv.faults}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+基准测试：SECURITY_ID 列的代价与收益
+
+同一份快照分别以原始帧（只有代码字符串）和编码后的帧（多一列 int32 SECURITY_ID）
+做交集 / 差集 / 合并去重，输出内存增量与各操作耗时（取多次中的最好值）。
+
+用法：
+    python scripts/bench_security_ids.py --rows 5000 50000 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from eastmoney_tool.results import nbytes
+from eastmoney_tool.securities import SECURITIES
+from eastmoney_tool.transforms.set_ops import difference_by_key, intersect_by_key, union_by_key
+
+
+def _frame(rng: np.random.Generator, rows: int, universe: int) -> pd.DataFrame:
+    codes = [f"{i:06d}" for i in rng.choice(universe, rows)]
+    return pd.DataFrame({
+        "SECURITY_CODE": codes,
+        "SECUCODE": [f"{c}.SZ" for c in codes],
+        "SECURITY_NAME_ABBR": [f"名称{c}" for c in codes],
+        "NET_BUY_AMT": rng.random(rows),
+        "RATIO": rng.random(rows),
+    })
+
+
+def _best_ms(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SECURITY_ID 列的内存代价与集合运算加速")
+    ap.add_argument("--rows", type=int, nargs="+", default=[5000, 50000, 500000])
+    ap.add_argument("--universe", type=int, default=6000, help="股票代码总数")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'内存增量':>8} {'交集(ms) 字符串→ID':>22} {'差集(ms)':>16} {'合并去重(ms)':>16}")
+    for rows in args.rows:
+        a, b = _frame(rng, rows, args.universe), _frame(rng, rows // 2, args.universe)
+        ea, eb = SECURITIES.encode(a), SECURITIES.encode(b)
+        extra = nbytes(ea) / nbytes(a) - 1
+        cells = [
+            f"{_best_ms(op, *plain):7.2f} → {_best_ms(op, *encoded):6.2f}"
+            for op, plain, encoded in (
+                (intersect_by_key, (a, b), (ea, eb)),
+                (difference_by_key, (a, b), (ea, eb)),
+                (union_by_key, ([a, b],), ([ea, eb],)),
+            )
+        ]
+        print(f"{rows:>8} {extra:>8.1%} {cells[0]:>22} {cells[1]:>16} {cells[2]:>16}")
+
+
+if __name__ == "__main__":
+    main()
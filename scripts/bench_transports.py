@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+基准测试：对比各 HTTP transport 后端（requests / urllib3 / httpx）
+
+对本地替身服务器（scripts/standin_server.py）发起串行与并发的分页请求，
+输出吞吐与延迟分位数。限速器设为 0，只比较传输层本身。
+
+用法：
+    python scripts/bench_transports.py --requests 200 --concurrency 16 --latency-ms 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.datacenter import EastMoneyDataCenter
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.sources.trade_daily import build_params as trade_params
+from standin_server import StandinServer
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    idx = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[idx]
+
+
+def run_backend(name: str, url: str, n_requests: int, concurrency: int, page_size: int):
+    cfg = EastMoneyConfig(base_url=url, transport=name, pool_size=max(concurrency, 1), max_concurrency=max(concurrency, 1))
+    try:
+        http = HttpClient(cfg, min_interval_s=0.0)
+    except ImportError as e:
+        print(f"  [{name}] 跳过：{e}")
+        return None
+    dc = EastMoneyDataCenter(cfg, http=http)
+
+    def one(i: int) -> float:
+        params = trade_params(trade_date_gte="2000-01-01", page_number=1 + i % 10, page_size=page_size)
+        t0 = time.perf_counter()
+        dc.get_raw(params)
+        return time.perf_counter() - t0
+
+    one(0)  # 预热连接
+
+    rows = {}
+    for mode, workers in (("serial", 1), ("parallel", concurrency)):
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            lat = list(ex.map(one, range(n_requests)))
+        wall = time.perf_counter() - t0
+        rows[mode] = {
+            "req/s": n_requests / wall,
+            "p50_ms": _percentile(lat, 0.50) * 1000,
+            "p95_ms": _percentile(lat, 0.95) * 1000,
+            "mean_ms": statistics.fmean(lat) * 1000,
+        }
+    http.close()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTTP transport 后端对比")
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency-ms", type=float, default=10.0)
+    ap.add_argument("--page-size", type=int, default=200)
+    ap.add_argument("--backends", default="requests,urllib3,httpx")
+    args = ap.parse_args()
+
+    with StandinServer(latency_ms=args.latency_ms) as srv:
+        print(f"替身服务器：{srv.url}（注入延迟 {args.latency_ms}ms）\n")
+        print(f"{'backend':<10}{'mode':<10}{'req/s':>10}{'p50_ms':>10}{'p95_ms':>10}{'mean_ms':>10}")
+        for name in args.backends.split(","):
+            res = run_backend(name, srv.url, args.requests, args.concurrency, args.page_size)
+            if res is None:
+                continue
+            for mode, r in res.items():
+                print(f"{name:<10}{mode:<10}{r['req/s']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['mean_ms']:>10.1f}")
+        print(f"\n替身服务器共收到请求：{srv.request_count}")
+
+
+if __name__ == "__main__":
+    main()
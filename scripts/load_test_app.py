@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+压测：多个并发会话驱动 Streamlit 页面（ui/app.py），用于容量规划
+
+每个会话是一个 streamlit.testing 的 AppTest（无浏览器，同一进程内的会话共享
+st.cache_resource，与真实部署一致），依次点击表一~表四的按钮；页面通过环境变量
+EASTMONEY_BASE_URL 指向本地替身服务器（scripts/standin_server.py）。
+
+每个会话数级别在独立子进程中运行（冷缓存、独立的内存峰值），输出：
+    p50/p95/p99：单次点击（整页重跑）的延迟，按表和全部点击统计
+    upstream/click：替身服务器收到的请求数 / 点击数（请求放大倍数）
+    peak_rss_mb / rss_per_session_mb：子进程内存峰值，及扣除启动基线后平摊到每个会话
+
+用法：
+    python scripts/load_test_app.py --sessions 1,20,50,100 --latency-ms 20
+    python scripts/load_test_app.py --sessions 20 --tables t1,t4 --rounds 3 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+APP = str(project_root / "src" / "eastmoney_tool" / "ui" / "app.py")
+
+# 各表的按钮 key（见 ui/app.py）
+BUTTONS = {"t1": "t1_fetch", "t2": "t2_run", "t3": "t3_run", "t4": "t4_run"}
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    idx = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[idx]
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 计，macOS 以字节计
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_sessions(n_sessions: int, tables: List[str], rounds: int, timeout_s: float) -> Dict:
+    """子进程内：n_sessions 个会话并发点击，返回各次点击的延迟与内存峰值。"""
+    from streamlit.testing.v1 import AppTest
+
+    # 预热一次页面加载（导入、cache_resource），基线之后的增长才算到会话上
+    AppTest.from_file(APP, default_timeout=timeout_s).run()
+    baseline = _peak_rss_mb()
+
+    def session(i: int) -> List[Dict]:
+        at = AppTest.from_file(APP, default_timeout=timeout_s)
+        clicks = []
+        t0 = time.perf_counter()
+        at.run()
+        clicks.append({"table": "load", "s": time.perf_counter() - t0, "ok": not at.exception})
+        for _ in range(rounds):
+            for t in tables:
+                t0 = time.perf_counter()
+                try:
+                    at.button(key=BUTTONS[t]).click().run()
+                    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+                except Exception as e:  # 例如上一次点击出错 st.stop()，按钮未渲染；或重跑超时
+                    errors = [f"{type(e).__name__}: {e}"]
+                    at.run()
+                clicks.append({"table": t, "s": time.perf_counter() - t0, "ok": not errors, "error": str(errors[0])[:200] if errors else ""})
+        return clicks
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as ex:
+        results = list(ex.map(session, range(n_sessions)))
+    return {
+        "clicks": [c for r in results for c in r],
+        "wall_s": time.perf_counter() - t0,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def summarize(n_sessions: int, run: Dict, upstream: int) -> Dict:
+    clicks = [c for c in run["clicks"] if c["table"] != "load"]
+    row = {
+        "sessions": n_sessions,
+        "clicks": len(clicks),
+        "errors": sum(not c["ok"] for c in run["clicks"]),
+        "wall_s": run["wall_s"],
+        "upstream": upstream,
+        "upstream/click": upstream / max(len(clicks), 1),
+        "peak_rss_mb": run["peak_rss_mb"],
+        "rss_per_session_mb": (run["peak_rss_mb"] - run["baseline_rss_mb"]) / n_sessions,
+        "first_errors": sorted({c["error"] for c in run["clicks"] if c.get("error")})[:3],
+    }
+    groups = {"all": clicks}
+    for c in run["clicks"]:
+        groups.setdefault(c["table"], []).append(c)
+    for name, group in groups.items():
+        lat = [c["s"] * 1000 for c in group]
+        for q in (50, 95, 99):
+            row[f"{name}_p{q}_ms"] = _percentile(lat, q / 100)
+    return row
+
+
+def run_level(url: str, n_sessions: int, args) -> Dict:
+    """在子进程中跑一个会话数级别（冷缓存），请求数取替身服务器计数的差值。"""
+    env = dict(os.environ, EASTMONEY_BASE_URL=url)
+    env.pop("EASTMONEY_TABLE_SERVER", None)  # 压测页面本身的拉取与计算
+    cmd = [sys.executable, __file__, "--worker", "--sessions", str(n_sessions), "--tables", args.tables,
+           "--rounds", str(args.rounds), "--timeout", str(args.timeout)]
+    before = args.server.request_count
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=project_root)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{n_sessions} 个会话的子进程失败：\n{proc.stderr[-2000:]}")
+    run = json.loads(proc.stdout.strip().splitlines()[-1])
+    return summarize(n_sessions, run, args.server.request_count - before)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streamlit 页面并发会话压测")
+    ap.add_argument("--sessions", default="1,10,20,50,100", help="逗号分隔的会话数级别")
+    ap.add_argument("--tables", default="t1,t2,t3,t4", help="每个会话依次点击的表")
+    ap.add_argument("--rounds", type=int, default=1, help="每个会话点击几轮")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="替身服务器注入的单请求延迟")
+    ap.add_argument("--timeout", type=float, default=600.0, help="单次页面重跑的超时（秒）")
+    ap.add_argument("--json", default=None, help="结果另存为 JSON")
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    tables = [t for t in args.tables.split(",") if t]
+    unknown = set(tables) - set(BUTTONS)
+    if unknown:
+        ap.error(f"未知的表：{', '.join(sorted(unknown))}（可选 {', '.join(BUTTONS)}）")
+
+    if args.worker:
+        print(json.dumps(run_sessions(int(args.sessions), tables, args.rounds, args.timeout)))
+        return
+
+    from standin_server import StandinServer
+
+    rows = []
+    with StandinServer(latency_ms=args.latency_ms) as srv:
+        args.server = srv
+        print(f"替身服务器：{srv.url}（注入延迟 {args.latency_ms}ms）；点击：{','.join(tables)} × {args.rounds} 轮\n")
+        print(f"{'sessions':>8}{'clicks':>8}{'errors':>8}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}"
+              f"{'upstream':>10}{'up/click':>10}{'peak_MB':>10}{'MB/sess':>10}")
+        for n in (int(x) for x in args.sessions.split(",") if x):
+            row = run_level(srv.url, n, args)
+            rows.append(row)
+            print(f"{n:>8}{row['clicks']:>8}{row['errors']:>8}{row['all_p50_ms']:>10.0f}{row['all_p95_ms']:>10.0f}"
+                  f"{row['all_p99_ms']:>10.0f}{row['upstream']:>10}{row['upstream/click']:>10.2f}"
+                  f"{row['peak_rss_mb']:>10.0f}{row['rss_per_session_mb']:>10.1f}")
+            for err in row["first_errors"]:
+                print(f"{'':>8}  错误：{err}")
+
+    print("\n各表 p50 / p95 / p99（ms）：")
+    for row in rows:
+        per_table = "  ".join(
+            f"{t} {row[f'{t}_p50_ms']:.0f}/{row[f'{t}_p95_ms']:.0f}/{row[f'{t}_p99_ms']:.0f}"
+            for t in ["load", *tables] if f"{t}_p50_ms" in row
+        )
+        print(f"{row['sessions']:>8}  {per_table}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
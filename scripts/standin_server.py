@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+本地替身服务器：模拟 datacenter-web 的 /api/data/v1/get 接口（用于基准测试 / 压测 / 离线调试）
+
+支持的 reportName：
+    RPT_ORGANIZATION_SEATNEW / RPT_ORGANIZATION_TRADE_DETAILSNEW / RPT_ORG_SURVEYNEW
+支持 filter 中的 STATISTICSCYCLE / TRADE_DATE>= / RECEIVE_START_DATE>，以及 sortColumns、分页、gzip。
+数据为固定随机种子生成的合成数据，字段名与真实接口一致。
+
+用法：
+    python scripts/standin_server.py --port 8765 --latency-ms 20
+    # 故障注入：5% 请求返回 503，2% 请求额外延迟 1 秒，同时在途超过 8 个即返回 429
+    python scripts/standin_server.py --error-rate 0.05 --straggler-rate 0.02 --straggler-ms 1000 --max-in-flight 8
+    # 然后令 EastMoneyConfig(base_url="http://127.0.0.1:8765/api/data/v1/get")
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+_CYCLES = ["02", "03", "04"]
+_MARKETS = [("SZ", "0"), ("SH", "6"), ("SZ", "3")]
+
+
+def _make_universe(n: int, rng: random.Random) -> List[Dict[str, str]]:
+    out = []
+    for i in range(n):
+        market, prefix = _MARKETS[i % len(_MARKETS)]
+        code = f"{prefix}{i:05d}"
+        out.append({"SECURITY_CODE": code, "SECUCODE": f"{code}.{market}", "SECURITY_NAME_ABBR": f"股票{i:05d}"})
+    return out
+
+
+def _trading_days(today: dt.date, n: int) -> List[dt.date]:
+    days, d = [], today
+    while len(days) < n:
+        if d.weekday() < 5:
+            days.append(d)
+        d -= dt.timedelta(days=1)
+    return days
+
+
+def build_dataset(n_securities: int = 3000, seed: int = 7, today: dt.date | None = None) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    today = today or dt.date.today()
+    universe = _make_universe(n_securities, rng)
+
+    seat = []
+    for cyc_i, cyc in enumerate(_CYCLES):
+        for sec in rng.sample(universe, k=min(len(universe), 400 * (cyc_i + 1))):
+            buy_amt = rng.uniform(1e6, 5e9)
+            sell_amt = rng.uniform(1e6, 5e9)
+            buy_times = rng.randint(1, 30 * (cyc_i + 1))
+            seat.append({
+                **sec,
+                "STATISTICSCYCLE": cyc,
+                "ONLIST_TIMES": buy_times + rng.randint(0, 10),
+                "BUY_TIMES": buy_times,
+                "SELL_TIMES": rng.randint(0, 30),
+                "BUY_AMT": round(buy_amt, 2),
+                "SELL_AMT": round(sell_amt, 2),
+                "NET_BUY_AMT": round(buy_amt - sell_amt, 2),
+                "CLOSE_PRICE": round(rng.uniform(3, 300), 2),
+                "CHANGE_RATE": round(rng.uniform(-30, 60), 2),
+            })
+
+    trade = []
+    for d in _trading_days(today, 45):
+        for sec in rng.sample(universe, k=min(len(universe), 120)):
+            accum = rng.uniform(5e7, 5e9)
+            net = rng.uniform(-0.2, 0.3) * accum
+            trade.append({
+                **sec,
+                "TRADE_DATE": f"{d:%Y-%m-%d} 00:00:00",
+                "BUY_TIMES": rng.randint(0, 5),
+                "SELL_TIMES": rng.randint(0, 5),
+                "BUY_AMT": round(max(net, 0) + rng.uniform(0, 1e7), 2),
+                "SELL_AMT": round(max(-net, 0) + rng.uniform(0, 1e7), 2),
+                "NET_BUY_AMT": round(net, 2),
+                "ACCUM_AMOUNT": round(accum, 2),
+                "RATIO": round(net / accum * 100, 4),
+                "CLOSE_PRICE": round(rng.uniform(3, 300), 2),
+                "CHANGE_RATE": round(rng.uniform(-10, 10), 2),
+                "EXPLANATION": "日涨幅偏离值达7%的证券",
+            })
+
+    survey = []
+    ways = ["特定对象调研", "电话会议", "现场参观", "业绩说明会"]
+    for d in _trading_days(today, 45):
+        for sec in rng.sample(universe, k=min(len(universe), 60)):
+            survey.append({
+                **sec,
+                "NOTICE_DATE": f"{d:%Y-%m-%d} 00:00:00",
+                "RECEIVE_START_DATE": f"{d:%Y-%m-%d} 00:00:00",
+                "RECEIVE_PLACE": "公司会议室",
+                "RECEIVE_WAY_EXPLAIN": rng.choice(ways),
+                "RECEPTIONIST": "董事会秘书",
+                "SUM": rng.randint(1, 400),
+                "CLOSE_PRICE": round(rng.uniform(3, 300), 2),
+                "CHANGE_RATE": round(rng.uniform(-10, 10), 2),
+            })
+
+    return {
+        "RPT_ORGANIZATION_SEATNEW": seat,
+        "RPT_ORGANIZATION_TRADE_DETAILSNEW": trade,
+        "RPT_ORG_SURVEYNEW": survey,
+    }
+
+
+_CYCLE_RE = re.compile(r'STATISTICSCYCLE="(\d+)"')
+_DATE_RE = re.compile(r"(TRADE_DATE|RECEIVE_START_DATE)(>=|>)'(\d{4}-\d{2}-\d{2})'")
+
+
+def _apply_filter(rows: List[Dict[str, Any]], flt: str) -> List[Dict[str, Any]]:
+    m = _CYCLE_RE.search(flt)
+    if m:
+        rows = [r for r in rows if r.get("STATISTICSCYCLE") == m.group(1)]
+    for col, op, date in _DATE_RE.findall(flt):
+        if op == ">=":
+            rows = [r for r in rows if r[col][:10] >= date]
+        else:
+            rows = [r for r in rows if r[col][:10] > date]
+    return rows
+
+
+def _apply_sort(rows: List[Dict[str, Any]], cols: str, types: str) -> List[Dict[str, Any]]:
+    if not cols:
+        return rows
+    keys = cols.split(",")
+    orders = (types or "").split(",")
+    # 从最次要的键开始稳定排序
+    for i in reversed(range(len(keys))):
+        desc = i < len(orders) and orders[i] == "-1"
+        rows = sorted(rows, key=lambda r, c=keys[i]: (r.get(c) is None, r.get(c)), reverse=desc)
+    return rows
+
+
+class StandinServer:
+    """替身服务器句柄：记录请求次数，可注入固定延迟与故障。
+
+    error_rate：按比例返回 503；straggler_rate / straggler_ms：按比例额外延迟（长尾）；
+    max_in_flight：同时在途请求超过该值时返回 429（模拟上游限流，0 表示不限）。
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency_ms: float = 0.0,
+        n_securities: int = 3000,
+        seed: int = 7,
+        error_rate: float = 0.0,
+        straggler_rate: float = 0.0,
+        straggler_ms: float = 1000.0,
+        max_in_flight: int = 0,
+    ) -> None:
+        self.latency_s = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.straggler_rate = straggler_rate
+        self.straggler_s = straggler_ms / 1000.0
+        self.max_in_flight = max_in_flight
+        self.dataset = build_dataset(n_securities=n_securities, seed=seed)
+        self.request_count = 0
+        self.in_flight = 0
+        self.faults = {"errors": 0, "stragglers": 0, "throttled": 0}
+        self._rng = random.Random(seed)
+        self._view_cache: Dict[Tuple[str, str, str, str], List[Dict[str, Any]]] = {}
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/data/v1/get"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # 静默
+                pass
+
+            def do_GET(self):
+                with server._count_lock:
+                    server.request_count += 1
+                    server.in_flight += 1
+                try:
+                    body, status = server.respond_with_faults(self.path)
+                finally:
+                    with server._count_lock:
+                        server.in_flight -= 1
+                if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    encoding = "gzip"
+                else:
+                    encoding = None
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                if encoding:
+                    self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def respond_with_faults(self, path: str) -> Tuple[bytes, int]:
+        """按配置注入限流 / 错误 / 长尾延迟，否则照常应答。"""
+        with self._count_lock:
+            if self.max_in_flight and self.in_flight > self.max_in_flight:
+                self.faults["throttled"] += 1
+                return json.dumps({"success": False, "message": "请求过于频繁"}).encode(), 429
+            roll_error, roll_straggler = self._rng.random(), self._rng.random()
+        delay = self.latency_s
+        if roll_straggler < self.straggler_rate:
+            delay += self.straggler_s
+            with self._count_lock:
+                self.faults["stragglers"] += 1
+        if delay:
+            time.sleep(delay)
+        if roll_error < self.error_rate:
+            with self._count_lock:
+                self.faults["errors"] += 1
+            return json.dumps({"success": False, "message": "服务暂不可用"}).encode(), 503
+        return self.respond(path)
+
+    def respond(self, path: str) -> Tuple[bytes, int]:
+        q = {k: v[0] for k, v in parse_qs(urlparse(path).query).items()}
+        rows = self.dataset.get(q.get("reportName", ""))
+        if rows is None:
+            return json.dumps({"success": False, "message": "报表不存在", "code": 9501, "result": None}).encode(), 200
+        view_key = (q["reportName"], q.get("filter", ""), q.get("sortColumns", ""), q.get("sortTypes", ""))
+        if view_key not in self._view_cache:
+            view = _apply_filter(rows, view_key[1])
+            self._view_cache[view_key] = _apply_sort(view, view_key[2], view_key[3])
+        rows = self._view_cache[view_key]
+        page_size = int(q.get("pageSize", 50))
+        page = int(q.get("pageNumber", 1))
+        chunk = rows[(page - 1) * page_size: page * page_size]
+        if not chunk:
+            payload = {"success": False, "message": "返回数据为空", "code": 9201, "result": None}
+        else:
+            pages = (len(rows) + page_size - 1) // page_size
+            payload = {"success": True, "message": "ok", "code": 0,
+                       "result": {"pages": pages, "count": len(rows), "data": chunk}}
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8"), 200
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="datacenter-web 本地替身服务器")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--securities", type=int, default=3000)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的请求比例")
+    ap.add_argument("--straggler-rate", type=float, default=0.0, help="额外延迟的请求比例")
+    ap.add_argument("--straggler-ms", type=float, default=1000.0)
+    ap.add_argument("--max-in-flight", type=int, default=0, help="超过该在途数返回 429（0 不限）")
+    args = ap.parse_args()
+
+    srv = StandinServer(
+        port=args.port,
+        latency_ms=args.latency_ms,
+        n_securities=args.securities,
+        error_rate=args.error_rate,
+        straggler_rate=args.straggler_rate,
+        straggler_ms=args.straggler_ms,
+        max_in_flight=args.max_in_flight,
+    )
+    print(f"替身服务器已启动：{srv.url}")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,15 @@
 
 用法：
     python scripts/test_apis_and_transforms.py
+    python scripts/test_apis_and_transforms.py --record cassettes/live   # 访问真实接口并录制到磁带目录
+    python scripts/test_apis_and_transforms.py --replay cassettes/live   # 离线回放（时钟固定为录制时间，结果可复现）
 """
 
 from __future__ import annotations
 
+import argparse
 import datetime as dt
+import os
 import sys
 from pathlib import Path
 
@@ -16,10 +20,13 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
+from eastmoney_tool import cassette
+from eastmoney_tool.config import REPLAY_LATENCY_ENV
 from eastmoney_tool.datacenter import EastMoneyDataCenter
 from eastmoney_tool.sources.seat_track import build_params as seat_params, CYCLE_1M, CYCLE_3M, CYCLE_6M
 from eastmoney_tool.sources.trade_daily import build_params as trade_params
 from eastmoney_tool.sources.survey import build_params as survey_params
+from eastmoney_tool.trading_calendar import CALENDAR
 from eastmoney_tool.transforms.topk import topk
 from eastmoney_tool.transforms.set_ops import intersect_by_key
 from eastmoney_tool.transforms.trade_filters import filter_netbuy_ratio
@@ -36,7 +43,7 @@ def test_api_survey():
     print_section("测试表一API：机构调研统计 (RPT_ORG_SURVEYNEW)")
     
     dc = EastMoneyDataCenter()
-    today = dt.date.today()
+    today = CALENDAR.now().date()
     date_gt = (today - dt.timedelta(days=7)).strftime("%Y-%m-%d")
     
     params = survey_params(receive_start_date_gt=date_gt, page_size=10)
@@ -118,7 +125,7 @@ def test_api_trade():
     print_section("测试表三API：机构买卖每日统计 (RPT_ORGANIZATION_TRADE_DETAILSNEW)")
     
     dc = EastMoneyDataCenter()
-    today = dt.date.today()
+    today = CALENDAR.now().date()
     date_gte = (today - dt.timedelta(days=5)).strftime("%Y-%m-%d")
     
     params = trade_params(trade_date_gte=date_gte, page_size=20)
@@ -227,7 +234,7 @@ def test_transform_t3(df_trade):
         return None
     
     dc = EastMoneyDataCenter()
-    today = dt.date.today()
+    today = CALENDAR.now().date()
     
     windows = [
         ("today", 0),
@@ -285,6 +292,18 @@ def test_transform_t3(df_trade):
 
 
 def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--record", metavar="DIR", help="录制所有请求与响应到磁带目录")
+    ap.add_argument("--replay", metavar="DIR", help="从磁带目录离线回放（不访问网络）")
+    ap.add_argument("--replay-latency-ms", type=float, default=None, help="回放延迟（默认按录制时的延迟，0 为不等待）")
+    args = ap.parse_args()
+    if args.record:
+        cassette.activate(args.record, "record")
+    elif args.replay:
+        cassette.activate(args.replay, "replay")
+        if args.replay_latency_ms is not None:
+            os.environ[REPLAY_LATENCY_ENV] = str(args.replay_latency_ms)
+
     print("="*60)
     print("  东方财富工具：API和Transform测试")
     print("="*60)
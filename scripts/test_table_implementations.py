@@ -4,10 +4,14 @@
 
 用法：
     python scripts/test_table_implementations.py
+    python scripts/test_table_implementations.py --record cassettes/live   # 访问真实接口并录制到磁带目录
+    python scripts/test_table_implementations.py --replay cassettes/live   # 离线回放（时钟固定为录制时间，结果可复现）
 """
 
 from __future__ import annotations
 
+import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -15,6 +19,8 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
+from eastmoney_tool import cassette
+from eastmoney_tool.config import REPLAY_LATENCY_ENV
 from eastmoney_tool.datacenter import EastMoneyDataCenter
 from eastmoney_tool.tables.t1_survey import get_survey_data, RANGE_1W, RANGE_1M
 from eastmoney_tool.tables.t2_seat import get_seat_topk_intersection, CYCLE_1M, CYCLE_3M, CYCLE_6M
@@ -149,6 +155,18 @@ def test_t4():
 
 
 def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--record", metavar="DIR", help="录制所有请求与响应到磁带目录")
+    ap.add_argument("--replay", metavar="DIR", help="从磁带目录离线回放（不访问网络）")
+    ap.add_argument("--replay-latency-ms", type=float, default=None, help="回放延迟（默认按录制时的延迟，0 为不等待）")
+    args = ap.parse_args()
+    if args.record:
+        cassette.activate(args.record, "record")
+    elif args.replay:
+        cassette.activate(args.replay, "replay")
+        if args.replay_latency_ms is not None:
+            os.environ[REPLAY_LATENCY_ENV] = str(args.replay_latency_ms)
+
     print("="*60)
     print("  测试所有表的实现函数")
     print("="*60)
@@ -17,5 +17,23 @@ setup(
         "streamlit>=1.32.0",
         "python-dateutil>=2.9.0.post0",
     ],
+    # optional features; pip install "eastmoney_tool[all]" for everything
+    extras_require={
+        "http2": ["httpx[http2]>=0.25.0"],  # transport="httpx"
+        "urllib3": ["urllib3>=2.0.0"],  # transport="urllib3" (also pulled in by requests)
+        "polars": ["polars>=1.0.0"],  # engine="polars"
+        "sql": ["duckdb>=1.1.0"],  # query.py / SQL tab
+        "server": ["starlette>=0.37.0", "uvicorn>=0.29.0"],  # server.py sidecar
+        "xlsx": ["xlsxwriter>=3.1.0"],  # XLSX export
+        "all": [
+            "httpx[http2]>=0.25.0",
+            "urllib3>=2.0.0",
+            "polars>=1.0.0",
+            "duckdb>=1.1.0",
+            "starlette>=0.37.0",
+            "uvicorn>=0.29.0",
+            "xlsxwriter>=3.1.0",
+        ],
+    },
 )
 
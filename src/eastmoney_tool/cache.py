@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry.
+
+    Used to keep fetched/aggregated snapshots around so that parameter tweaks in the UI
+    (thresholds, TopK) are answered from memory instead of new upstream requests.
+    `ttl_s` is the default lifetime; `set` / `get_or_compute` accept a per-entry one
+    (e.g. until the report's next publication, see `trading_calendar`).
+
+    With `store` (a `results.ResultStore`) the values live in that store and count against
+    its byte budget; this cache keeps only the expiry times. A value the store evicted is
+    a miss, like an expired one.
+    """
+
+    def __init__(self, ttl_s: float = 600.0, max_entries: int = 64, store: Optional[Any] = None) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.store = store
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: Hashable) -> None:
+        del self._data[key]
+        if self.store is not None:
+            self.store.invalidate((id(self), key))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if self.store is not None:
+                value = self.store.peek((id(self), key))
+            if value is None or time.monotonic() >= expires_at:
+                self._drop(key)
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_s: Optional[float] = None) -> None:
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                # drop the entry closest to expiry
+                oldest = min(self._data, key=lambda k: self._data[k][0])
+                self._drop(oldest)
+            if self.store is not None:
+                self.store.set((id(self), key), value)
+                value = None
+            self._data[key] = (time.monotonic() + (self.ttl_s if ttl_s is None else ttl_s), value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl_s: Optional[float] = None) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl_s=ttl_s)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            for k in list(self._data) if key is None else [k for k in (key,) if k in self._data]:
+                self._drop(k)
@@ -0,0 +1,158 @@
+"""Record/replay transports for deterministic offline runs.
+
+A cassette is a directory with one gzip-compressed JSON file per distinct request, keyed
+by the URL path and the query params. The host is not part of the key, so a cassette
+recorded against the live site or a stand-in replays under any base_url:
+
+    EASTMONEY_CASSETTE=cassettes/daily EASTMONEY_CASSETTE_MODE=record  python ...  # live + save
+    EASTMONEY_CASSETTE=cassettes/daily                                 python ...  # offline
+
+In record mode requests go to the configured backend and every response is saved,
+including error statuses. When a request is answered twice (a retry or a hedge), the
+last answer is kept. In replay mode nothing touches the network. A request missing from
+the cassette raises `CassetteMiss`. Replays sleep for the recorded latency by default;
+set `EastMoneyConfig.replay_latency_ms` (or EASTMONEY_REPLAY_LATENCY_MS) to use a fixed
+synthetic latency instead, 0 for none.
+
+Table builders derive their date filters from the trading calendar, so the clock must
+match the recording. `cassette.json` keeps `recorded_at`, and `activate()` pins the
+calendar clock to it (EASTMONEY_NOW).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .config import CASSETTE_ENV, CASSETTE_MODE_ENV
+from .trading_calendar import CALENDAR, NOW_ENV
+from .transport import HttpResponse, Transport
+
+MANIFEST = "cassette.json"
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay mode got a request that was never recorded."""
+
+
+class Cassette:
+    """Directory of recorded interactions."""
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([urlparse(url).path, items], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json.gz"
+
+    def __contains__(self, key: str) -> bool:
+        return self._file(key).exists()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.path.glob("*.json.gz"))
+
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads((self.path / MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def start_recording(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = {"recorded_at": CALENDAR.now().isoformat(timespec="seconds")}
+        (self.path / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    def save(self, url: str, params: Optional[Dict[str, Any]], resp: HttpResponse, latency_s: float) -> None:
+        entry = {
+            "request": {"path": urlparse(url).path, "params": {k: str(v) for k, v in (params or {}).items()}},
+            "response": {"status_code": resp.status_code, "url": resp.url, "text": resp.text},
+            "latency_s": latency_s,
+        }
+        body = gzip.compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"), compresslevel=6)
+        # parallel page fetches record concurrently: write aside, then rename into place
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp, self._file(self.key(url, params)))
+
+    def load(self, url: str, params: Optional[Dict[str, Any]]) -> Tuple[HttpResponse, float]:
+        try:
+            body = self._file(self.key(url, params)).read_bytes()
+        except FileNotFoundError:
+            raise CassetteMiss(
+                f"No recorded response for {urlparse(url).path} {params} in cassette '{self.path}' "
+                f"(recorded_at={self.manifest().get('recorded_at')}). Record it with {CASSETTE_MODE_ENV}=record."
+            ) from None
+        entry = json.loads(gzip.decompress(body))
+        r = entry["response"]
+        return HttpResponse(status_code=r["status_code"], text=r["text"], url=r["url"]), entry["latency_s"]
+
+
+class RecordingTransport(Transport):
+    """Forwards to a real backend and saves every response into the cassette."""
+
+    def __init__(self, inner: Transport, cassette: Cassette) -> None:
+        self.inner = inner
+        self.cassette = cassette
+        self.name = f"record+{inner.name}"
+        self.transient_errors = inner.transient_errors
+        cassette.start_recording()
+
+    def get(self, url, params, headers, timeout) -> HttpResponse:
+        t0 = time.perf_counter()
+        resp = self.inner.get(url, params, headers, timeout)
+        self.cassette.save(url, params, resp, time.perf_counter() - t0)
+        return resp
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """Serves recorded responses; `latency_ms=None` replays the recorded latency."""
+
+    name = "replay"
+    offline = True
+
+    def __init__(self, cassette: Cassette, latency_ms: Optional[float] = None) -> None:
+        if not cassette.path.is_dir():
+            raise FileNotFoundError(f"Cassette directory '{cassette.path}' does not exist.")
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+
+    def get(self, url, params, headers, timeout) -> HttpResponse:
+        resp, recorded_s = self.cassette.load(url, params)
+        delay = recorded_s if self.latency_ms is None else self.latency_ms / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+        return resp
+
+
+def activate(path, mode: str = "replay", pin_clock: bool = True) -> None:
+    """Route every client built afterwards (default config) through the cassette at `path`.
+
+    In replay mode the calendar clock is pinned to the cassette's `recorded_at`, unless
+    EASTMONEY_NOW is already set, so that date filters match the recorded requests.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown cassette mode '{mode}'. Expected one of: {', '.join(MODES)}.")
+    os.environ[CASSETTE_ENV] = str(path)
+    os.environ[CASSETTE_MODE_ENV] = mode
+    if mode == "replay" and pin_clock and not os.environ.get(NOW_ENV):
+        recorded_at = Cassette(path).manifest().get("recorded_at")
+        if recorded_at:
+            os.environ[NOW_ENV] = recorded_at
+
@@ -0,0 +1,128 @@
+"""Adaptive concurrency, retries and hedging for upstream requests.
+
+`HttpClient` runs every request through three mechanisms:
+
+- `AIMDLimiter` caps the attempts in flight. The cap grows by one after about `limit`
+  fast successful responses (additive increase). It is multiplied by `backoff` on a
+  throttle (429/503), a server error, a connection error or timeout, or a response much
+  slower than the recent low-percentile latency (multiplicative decrease, at most once
+  per `cooldown_s` so one congestion event counts once).
+  `RequestScheduler` sizes its slots by the same limit, so requests are ordered by
+  priority there and not queued again here.
+- `RetryPolicy` retries transient failures (connection errors, timeouts, 429/5xx) with
+  full-jitter exponential backoff.
+- Hedging (off unless `EastMoneyConfig.hedge_percentile` is set): an attempt still
+  running after that percentile of recent latencies gets one duplicate, and the first good
+  response wins. A hedge only starts when the limiter has a spare slot, so hedges never
+  push upstream past the current limit.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, Optional
+
+OK = "ok"
+THROTTLED = "throttled"
+FAILED = "failed"
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def outcome_of(status_code: int) -> str:
+    if status_code in THROTTLE_STATUSES:
+        return THROTTLED
+    return FAILED if status_code >= 500 else OK
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to wait before retrying a transient failure."""
+
+    attempts: int = 3
+    base_s: float = 0.25
+    cap_s: float = 8.0
+    statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+    def backoff_s(self, retry: int) -> float:
+        """Full-jitter delay before retry number `retry` (1 = the first retry)."""
+        return random.uniform(0.0, min(self.cap_s, self.base_s * 2 ** (retry - 1)))
+
+
+class AIMDLimiter:
+    """Thread-safe semaphore whose size follows observed latency and errors (AIMD)."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff: float = 0.5,
+        slow_factor: float = 4.0,
+        cooldown_s: float = 1.0,
+        window: int = 200,
+        baseline_q: float = 0.1,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.backoff = backoff
+        self.slow_factor = slow_factor
+        # "slow" is relative to this percentile of the window, not its minimum: one
+        # unusually fast response must not mark every normal one as congestion
+        self.baseline_q = baseline_q
+        self.cooldown_s = cooldown_s
+        self.in_flight = 0
+        self._latencies: Deque[float] = deque(maxlen=window)  # successful attempts, seconds
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        self.counts: Dict[str, int] = {OK: 0, THROTTLED: 0, FAILED: 0, "slow": 0, "decreases": 0}
+
+    def acquire(self, block: bool = True) -> bool:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                if not block:
+                    return False
+                self._cond.wait()
+            self.in_flight += 1
+            return True
+
+    def release(self, latency_s: float, outcome: str) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            slow = False
+            if outcome == OK:
+                baseline = self._baseline() if len(self._latencies) >= 10 else None
+                slow = baseline is not None and latency_s > self.slow_factor * max(baseline, 0.005)
+                self._latencies.append(latency_s)
+                self.counts["slow"] += slow
+            now = time.monotonic()
+            if outcome != OK or slow:
+                if now - self._last_decrease >= self.cooldown_s:
+                    self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                    self._last_decrease = now
+                    self.counts["decreases"] += 1
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def _baseline(self) -> float:
+        values = sorted(self._latencies)
+        return values[int(self.baseline_q * (len(values) - 1))]
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """Latency percentile of recent successful attempts (None until enough samples)."""
+        with self._cond:
+            if len(self._latencies) < min_samples:
+                return None
+            values = sorted(self._latencies)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self.in_flight, **self.counts}
@@ -1,15 +1,56 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+DEFAULT_BASE_URL = "https://datacenter-web.eastmoney.com/api/data/v1/get"
+# Overrides the default endpoint, e.g. a local stand-in (scripts/standin_server.py) for load tests.
+BASE_URL_ENV = "EASTMONEY_BASE_URL"
+# Record/replay cassettes (see cassette.py): directory, mode ("record" | "replay") and replay latency.
+CASSETTE_ENV = "EASTMONEY_CASSETTE"
+CASSETTE_MODE_ENV = "EASTMONEY_CASSETTE_MODE"
+REPLAY_LATENCY_ENV = "EASTMONEY_REPLAY_LATENCY_MS"
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    return float(value) if value else None
+
 
 @dataclass(frozen=True)
 class EastMoneyConfig:
     """Runtime config.
     Note: for datacenter-web endpoints, we usually don't need cookies/tokens.
     """
-    base_url: str = "https://datacenter-web.eastmoney.com/api/data/v1/get"
+    base_url: str = field(default_factory=lambda: os.environ.get(BASE_URL_ENV, DEFAULT_BASE_URL))
     timeout_s: int = 15
     user_agent: str = (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/123.0.0.0 Safari/537.36"
     )
+    # Transport backend: "requests" (default), "urllib3" or "httpx" (HTTP/2 capable).
+    transport: str = "requests"
+    # Max pooled connections per host; should be >= the number of parallel fetches.
+    pool_size: int = 16
+    # Keep-alive seconds for pooled connections (urllib3: TCP idle, httpx: pool expiry); 0 disables.
+    keepalive_s: int = 60
+    # Only used by the httpx backend.
+    http2: bool = True
+    # Result container for table builders: "pandas" (default) or "arrow" (pyarrow.Table end to end).
+    result_format: str = "pandas"
+    # Transform engine for table builders: "pandas" (default, eager) or "polars" (lazy, multi-threaded).
+    engine: str = "pandas"
+    # Adaptive in-flight limit for upstream attempts (AIMD, see concurrency.py); starts at half the max.
+    max_concurrency: int = 8
+    min_concurrency: int = 1
+    # Attempts per request for connection errors, timeouts and 429/5xx, with jittered backoff.
+    max_attempts: int = 3
+    retry_backoff_s: float = 0.25
+    # Hedge an attempt still running after this latency percentile (e.g. 0.95); None disables.
+    hedge_percentile: Optional[float] = None
+    # Cassette directory: "record" saves every response, "replay" serves them offline (no network).
+    cassette: Optional[str] = field(default_factory=lambda: os.environ.get(CASSETTE_ENV) or None)
+    cassette_mode: str = field(default_factory=lambda: os.environ.get(CASSETTE_MODE_ENV, "replay"))
+    # Replay latency: None sleeps for the recorded latency, otherwise a fixed value (0 = instant).
+    replay_latency_ms: Optional[float] = field(default_factory=lambda: _env_float(REPLAY_LATENCY_ENV))
     # Add proxy or headers here if needed later.
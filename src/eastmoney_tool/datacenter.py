@@ -1,17 +1,31 @@
 from __future__ import annotations
 
+import contextvars
 import json
 import re
-from typing import Any, Dict, Optional
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
+import pyarrow as pa
 
 from .config import EastMoneyConfig
+from .fingerprint import stamp
 from .http import HttpClient
+from .profiling import profiled
+from .securities import SECURITIES
 
 
 _JSONP_RE = re.compile(r"^[^(]*\((.*)\)\s*;?\s*$", re.DOTALL)
 
+Frame = Union[pd.DataFrame, pa.Table]
+TRUNCATE_MODES = ("warn", "raise")
+
+
+class PageLimitWarning(UserWarning):
+    """The API reported more pages than `max_pages`; the result is missing the rest."""
+
 
 class EastMoneyDataCenter:
     """EastMoney datacenter-web API client.
@@ -27,6 +41,12 @@ class EastMoneyDataCenter:
         self.cfg = cfg or EastMoneyConfig()
         self.http = http or HttpClient(self.cfg)
 
+    @property
+    def cache_namespace(self) -> Tuple[str, str]:
+        """What a snapshot fetched through this client looks like: (endpoint, result container).
+        Table-level caches key on this so that compute-only settings (engine) share snapshots."""
+        return (self.cfg.base_url, self.cfg.result_format)
+
     @staticmethod
     def _loads_json_or_jsonp(text: str) -> Dict[str, Any]:
         text = text.strip()
@@ -43,24 +63,116 @@ class EastMoneyDataCenter:
             raise RuntimeError(f"HTTP {resp.status_code} for {resp.url}\nBody: {resp.text[:300]}")
         return self._loads_json_or_jsonp(resp.text)
 
-    def get_result_df(self, params: Dict[str, Any]) -> pd.DataFrame:
+    def get_result_page(self, params: Dict[str, Any]) -> Tuple[pd.DataFrame, int]:
+        """Fetch one page; returns (rows, total page count reported by the API)."""
         payload = self.get_raw(params)
-        # Typical schema: {"result": {"data": [...], "pages": ..., "total": ...}, "success": True, ...}
+        # Typical schema: {"result": {"data": [...], "pages": ..., "count": ...}, "success": True, ...}
         result = payload.get("result") or {}
         data = result.get("data") or []
-        return pd.DataFrame(data)
+        # intern SECURITY_CODE -> int32 SECURITY_ID at ingest (used by transforms.set_ops)
+        return SECURITIES.encode(pd.DataFrame(data)), int(result.get("pages") or 0)
+
+    def get_result_df(self, params: Dict[str, Any]) -> pd.DataFrame:
+        return self.get_result_page(params)[0]
+
+    def get_result_arrow_page(self, params: Dict[str, Any]) -> Tuple[pa.Table, int]:
+        """Like `get_result_page`, but decodes result.data straight into a pyarrow.Table."""
+        payload = self.get_raw(params)
+        result = payload.get("result") or {}
+        table = pa.Table.from_pylist(result.get("data") or [])
+        return SECURITIES.encode_arrow(table), int(result.get("pages") or 0)
+
+    def _fetch_pages(
+        self,
+        fetch: Callable[[Dict[str, Any]], Tuple[Any, int]],
+        params: Dict[str, Any],
+        page_size: int,
+        max_pages: int,
+        is_empty: Callable[[Any], bool],
+        on_truncate: str = "warn",
+    ) -> List[Any]:
+        """Page 1 first; once it reports the page count, fetch the remaining pages in parallel.
+
+        The upstream load stays bounded by the client's adaptive in-flight limit and
+        request spacing; without a reported count pages are fetched one by one. Chunks are
+        returned in page order and stop at the first empty page. When more pages are
+        reported than `max_pages`, `on_truncate` decides: "warn" (PageLimitWarning, the
+        first `max_pages` pages are returned) or "raise" (RuntimeError, nothing fetched
+        beyond page 1).
+        """
+        if on_truncate not in TRUNCATE_MODES:
+            raise ValueError(f"Unknown on_truncate '{on_truncate}'. Expected one of: {', '.join(TRUNCATE_MODES)}.")
 
-    def get_all_pages_df(self, params: Dict[str, Any], page_size: int = 500, max_pages: int = 20) -> pd.DataFrame:
-        """Fetch multiple pages and concat. Use carefully to avoid heavy traffic."""
-        page = 1
-        frames = []
-        while page <= max_pages:
+        def one(page: int) -> Tuple[Any, int]:
             p = dict(params)
             p["pageNumber"] = page
             p["pageSize"] = page_size
-            df = self.get_result_df(p)
-            if df.empty:
+            return fetch(p)
+
+        first, reported = one(1)
+        if is_empty(first):
+            return []
+        chunks = [first]
+        if not reported:
+            for page in range(2, max_pages + 1):
+                chunk, _ = one(page)
+                if is_empty(chunk):
+                    break
+                chunks.append(chunk)
+            return chunks
+
+        if reported > max_pages:
+            message = (
+                f"{params.get('reportName')}: the API reports {reported} pages of {page_size} rows, "
+                f"more than max_pages={max_pages}; raise max_pages or narrow the query."
+            )
+            if on_truncate == "raise":
+                raise RuntimeError(message)
+            warnings.warn(message + f" Only the first {max_pages} pages are used.", PageLimitWarning, stacklevel=3)
+        rest = range(2, min(reported, max_pages) + 1)
+        if not rest:
+            return chunks
+        with ThreadPoolExecutor(max_workers=min(len(rest), self.cfg.max_concurrency)) as pool:
+            # copy the context per page so request class / tenant / profiler reach the workers
+            futures = [pool.submit(contextvars.copy_context().run, one, page) for page in rest]
+            try:
+                results = [f.result()[0] for f in futures]
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                raise
+        for chunk in results:
+            if is_empty(chunk):
                 break
-            frames.append(df)
-            page += 1
-        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            chunks.append(chunk)
+        return chunks
+
+    def get_all_pages_df(
+        self, params: Dict[str, Any], page_size: int = 500, max_pages: int = 20, on_truncate: str = "warn"
+    ) -> pd.DataFrame:
+        """Fetch multiple pages and concat. Use carefully to avoid heavy traffic.
+
+        Stops at the page count reported by the first response, so a short window costs
+        exactly as many requests as it has pages; pages after the first are fetched in
+        parallel. The result is stamped with its content fingerprint (see `fingerprint.py`).
+        """
+        frames = self._fetch_pages(self.get_result_page, params, page_size, max_pages, lambda df: df.empty, on_truncate)
+        return stamp(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame())
+
+    def get_all_pages_arrow(
+        self, params: Dict[str, Any], page_size: int = 500, max_pages: int = 20, on_truncate: str = "warn"
+    ) -> pa.Table:
+        """Arrow counterpart of `get_all_pages_df` (pages are concatenated without copying)."""
+        tables = self._fetch_pages(
+            self.get_result_arrow_page, params, page_size, max_pages, lambda t: t.num_rows == 0, on_truncate
+        )
+        return stamp(pa.concat_tables(tables, promote_options="permissive") if tables else pa.table({}))
+
+    @profiled
+    def get_all_pages(
+        self, params: Dict[str, Any], page_size: int = 500, max_pages: int = 20, on_truncate: str = "warn"
+    ) -> Frame:
+        """Fetch all pages in the container selected by `cfg.result_format`."""
+        if self.cfg.result_format == "arrow":
+            return self.get_all_pages_arrow(params, page_size=page_size, max_pages=max_pages, on_truncate=on_truncate)
+        return self.get_all_pages_df(params, page_size=page_size, max_pages=max_pages, on_truncate=on_truncate)
@@ -0,0 +1,167 @@
+"""Chunked export of table results: CSV, Parquet and XLSX.
+
+`df.to_csv()` followed by a download builds the whole formatted file in memory next to the
+result, which doubles peak memory for large frames. Here the cached result (pandas or Arrow)
+is walked in slices of `chunk_rows`. Each slice drops SECURITY_ID, converts amounts to 万元
+and is encoded on its own, so the extra memory is one chunk whatever the result size:
+
+- csv:     UTF-8 with BOM (opens correctly in Excel), header once, one block of bytes per chunk
+- parquet: one row group per chunk, bytes handed out as each row group is written
+- xlsx:    rows streamed into a temporary file by xlsxwriter in constant-memory mode (needs
+           `pip install xlsxwriter`), then read back in blocks
+
+`iter_export` yields bytes for streaming responses (see server.py). `write_export` writes
+the same bytes to a file.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from typing import Dict, Iterator, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .securities import drop_ids
+from .transforms import _arrow
+from .ui.formatting import format_amount_to_wan
+
+CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # Excel's sheet limit minus the header row
+_READ_BLOCK = 1 << 20
+
+# format -> (media type, file extension)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def _num_rows(frame) -> int:
+    return frame.num_rows if _arrow.is_arrow(frame) else len(frame)
+
+
+def iter_chunks(frame, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Formatted pandas slices of `frame`; only one slice is materialized at a time."""
+    for start in range(0, _num_rows(frame), chunk_rows):
+        if _arrow.is_arrow(frame):
+            chunk = format_amount_to_wan(drop_ids(frame.slice(start, chunk_rows))).to_pandas()
+        else:
+            chunk = format_amount_to_wan(drop_ids(frame.iloc[start:start + chunk_rows]))
+        yield chunk
+
+
+def iter_csv(frame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    yield "\ufeff".encode("utf-8")
+    for i, chunk in enumerate(iter_chunks(frame, chunk_rows)):
+        yield chunk.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink that hands out what was written so far; tell() keeps counting."""
+
+    def __init__(self) -> None:
+        self._parts = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_parquet(frame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    sink = _Drain()
+    writer = None
+    try:
+        for chunk in iter_chunks(frame, chunk_rows):
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table, row_group_size=chunk_rows)
+            yield sink.take()
+        if writer is None:  # empty result: a valid file without rows
+            schema = frame.schema if _arrow.is_arrow(frame) else pa.Schema.from_pandas(frame, preserve_index=False)
+            writer = pq.ParquetWriter(sink, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.take()
+
+
+def _xlsx_value(v):
+    if v is None or (isinstance(v, float) and v != v) or v is pd.NaT:
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime().replace(tzinfo=None)
+    return v
+
+
+def iter_xlsx(frame, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    try:
+        import xlsxwriter
+    except ImportError as e:  # optional dependency
+        raise ImportError("XLSX export requires `pip install xlsxwriter`.") from e
+    if _num_rows(frame) > XLSX_MAX_ROWS:
+        raise ValueError(f"{_num_rows(frame)} rows exceed the XLSX sheet limit ({XLSX_MAX_ROWS}); export CSV or Parquet instead.")
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(
+            path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"}
+        )
+        sheet = workbook.add_worksheet()
+        row = 0
+        for chunk in iter_chunks(frame, chunk_rows):
+            if row == 0:
+                sheet.write_row(0, 0, [str(c) for c in chunk.columns])
+                row = 1
+            for values in chunk.itertuples(index=False, name=None):
+                sheet.write_row(row, 0, [_xlsx_value(v) for v in values])
+                row += 1
+        workbook.close()
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(_READ_BLOCK)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.remove(path)
+
+
+_WRITERS = {"csv": iter_csv, "parquet": iter_parquet, "xlsx": iter_xlsx}
+
+
+def iter_export(frame, fmt: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Encoded `frame` in `fmt`, as a sequence of byte blocks."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'. Expected one of: {', '.join(FORMATS)}.")
+    return _WRITERS[fmt](frame, chunk_rows)
+
+
+def write_export(frame, fmt: str, path, chunk_rows: int = CHUNK_ROWS) -> str:
+    """Write `frame` to `path` block by block; returns the path."""
+    blocks = iter_export(frame, fmt, chunk_rows)
+    with open(path, "wb") as f:
+        for block in blocks:
+            f.write(block)
+    return str(path)
@@ -0,0 +1,156 @@
+"""Vectorized content fingerprints of snapshot frames and results.
+
+Row hashes come from `pd.util.hash_pandas_object` (one uint64 per row; column order and
+the process-local SECURITY_ID do not matter). A frame fingerprint is a digest of the
+container type (pandas / Arrow), the column names and the row hashes in order. `EastMoneyDataCenter` stamps every snapshot it
+fetches, so "did upstream change?" is a string comparison; frames derived later are
+fingerprinted on first use and remembered for as long as the object lives.
+
+Stamped frames are treated as immutable: a frame modified in place keeps its old stamp.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .securities import ID_COL
+from .transforms import _arrow
+from .transforms.ranking import RankingIndex
+
+KeyCols = Union[str, Sequence[str], None]
+
+# id(frame) -> (weak reference, fingerprint)
+_STAMPS: Dict[int, Tuple[weakref.ref, str]] = {}
+_LOCK = threading.Lock()
+
+
+def _pandas(frame) -> pd.DataFrame:
+    return frame.to_pandas() if _arrow.is_arrow(frame) else frame
+
+
+def _hashable(s: pd.Series) -> pd.Series:
+    # list / dict cells (nested JSON) are hashed by their repr
+    if s.dtype == object and s.map(lambda v: isinstance(v, (list, dict))).any():
+        return s.map(lambda v: repr(v) if isinstance(v, (list, dict)) else v)
+    return s
+
+
+def row_hashes(frame, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+    """uint64 hash of every row over `columns` (default: all but SECURITY_ID, in name order)."""
+    df = _pandas(frame)
+    cols = list(columns) if columns is not None else sorted(c for c in df.columns if c != ID_COL)
+    if len(df) == 0 or not cols:
+        return np.zeros(len(df), dtype=np.uint64)
+    sub = pd.DataFrame({c: _hashable(df[c]) for c in cols})
+    return pd.util.hash_pandas_object(sub, index=False).to_numpy()
+
+
+def frame_fingerprint(frame, hashes: Optional[np.ndarray] = None) -> str:
+    """Digest of a frame's container type, column names and row hashes (in row order)."""
+    is_arrow = _arrow.is_arrow(frame)
+    names = frame.column_names if is_arrow else list(frame.columns)
+    # the container is part of the content: results computed from a Table are Tables
+    h = hashlib.sha1(("arrow" if is_arrow else "pandas").encode())
+    h.update("\x1f".join(sorted(str(c) for c in names if c != ID_COL)).encode())
+    h.update(np.ascontiguousarray(row_hashes(frame) if hashes is None else hashes).tobytes())
+    return h.hexdigest()
+
+
+def _lookup(obj) -> Optional[str]:
+    with _LOCK:
+        item = _STAMPS.get(id(obj))
+    if item is not None and item[0]() is obj:
+        return item[1]
+    return None
+
+
+def stamp(frame, fp: Optional[str] = None):
+    """Record `frame`'s fingerprint (computed unless given) and return the frame."""
+    fp = fp or frame_fingerprint(frame)
+    key = id(frame)
+
+    def forget(ref: weakref.ref, key: int = key) -> None:
+        with _LOCK:
+            if _STAMPS.get(key, (None,))[0] is ref:
+                del _STAMPS[key]
+
+    with _LOCK:
+        _STAMPS[key] = (weakref.ref(frame, forget), fp)
+    return frame
+
+
+def fingerprint(value: Any) -> str:
+    """Content fingerprint of a table result: frames, RankingIndex, containers of them, scalars."""
+    if isinstance(value, pd.DataFrame) or _arrow.is_arrow(value):
+        fp = _lookup(value)
+        if fp is None:
+            fp = frame_fingerprint(value)
+            stamp(value, fp)
+        return fp
+    if isinstance(value, RankingIndex):
+        return fingerprint(value.df)
+    indexes = getattr(value, "indexes", None)  # tables.t2_seat.SeatPanel: {cycle: RankingIndex}
+    if isinstance(indexes, dict):
+        value = indexes
+    if isinstance(value, dict):
+        parts = [f"{k!r}={fingerprint(v)}" for k, v in sorted(value.items(), key=lambda kv: repr(kv[0]))]
+    elif isinstance(value, (list, tuple)):
+        parts = [fingerprint(v) for v in value]
+    else:
+        parts = [type(value).__name__, repr(value)]
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class FrameDiff:
+    """Rows of `new` that are not in `old` and vice versa (compared by row hash).
+
+    With key columns, a key present on both sides with different content is `changed`
+    (rows as in `new`) instead of being both added and removed.
+    """
+
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    changed: pd.DataFrame
+    unchanged: int
+
+    @property
+    def empty(self) -> bool:
+        return self.added.empty and self.removed.empty and self.changed.empty
+
+
+def diff_frames(old, new, key: KeyCols = None) -> FrameDiff:
+    """What changed from snapshot `old` to snapshot `new`; identical fingerprints short-circuit."""
+    old, new = _pandas(old), _pandas(new)
+    if len(old) and len(new) and fingerprint(old) == fingerprint(new):
+        empty = new.iloc[0:0]
+        return FrameDiff(empty, empty, empty, len(new))
+
+    cols = sorted((set(old.columns) | set(new.columns)) - {ID_COL})
+    old_h = row_hashes(old.reindex(columns=cols))
+    new_h = row_hashes(new.reindex(columns=cols))
+    in_old = np.isin(new_h, old_h)
+    in_new = np.isin(old_h, new_h)
+
+    keys = [key] if isinstance(key, str) else list(key or [])
+    if keys and set(keys) <= set(old.columns) and set(keys) <= set(new.columns):
+        old_k, new_k = row_hashes(old, keys), row_hashes(new, keys)
+        key_in_old = np.isin(new_k, old_k)
+        key_in_new = np.isin(old_k, new_k)
+    else:
+        key_in_old = np.zeros(len(new), dtype=bool)
+        key_in_new = np.zeros(len(old), dtype=bool)
+
+    return FrameDiff(
+        added=new.loc[~in_old & ~key_in_old].reset_index(drop=True),
+        removed=old.loc[~in_new & ~key_in_new].reset_index(drop=True),
+        changed=new.loc[~in_old & key_in_old].reset_index(drop=True),
+        unchanged=int(in_old.sum()),
+    )
@@ -1,40 +1,142 @@
 from __future__ import annotations
 
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any, Dict, Optional
 
-import requests
-
+from .concurrency import FAILED, AIMDLimiter, RetryPolicy, outcome_of
 from .config import EastMoneyConfig
+from .transport import HttpResponse, Transport, make_transport
 
-
-@dataclass
-class HttpResponse:
-    status_code: int
-    text: str
-    url: str
+__all__ = ["HttpClient", "HttpResponse"]
 
 
 class HttpClient:
-    """Tiny wrapper over requests.Session with optional rate limiting."""
+    """Tiny wrapper over a pluggable transport with rate limiting, retries and hedging.
 
-    def __init__(self, cfg: EastMoneyConfig, min_interval_s: float = 0.25) -> None:
+    The limiter spaces request starts by `min_interval_s` and is thread-safe,
+    so parallel fetchers share one upstream budget regardless of backend.
+    On top of that every attempt holds a slot of an adaptive in-flight limit
+    (`concurrency.AIMDLimiter`), transient failures are retried with jittered
+    backoff, and with `cfg.hedge_percentile` set a straggling attempt gets one
+    duplicate request (see concurrency.py).
+    """
+
+    def __init__(
+        self,
+        cfg: EastMoneyConfig,
+        min_interval_s: float = 0.25,
+        transport: Optional[Transport] = None,
+    ) -> None:
         self.cfg = cfg
-        self.session = requests.Session()
-        self.min_interval_s = min_interval_s
-        self._last_ts = 0.0
+        self.transport = transport or make_transport(cfg)
+        # nothing to protect when replaying a cassette
+        self.min_interval_s = 0.0 if getattr(self.transport, "offline", False) else min_interval_s
+        self._lock = threading.Lock()
+        self._next_ts = 0.0
+        self.limiter = AIMDLimiter(
+            initial=max(cfg.min_concurrency, cfg.max_concurrency // 2),
+            min_limit=cfg.min_concurrency,
+            max_limit=cfg.max_concurrency,
+        )
+        self.retry = RetryPolicy(attempts=max(1, cfg.max_attempts), base_s=cfg.retry_backoff_s)
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
 
-    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
-        now = time.time()
-        wait = self.min_interval_s - (now - self._last_ts)
+    def _throttle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_ts)
+            self._next_ts = start + self.min_interval_s
+        wait = start - now
         if wait > 0:
             time.sleep(wait)
 
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
         h = {"User-Agent": self.cfg.user_agent, "Referer": "https://data.eastmoney.com/"}
         if headers:
             h.update(headers)
 
-        r = self.session.get(url, params=params, headers=h, timeout=self.cfg.timeout_s)
-        self._last_ts = time.time()
-        return HttpResponse(status_code=r.status_code, text=r.text, url=r.url)
+        # requests silently drops None-valued params; do it here for every backend.
+        if params:
+            params = {k: v for k, v in params.items() if v is not None}
+
+        for attempt in range(1, self.retry.attempts + 1):
+            if attempt > 1:
+                self._count("retries")
+                time.sleep(self.retry.backoff_s(attempt - 1))
+            last = attempt == self.retry.attempts
+            try:
+                resp = self._attempt(url, params, h)
+            except getattr(self.transport, "transient_errors", (OSError,)):
+                if last:
+                    raise
+                continue
+            if last or resp.status_code not in self.retry.statuses:
+                return resp
+        raise AssertionError("unreachable")
+
+    def _attempt(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> HttpResponse:
+        q = self.cfg.hedge_percentile
+        delay = self.limiter.percentile(q) if q else None
+        if delay is None:
+            return self._send(url, params, headers)
+        return self._hedged(url, params, headers, delay)
+
+    def _send(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str], acquired: bool = False) -> HttpResponse:
+        """One attempt under a limiter slot; its latency and outcome feed the limiter."""
+        if not acquired:
+            self.limiter.acquire()
+        outcome = FAILED
+        t0 = time.monotonic()
+        try:
+            self._throttle()
+            t0 = time.monotonic()
+            resp = self.transport.get(url, params, headers, self.cfg.timeout_s)
+            outcome = outcome_of(resp.status_code)
+            return resp
+        finally:
+            self.limiter.release(time.monotonic() - t0, outcome)
+
+    def _hedged(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str], delay: float) -> HttpResponse:
+        """Start the attempt; if it outlives `delay` and a slot is free, race one duplicate against it."""
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=2 * self.cfg.max_concurrency, thread_name_prefix="eastmoney-hedge"
+                )
+            pool = self._hedge_pool
+        primary = pool.submit(self._send, url, params, headers)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.limiter.acquire(block=False):
+            return primary.result()
+        self._count("hedges")
+        hedge = pool.submit(self._send, url, params, headers, True)
+
+        pending = {primary, hedge}
+        fallback: Optional[Future] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None and f.result().status_code not in self.retry.statuses:
+                    if f is hedge:
+                        self._count("hedge_wins")
+                    return f.result()  # the loser finishes in the background and frees its slot
+                fallback = fallback or f
+        return fallback.result()  # both failed: surface the first failure (may raise)
+
+    def stats(self) -> Dict[str, float]:
+        """Adaptive limit, attempt outcomes and retry/hedge counters."""
+        return {**self.limiter.stats(), "retries": self.retries, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+    def close(self) -> None:
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.transport.close()
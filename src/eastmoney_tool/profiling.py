@@ -0,0 +1,198 @@
+"""On-demand sampling profiler for table builds and upstream fetches.
+
+Off by default. When off, a `profiled` function costs one flag check before calling
+through. Turn it on with EASTMONEY_PROFILE=1 at process start, or with `set_enabled(True)`
+(the app's hidden sidebar switch, shown with `?debug=1`).
+
+While on, each outermost profiled call samples the Python stacks of every thread that is
+running package code, every `interval_s`. Stacks start at the first package frame. Each
+run writes two files under EASTMONEY_PROFILE_DIR (default `.profiles/`):
+
+    <time>-<label>.collapsed          "frame;frame;frame count" lines (flamegraph.pl, speedscope)
+    <time>-<label>.speedscope.json    speedscope sampled profile
+
+`ProfileRun.top(n)` summarizes the hottest functions. Only one run samples at a time.
+Calls made while another run is active are sampled as part of that run.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+PROFILE_ENV = "EASTMONEY_PROFILE"
+PROFILE_DIR_ENV = "EASTMONEY_PROFILE_DIR"
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+Frame = Tuple[str, str, int]  # (qualified name, file, first line)
+Stack = Tuple[Frame, ...]
+
+F = TypeVar("F", bound=Callable)
+
+_enabled = os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on")
+_active = threading.Lock()
+RUNS: Deque["ProfileRun"] = deque(maxlen=20)  # most recent last
+
+
+def set_enabled(on: bool) -> None:
+    global _enabled
+    _enabled = bool(on)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _frame_key(code) -> Frame:
+    return getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno
+
+
+def _frame_label(frame: Frame) -> str:
+    name, path, line = frame
+    if path.startswith(_PACKAGE_DIR):
+        path = "eastmoney_tool/" + path[len(_PACKAGE_DIR):].replace(os.sep, "/")
+    else:
+        path = os.path.basename(path)
+    return f"{name} ({path}:{line})"
+
+
+@dataclass
+class ProfileRun:
+    """Samples of one profiled call."""
+
+    label: str
+    interval_s: float
+    started_at: dt.datetime = field(default_factory=dt.datetime.now)
+    duration_s: float = 0.0
+    samples: Counter = field(default_factory=Counter)  # Stack -> count
+    paths: List[Path] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        lines = [";".join(_frame_label(f) for f in stack) + f" {n}" for stack, n in self.samples.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict:
+        frames: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, n in self.samples.items():
+            samples.append([frames.setdefault(f, len(frames)) for f in stack])
+            weights.append(n * self.interval_s)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": f[0], "file": f[1], "line": f[2]} for f in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.label,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": self.label,
+        }
+
+    def top(self, n: int = 20) -> pd.DataFrame:
+        """Hottest functions: samples where the function is running (self) / on the stack (total)."""
+        own: Counter = Counter()
+        incl: Counter = Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for f in set(stack):
+                incl[f] += count
+        total = max(self.total, 1)
+        rows = [
+            {"function": _frame_label(f), "self": own[f], "total": c,
+             "self_%": 100.0 * own[f] / total, "total_%": 100.0 * c / total,
+             "self_s": own[f] * self.interval_s}
+            for f, c in incl.items()
+        ]
+        if not rows:
+            return pd.DataFrame(columns=["function", "self", "total", "self_%", "total_%", "self_s"])
+        return pd.DataFrame(rows).sort_values(["self", "total"], ascending=False).head(n).reset_index(drop=True)
+
+    def save(self, directory: Optional[Path] = None) -> List[Path]:
+        directory = Path(directory or os.environ.get(PROFILE_DIR_ENV, ".profiles"))
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.started_at:%Y%m%d-%H%M%S-%f}-{self.label.replace('/', '_').replace('.', '_')}"
+        collapsed = directory / f"{stem}.collapsed"
+        collapsed.write_text(self.collapsed(), encoding="utf-8")
+        speedscope = directory / f"{stem}.speedscope.json"
+        speedscope.write_text(json.dumps(self.speedscope()), encoding="utf-8")
+        self.paths = [collapsed, speedscope]
+        return self.paths
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, run: ProfileRun) -> None:
+        super().__init__(name="eastmoney-profiler", daemon=True)
+        self.run_ = run
+        self.stop = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self.stop.wait(self.run_.interval_s):
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []  # leaf first; the profiler's own wrapper frames are left out
+                while frame is not None:
+                    if frame.f_code.co_filename != __file__:
+                        stack.append(frame.f_code)
+                    frame = frame.f_back
+                # from the outermost package frame down to the leaf
+                for i in range(len(stack) - 1, -1, -1):
+                    if stack[i].co_filename.startswith(_PACKAGE_DIR):
+                        self.run_.samples[tuple(_frame_key(c) for c in reversed(stack[: i + 1]))] += 1
+                        break
+
+
+def profile_call(label: str, fn: Callable, *args, interval_s: float = 0.005, **kwargs):
+    """Run `fn` under the sampler (unless another run is active) and keep the run in `RUNS`."""
+    if not _active.acquire(blocking=False):
+        return fn(*args, **kwargs)
+    run = ProfileRun(label=label, interval_s=interval_s)
+    sampler = _Sampler(run)
+    t0 = time.perf_counter()
+    sampler.start()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        sampler.stop.set()
+        sampler.join()
+        run.duration_s = time.perf_counter() - t0
+        _active.release()
+        try:
+            run.save()
+        except OSError:
+            pass  # read-only deployments still get the in-app summary
+        RUNS.append(run)
+
+
+def profiled(fn: F) -> F:
+    """Profile calls of `fn` while profiling is enabled; a plain call otherwise."""
+    label = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        return profile_call(label, fn, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,277 @@
+"""Embedded DuckDB query layer over the local snapshot store.
+
+Views (latest snapshot per report; `*_snapshots` keep every stored snapshot):
+    survey, trade, seat
+
+Table macros mirroring the app's tables (all parameters optional, named):
+    t1(days := 7, threshold := NULL, as_of := NULL)
+    t2(cycle := '02', k := 10)
+    t3(threshold := 10.0, as_of := NULL)
+    t4(cycle := '02', k := 10, threshold := 10.0, as_of := NULL)
+
+`as_of` defaults to the snapshot date (the latest published session when the data was
+pulled), and windows are counted in trading sessions back from it (table `trading_days`
+and macro `session_age(day, as_of)`, from `trading_calendar`). t1's `days` names the
+survey range (7 = 近一周, 30 = 近一月), other values are taken as calendar days. Example:
+
+    SELECT SECURITY_CODE, SECURITY_NAME_ABBR, RATIO FROM t4(cycle := '03', k := 30, threshold := 5)
+
+User-typed SQL goes through `read_query`: one read-only SELECT / WITH statement, at most
+`MAX_ROWS` rows, cancelled after `TIMEOUT_S`. The database itself is sandboxed: files can
+only be read under the snapshot store root, extensions are not installed or loaded, and
+the configuration is locked, so a query can neither read host files nor change settings.
+
+DuckDB is optional: `pip install duckdb`.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .store import SEAT, SURVEY, TRADE, SnapshotStore
+from .trading_calendar import CALENDAR
+
+_SNAPSHOT_VIEWS = {"survey": SURVEY, "trade": TRADE, "seat": SEAT}
+
+_HIVE_TYPES = {SURVEY: "{'SNAPSHOT_DATE': 'DATE'}", TRADE: "{'SNAPSHOT_DATE': 'DATE'}",
+               SEAT: "{'SNAPSHOT_DATE': 'DATE', 'STATISTICSCYCLE': 'VARCHAR'}"}
+
+_MACROS = [
+    # string columns may carry a trailing '%'; bad values -> NULL (like pd.to_numeric(errors="coerce"))
+    "CREATE OR REPLACE MACRO num(x) AS TRY_CAST(replace(CAST(x AS VARCHAR), '%', '') AS DOUBLE)",
+    "CREATE OR REPLACE MACRO day(x) AS TRY_CAST(left(CAST(x AS VARCHAR), 10) AS DATE)",
+    # sessions in [x, as_of] (like TradingCalendar.session_age; NULL for a missing day)
+    """CREATE OR REPLACE MACRO session_age(x, as_of) AS
+       CASE WHEN x IS NULL THEN NULL ELSE (SELECT count(*) FROM trading_days WHERE d BETWEEN x AND as_of) END""",
+]
+
+# sessions registered in `trading_days`
+_SESSIONS_FROM = dt.date(2000, 1, 1)
+
+# limits for user-typed SQL (`read_query`)
+MAX_ROWS = 100_000
+TIMEOUT_S = 30.0
+
+_TABLE_MACROS = {
+    "t1": """
+CREATE OR REPLACE MACRO t1(days := 7, threshold := NULL, as_of := NULL) AS TABLE
+WITH w AS (
+    SELECT CASE {survey_sessions} END AS _SESSIONS, coalesce(as_of, (SELECT max(SNAPSHOT_DATE) FROM survey)) AS _AS_OF
+),
+ev AS (
+    SELECT survey.* FROM survey, w
+    WHERE CASE WHEN _SESSIONS IS NULL THEN day(RECEIVE_START_DATE) > _AS_OF - CAST(days AS INTEGER)
+               ELSE session_age(day(RECEIVE_START_DATE), _AS_OF) <= _SESSIONS END
+),
+agg AS (
+    SELECT
+        SECURITY_CODE,
+        arg_max(SECUCODE, RECEIVE_START_DATE) AS SECUCODE,
+        arg_max(SECURITY_NAME_ABBR, RECEIVE_START_DATE) AS SECURITY_NAME_ABBR,
+        sum(coalesce(num(SUM), 0)) AS SUM,
+        count(*) AS SURVEY_TIMES,
+        max(RECEIVE_START_DATE) AS LATEST_RECEIVE_DATE,
+        arg_max(CLOSE_PRICE, RECEIVE_START_DATE) AS CLOSE_PRICE,
+        arg_max(CHANGE_RATE, RECEIVE_START_DATE) AS CHANGE_RATE,
+        coalesce(string_agg(DISTINCT RECEIVE_WAY_EXPLAIN, '、'), '') AS RECEIVE_WAYS
+    FROM ev
+    GROUP BY SECURITY_CODE
+)
+SELECT * FROM agg
+WHERE threshold IS NULL OR SUM > threshold
+ORDER BY SUM DESC, SECURITY_CODE
+""",
+    "t2": """
+CREATE OR REPLACE MACRO t2(cycle := '02', k := 10) AS TABLE
+WITH s AS (SELECT * FROM seat WHERE STATISTICSCYCLE = cycle),
+nb AS (SELECT * FROM s ORDER BY num(NET_BUY_AMT) DESC NULLS LAST, _ROW LIMIT k),
+bt AS (SELECT SECURITY_CODE FROM s ORDER BY num(BUY_TIMES) DESC NULLS LAST, _ROW LIMIT k)
+SELECT * EXCLUDE (_ROW) FROM nb
+WHERE SECURITY_CODE IN (SELECT SECURITY_CODE FROM bt)
+ORDER BY num(NET_BUY_AMT) DESC NULLS LAST, _ROW
+""",
+    # one row per security over the qualifying rows (one per security and day), like
+    # tables.t3_trade.aggregate_trade_windows; bit i of WINDOWS_HIT is WINDOWS[i]
+    "t3": """
+CREATE OR REPLACE MACRO t3(threshold := 10.0, as_of := NULL) AS TABLE
+WITH hits AS (
+    SELECT *, day(TRADE_DATE) AS _DAY, num(RATIO) AS _RATIO,
+           session_age(day(TRADE_DATE), coalesce(as_of, SNAPSHOT_DATE)) AS _AGE
+    FROM trade
+    WHERE num(RATIO) > threshold AND session_age(day(TRADE_DATE), coalesce(as_of, SNAPSHOT_DATE)) <= {max_sessions}
+    QUALIFY row_number() OVER (PARTITION BY SECURITY_CODE, day(TRADE_DATE) ORDER BY _ROW) = 1
+)
+SELECT
+    SECURITY_CODE,
+    arg_max(SECUCODE, _DAY) AS SECUCODE,
+    arg_max(SECURITY_NAME_ABBR, _DAY) AS SECURITY_NAME_ABBR,
+    bit_or({mask}) AS WINDOWS_HIT,
+    max(_RATIO) AS MAX_RATIO,
+    arg_max(_RATIO, _DAY) AS LATEST_RATIO,
+    sum(coalesce(num(NET_BUY_AMT), 0)) AS NET_BUY_AMT,
+    min(TRADE_DATE) AS FIRST_TRADE_DATE,
+    max(TRADE_DATE) AS LAST_TRADE_DATE
+FROM hits
+GROUP BY SECURITY_CODE
+ORDER BY NET_BUY_AMT DESC, SECURITY_CODE
+""",
+    "t4": """
+CREATE OR REPLACE MACRO t4(cycle := '02', k := 10, threshold := 10.0, as_of := NULL) AS TABLE
+SELECT * FROM t3(threshold := threshold, as_of := as_of)
+WHERE SECURITY_CODE IN (SELECT SECURITY_CODE FROM t2(cycle := cycle, k := k))
+ORDER BY NET_BUY_AMT DESC, SECURITY_CODE
+""",
+}
+
+# which views each table macro reads
+_MACRO_VIEWS = {"t1": {"survey"}, "t2": {"seat"}, "t3": {"trade"}, "t4": {"trade", "seat"}}
+
+
+def require_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:  # optional dependency
+        raise ImportError("The SQL query layer requires `pip install duckdb`.") from e
+    return duckdb
+
+
+class QueryLayer:
+    """In-process DuckDB connection with the snapshot views and table macros registered.
+
+    Thread-safe: every query runs on its own cursor of the shared in-memory database.
+    Call `refresh()` after new snapshots were written.
+    """
+
+    def __init__(self, store: Optional[SnapshotStore] = None) -> None:
+        duckdb = require_duckdb()
+        self.store = store or SnapshotStore()
+        self._con = duckdb.connect(":memory:")
+        self._sandbox()
+        self._lock = threading.Lock()
+        self.views: List[str] = []
+        self.macros: List[str] = []
+        self.refresh()
+
+    def _sandbox(self) -> None:
+        """Only the snapshot store is readable, no extension installs, configuration locked."""
+        root = os.path.join(os.path.abspath(self.store.root), "").replace("'", "''")
+        for sql in (
+            f"SET allowed_directories = ['{root}']",
+            "SET autoinstall_known_extensions = false",
+            "SET autoload_known_extensions = false",
+            "SET enable_external_access = false",
+            "SET lock_configuration = true",
+        ):
+            self._con.execute(sql)
+
+    def refresh(self) -> None:
+        """(Re)create views over the stored snapshots; tables without data get no view."""
+        from .sources.survey import RANGE_1M, RANGE_1W
+        from .tables.t3_trade import WINDOWS
+
+        mask = " | ".join(f"(CASE WHEN _AGE <= {n} THEN {1 << i} ELSE 0 END)" for i, (_, n) in enumerate(WINDOWS))
+        max_sessions = max(n for _, n in WINDOWS)
+        survey_sessions = " ".join(f"WHEN days = {r.days_back} THEN {r.sessions}" for r in (RANGE_1W, RANGE_1M))
+        sessions = CALENDAR.sessions(_SESSIONS_FROM, CALENDAR.now().date() + dt.timedelta(days=366))
+        with self._lock:
+            con = self._con
+            con.execute("CREATE OR REPLACE TABLE trading_days AS SELECT unnest($days::DATE[]) AS d", {"days": sessions})
+            views = []
+            for view, report in _SNAPSHOT_VIEWS.items():
+                con.execute(f"DROP VIEW IF EXISTS {view}")
+                con.execute(f"DROP VIEW IF EXISTS {view}_snapshots")
+                if not self.store.has(report):
+                    continue
+                pattern = self.store.glob(report).replace("'", "''")
+                con.execute(f"""
+                    CREATE VIEW {view}_snapshots AS
+                    SELECT * EXCLUDE (file_row_number), file_row_number AS _ROW
+                    FROM read_parquet('{pattern}', hive_partitioning = true, hive_types = {_HIVE_TYPES[report]},
+                                      union_by_name = true, file_row_number = true)
+                """)
+                latest_by = "PARTITION BY STATISTICSCYCLE" if report == SEAT else ""
+                con.execute(f"""
+                    CREATE VIEW {view} AS
+                    SELECT * FROM {view}_snapshots
+                    QUALIFY SNAPSHOT_DATE = max(SNAPSHOT_DATE) OVER ({latest_by})
+                """)
+                views.append(view)
+            for sql in _MACROS:
+                con.execute(sql)
+            macros = []
+            for name, sql in _TABLE_MACROS.items():
+                if _MACRO_VIEWS[name] <= set(views):
+                    con.execute(sql.format(mask=mask, max_sessions=max_sessions, survey_sessions=survey_sessions))
+                    macros.append(name)
+            self.views, self.macros = views, macros
+
+    def latest_snapshots(self) -> Dict[str, Optional[dt.date]]:
+        """{view: date of its latest stored snapshot (None if never synced)}."""
+        out = {}
+        for view, report in _SNAPSHOT_VIEWS.items():
+            dates = self.store.snapshot_dates(report)
+            out[view] = dates[-1] if dates else None
+        return out
+
+    def query(self, sql: str, params: Optional[Dict[str, Any]] = None, result_format: str = "pandas"):
+        """Run `sql` (named parameters as `$name`); returns a DataFrame or, for "arrow", a pyarrow.Table.
+
+        For SQL written by this package; user input goes through `read_query`.
+        """
+        cur = self._con.cursor()
+        try:
+            rel = cur.execute(sql, params or {})
+            return rel.fetch_arrow_table() if result_format == "arrow" else rel.df()
+        finally:
+            cur.close()
+
+    def read_query(
+        self,
+        sql: str,
+        max_rows: int = MAX_ROWS,
+        timeout_s: float = TIMEOUT_S,
+        result_format: str = "pandas",
+    ) -> Tuple[Any, bool]:
+        """Run user-typed SQL: a single SELECT / WITH statement, cut at `max_rows`, cancelled after `timeout_s`.
+
+        Returns (result, truncated). Raises ValueError for anything but one SELECT and
+        TimeoutError when the query is cancelled.
+        """
+        duckdb = require_duckdb()
+        statements = duckdb.extract_statements(sql)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only a single read-only SELECT / WITH statement is allowed.")
+        cur = self._con.cursor()
+        timer = threading.Timer(timeout_s, cur.interrupt)
+        timer.start()
+        try:
+            rel = cur.sql(statements[0].query).limit(max_rows + 1)
+            result = rel.fetch_arrow_table() if result_format == "arrow" else rel.df()
+        except duckdb.InterruptException as e:
+            raise TimeoutError(f"Query cancelled after {timeout_s:.0f}s.") from e
+        finally:
+            timer.cancel()
+            cur.close()
+        truncated = len(result) > max_rows
+        if truncated:
+            result = result.slice(0, max_rows) if result_format == "arrow" else result.iloc[:max_rows]
+        return result, truncated
+
+    def table(self, name: str, result_format: str = "pandas", **params: Any):
+        """Evaluate a table macro, e.g. `table("t4", cycle="03", k=30, threshold=5.0)`."""
+        if name not in self.macros:
+            raise KeyError(f"Table '{name}' is not available. Available: {self.macros} (sync snapshots first?)")
+        args = ", ".join(f"{k} := ${k}" for k in params)
+        return self.query(f"SELECT * FROM {name}({args})", params, result_format=result_format)
+
+    def close(self) -> None:
+        self._con.close()
+
+    def __enter__(self) -> "QueryLayer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
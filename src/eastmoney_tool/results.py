@@ -0,0 +1,201 @@
+"""Process-wide, memory-bounded store of table results shared by all UI sessions.
+
+Sessions keep a `ResultRef` (a key plus the recipe that builds the value) instead of the
+frames themselves. Values live in one LRU store with byte-size accounting: when the
+total exceeds the budget, least recently used entries are dropped, and the next
+`get(ref)` rebuilds them from the recipe (usually from the table-level TTL caches,
+without touching the network). Sessions asking for the same key share one entry.
+
+The table-level TTL caches and the table graph's memos keep their values here as well
+(`TTLCache(store=RESULTS)`), so the budget bounds every frame the process retains, not
+only the session results. One object held under several keys (a source result in its
+TTL cache and in the graph memo) is counted once.
+
+The budget defaults to 512 MB; set EASTMONEY_RESULT_BUDGET_MB to change it.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .transforms import _arrow
+
+BUDGET_ENV = "EASTMONEY_RESULT_BUDGET_MB"
+DEFAULT_BUDGET_MB = 512
+
+
+def nbytes(value: Any, _seen: Optional[Set[int]] = None, _depth: int = 0) -> int:
+    """Approximate memory held by a result: frames, Arrow tables, arrays and plain containers of them.
+
+    Objects reachable twice (a frame shared by two indexes) are counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if _arrow.is_arrow(value):
+        return int(value.nbytes)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes) + (sum(sys.getsizeof(v) for v in value.flat) if value.dtype == object else 0)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))) or _depth > 4:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(v, seen, _depth + 1) for v in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(nbytes(v, seen, _depth + 1) for v in value)
+    attrs = getattr(value, "__dict__", None)  # RankingIndex, SeatPanel, FlowGrid, ...
+    if isinstance(attrs, dict):
+        return sys.getsizeof(value) + sum(nbytes(v, seen, _depth + 1) for v in attrs.values())
+    return sys.getsizeof(value)
+
+
+@dataclass(frozen=True)
+class ResultRef:
+    """What a session keeps: the store key and how to rebuild the value."""
+
+    key: Hashable
+    build: Callable[[], Any]
+
+
+class ResultStore:
+    """Thread-safe LRU of results under a byte budget.
+
+    Entries larger than the whole budget are returned but not kept. Concurrent builds of
+    the same key run once; the other callers wait for that result.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None) -> None:
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB)) * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[int, List[int]] = {}  # id(value) -> [bytes, entries holding it]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._building: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    @property
+    def used_bytes(self) -> int:
+        return self._bytes
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, item
+
+    def _release(self, value: Any) -> None:
+        item = self._sizes[id(value)]
+        item[1] -= 1
+        if item[1] == 0:
+            del self._sizes[id(value)]
+            self._bytes -= item[0]
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            known = self._sizes.get(id(value))
+        size = known[0] if known is not None else nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._release(self._data.pop(key))
+            if size > self.budget_bytes:
+                return
+            self._data[key] = value
+            item = self._sizes.setdefault(id(value), [size, 0])
+            if item[1] == 0:
+                self._bytes += size
+            item[1] += 1
+            while self._bytes > self.budget_bytes:
+                _, dropped = self._data.popitem(last=False)
+                self._release(dropped)
+                self.evictions += 1
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        found, value = self._lookup(key)
+        if found:
+            return value
+        with self._lock:
+            gate = self._building.setdefault(key, threading.Lock())
+        with gate:
+            found, value = self._lookup(key)  # built by another caller meanwhile
+            if found:
+                return value
+            try:
+                value = build()
+                self._insert(key, value)
+                with self._lock:
+                    self.builds += 1
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return value
+
+    def put(self, key: Hashable, build: Callable[[], Any]) -> ResultRef:
+        """Build the value under `key` now (replacing a stored one) and return the session-side reference."""
+        self._insert(key, build())
+        with self._lock:
+            self.builds += 1
+        return ResultRef(key, build)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Keep `value` under `key` (no recipe: an evicted value is simply gone, see `peek`)."""
+        self._insert(key, value)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """The value stored under `key`, or None when it was never stored or has been evicted."""
+        return self._lookup(key)[1]
+
+    def get(self, ref: Optional[ResultRef]) -> Any:
+        """The referenced value, rebuilt if it was evicted; None for a None reference."""
+        if ref is None:
+            return None
+        return self.get_or_build(ref.key, ref.build)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._sizes.clear()
+                self._bytes = 0
+            elif key in self._data:
+                self._release(self._data.pop(key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "used_mb": self._bytes / 1024 / 1024,
+                "budget_mb": self.budget_bytes / 1024 / 1024,
+                "hits": self.hits,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+
+
+# shared by every session of the process
+RESULTS = ResultStore()
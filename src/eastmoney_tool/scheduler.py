@@ -0,0 +1,187 @@
+"""Priority request scheduler in front of `HttpClient`.
+
+Interactive UI queries, prefetch/warm-up and backfill jobs share one rate-limited
+upstream budget. The scheduler grants request slots by priority class, caps each
+class's in-flight requests, and round-robins between tenants (sessions / jobs)
+inside a class so one long backfill cannot starve another.
+
+The number of slots follows the client's adaptive limit (`HttpClient.limiter`, see
+concurrency.py): the scheduler never grants more requests than the limiter would let
+run, so a granted request does not wait again behind the limiter's unordered queue,
+and the lower classes' caps shrink with it, keeping room for interactive work.
+
+Callers tag work with a context manager instead of threading a parameter through
+every table builder:
+
+    with request_class(PREFETCH, tenant="warmup"):
+        get_seat_index(dc, CYCLE_3M)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from .http import HttpClient, HttpResponse
+
+INTERACTIVE = "interactive"
+PREFETCH = "prefetch"
+BACKFILL = "backfill"
+
+# 数字越小优先级越高
+PRIORITY_ORDER = (INTERACTIVE, PREFETCH, BACKFILL)
+
+_request_class: contextvars.ContextVar[str] = contextvars.ContextVar("eastmoney_request_class", default=INTERACTIVE)
+_request_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("eastmoney_request_tenant", default="default")
+
+
+@contextmanager
+def request_class(name: str, tenant: Optional[str] = None) -> Iterator[None]:
+    """Run the enclosed fetches under priority class `name` (and optional tenant)."""
+    if name not in PRIORITY_ORDER:
+        raise ValueError(f"Unknown request class '{name}'. Expected one of: {', '.join(PRIORITY_ORDER)}.")
+    t1 = _request_class.set(name)
+    t2 = _request_tenant.set(tenant) if tenant is not None else None
+    try:
+        yield
+    finally:
+        if t2 is not None:
+            _request_tenant.reset(t2)
+        _request_class.reset(t1)
+
+
+@dataclass
+class _Waiter:
+    cls: str
+    enqueued_at: float
+    granted: bool = False
+
+
+class _ClassState:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.granted = 0
+        # tenant -> FIFO of waiters; OrderedDict order is the round-robin order
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.waits: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+
+class RequestScheduler:
+    """Drop-in replacement for `HttpClient` as `EastMoneyDataCenter.http`."""
+
+    def __init__(
+        self,
+        http: HttpClient,
+        capacity: int = 8,
+        class_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.http = http
+        self.cfg = http.cfg
+        self.capacity = capacity
+        limits = {INTERACTIVE: capacity, PREFETCH: max(1, capacity // 2), BACKFILL: max(1, capacity // 4)}
+        limits.update(class_limits or {})
+        self._classes = {name: _ClassState(limits[name]) for name in PRIORITY_ORDER}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    # ---- slot management (all under self._cond) ----
+
+    def _capacity(self) -> int:
+        """Slots right now: `capacity`, or the upstream limiter's current limit when lower."""
+        limiter = getattr(self.http, "limiter", None)
+        return self.capacity if limiter is None else max(1, min(self.capacity, int(limiter.limit)))
+
+    def _class_limit(self, state: _ClassState, capacity: int) -> int:
+        # class caps are set for the full capacity and scale down with the current one
+        return max(1, state.limit * capacity // self.capacity)
+
+    def _dispatch(self) -> None:
+        # called whenever a request finishes, which is also when the limiter's limit moves
+        granted_any = False
+        capacity = self._capacity()
+        while self._in_flight < capacity:
+            waiter = self._next_waiter(capacity)
+            if waiter is None:
+                break
+            waiter.granted = True
+            state = self._classes[waiter.cls]
+            state.in_flight += 1
+            state.granted += 1
+            state.waits.append(time.monotonic() - waiter.enqueued_at)
+            self._in_flight += 1
+            granted_any = True
+        if granted_any:
+            self._cond.notify_all()
+
+    def _next_waiter(self, capacity: int) -> Optional[_Waiter]:
+        for name in PRIORITY_ORDER:
+            state = self._classes[name]
+            if state.in_flight >= self._class_limit(state, capacity) or not state.queues:
+                continue
+            # round-robin: take the head of the first tenant, then move that tenant to the back
+            tenant, q = next(iter(state.queues.items()))
+            waiter = q.popleft()
+            if q:
+                state.queues.move_to_end(tenant)
+            else:
+                del state.queues[tenant]
+            return waiter
+        return None
+
+    def _acquire(self, cls: str, tenant: str) -> None:
+        waiter = _Waiter(cls=cls, enqueued_at=time.monotonic())
+        with self._cond:
+            self._classes[cls].queues.setdefault(tenant, deque()).append(waiter)
+            self._dispatch()
+            while not waiter.granted:
+                self._cond.wait()
+
+    def _release(self, cls: str) -> None:
+        with self._cond:
+            self._classes[cls].in_flight -= 1
+            self._in_flight -= 1
+            self._dispatch()
+
+    # ---- HttpClient interface ----
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        cls = _request_class.get()
+        self._acquire(cls, _request_tenant.get())
+        try:
+            return self.http.get(url, params=params, headers=headers)
+        finally:
+            self._release(cls)
+
+    def close(self) -> None:
+        self.http.close()
+
+    # ---- metrics ----
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-class queue depth, in-flight count and wait-time stats (seconds)."""
+        out = {}
+        with self._cond:
+            capacity = self._capacity()
+            for name in PRIORITY_ORDER:
+                state = self._classes[name]
+                waits = sorted(state.waits)
+                out[name] = {
+                    "queued": state.depth,
+                    "in_flight": state.in_flight,
+                    "limit": self._class_limit(state, capacity),
+                    "granted": state.granted,
+                    "wait_mean_s": sum(waits) / len(waits) if waits else 0.0,
+                    "wait_p95_s": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                    "wait_max_s": waits[-1] if waits else 0.0,
+                }
+        return out
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ID_COL = "SECURITY_ID"
+CODE_COL = "SECURITY_CODE"
+
+
+class SecurityDictionary:
+    """Process-wide interning of security codes to dense int32 IDs.
+
+    Codes are interned once at ingest (see `EastMoneyDataCenter`), so set operations
+    compare int32 arrays / bitmaps instead of rehashing strings. Names, SECUCODE and
+    market are kept once here in a side table, keyed by ID.
+
+    The ID is an extra column: the code and name columns stay in the frames, since every
+    table shows and exports them. It costs 4 bytes a row (about 6% of a snapshot frame)
+    and makes intersections / differences 4-25x faster (scripts/bench_security_ids.py).
+    `drop_ids` removes it where frames leave the process (export, the table server).
+
+    The code list and side arrays grow (and are replaced) under the lock, so every read
+    takes the lock too and works on what it copied there.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._codes: List[str] = []
+        self._side = {
+            "SECUCODE": np.empty(0, dtype=object),
+            "SECURITY_NAME_ABBR": np.empty(0, dtype=object),
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._codes)
+
+    def intern(self, codes: Iterable) -> np.ndarray:
+        """Map codes to int32 IDs, assigning new IDs to unseen codes."""
+        s = pd.Series(codes, dtype=object).astype(str)
+        # the lookup also runs under the lock: snapshots are ingested from several threads
+        with self._lock:
+            new = [c for c in pd.unique(s) if c not in self._ids]
+            if new:
+                for c in new:
+                    self._ids[c] = len(self._codes)
+                    self._codes.append(c)
+                grow = len(self._codes) - len(self._side["SECUCODE"])
+                for col, arr in self._side.items():
+                    self._side[col] = np.concatenate([arr, np.full(grow, "", dtype=object)])
+            return s.map(self._ids).to_numpy(dtype=np.int32)
+
+    def _record_side(self, ids: np.ndarray, col: str, values: np.ndarray) -> None:
+        # newest snapshot wins (renames)
+        ok = pd.notna(values)
+        with self._lock:
+            self._side[col][ids[ok]] = values[ok]
+
+    def encode(self, df: pd.DataFrame, key: str = CODE_COL) -> pd.DataFrame:
+        """Add the int32 `SECURITY_ID` column and record SECUCODE / name in the side table."""
+        if df.empty or key not in df.columns:
+            return df
+        ids = self.intern(df[key])
+        for col in self._side:
+            if col in df.columns:
+                self._record_side(ids, col, df[col].to_numpy(dtype=object))
+        out = df.copy()
+        out[ID_COL] = ids
+        return out
+
+    def encode_arrow(self, table: pa.Table, key: str = CODE_COL) -> pa.Table:
+        """Arrow counterpart of `encode`: appends an int32 `SECURITY_ID` column."""
+        if table.num_rows == 0 or key not in table.column_names:
+            return table
+        ids = self.intern(table.column(key).to_numpy(zero_copy_only=False))
+        for col in self._side:
+            if col in table.column_names:
+                self._record_side(ids, col, table.column(col).to_numpy(zero_copy_only=False).astype(object))
+        return table.append_column(ID_COL, pa.array(ids, type=pa.int32()))
+
+    def codes(self, ids: Iterable[int]) -> np.ndarray:
+        with self._lock:
+            lookup = np.asarray(self._codes, dtype=object)
+        return lookup[np.asarray(ids, dtype=np.int64)]
+
+    def side_table(self) -> pd.DataFrame:
+        """One row per interned security: ID, code, SECUCODE, name, market."""
+        with self._lock:
+            n = len(self._codes)
+            df = pd.DataFrame({
+                ID_COL: np.arange(n, dtype=np.int32),
+                CODE_COL: self._codes[:n],
+                **{col: arr[:n].copy() for col, arr in self._side.items()},
+            })
+        df["MARKET"] = df["SECUCODE"].astype(str).str.extract(r"\.(\w+)$", expand=False).fillna("")
+        return df
+
+    def bitmap(self, ids: Iterable[int], size: Optional[int] = None) -> np.ndarray:
+        """Boolean membership bitmap over the whole dictionary (or its first `size` IDs)."""
+        bm = np.zeros(len(self) if size is None else size, dtype=bool)
+        bm[np.asarray(ids, dtype=np.int64)] = True
+        return bm
+
+
+SECURITIES = SecurityDictionary()
+
+
+def drop_ids(frame):
+    """`frame` (pandas or Arrow) without the process-local SECURITY_ID, e.g. before it leaves the process."""
+    if isinstance(frame, pa.Table):
+        return frame.drop_columns([ID_COL]) if ID_COL in frame.column_names else frame
+    return frame.drop(columns=[ID_COL], errors="ignore")
+
+
+def has_ids(*frames: pd.DataFrame) -> bool:
+    return all(ID_COL in f.columns for f in frames)
+
+
+def intersect_ids(*id_arrays: Iterable[int]) -> np.ndarray:
+    """IDs present in every array (bitmap AND), ascending."""
+    if not id_arrays:
+        return np.empty(0, dtype=np.int32)
+    # one size for all bitmaps: codes interned meanwhile by other threads must not change it
+    size = len(SECURITIES)
+    bm = SECURITIES.bitmap(id_arrays[0], size)
+    for ids in id_arrays[1:]:
+        bm &= SECURITIES.bitmap(ids, size)
+    return np.flatnonzero(bm).astype(np.int32)
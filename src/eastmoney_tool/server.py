@@ -0,0 +1,337 @@
+"""Headless table-serving sidecar (ASGI) and its client.
+
+Several dashboard replicas can share one sidecar instead of each pulling upstream and
+computing t1-t4 on its own:
+
+    python -m eastmoney_tool.server --host 0.0.0.0 --port 8765
+    EASTMONEY_TABLE_SERVER=http://sidecar:8765 streamlit run streamlit_app.py
+
+Endpoints:
+    GET /tables                      available tables and their parameters
+    GET /tables/{t1,t2,t3,t4}?...    parameters are the `tables.graph` node parameters,
+                                     e.g. /tables/t4?cycle=03&k=30&threshold=5;
+                                     t2 also takes part=netbuy|buycnt|inter (default inter);
+                                     unknown parameters and values outside their domain
+                                     (e.g. days other than 7 / 30) are a 400
+    GET /tables/{t1,...,t4,history}/export?format=csv|parquet|xlsx&...
+                                     download streamed in chunks (see export.py); `history`
+                                     is the full trade detail behind t3
+    GET /healthz
+
+Results are computed on the shared `TABLES` graph (memoized, concurrent identical requests
+wait for one computation) and encoded once per format: Arrow IPC stream when the request
+accepts `application/vnd.apache.arrow.stream` (or `?format=arrow`), JSON (pandas
+`orient="split"`) otherwise, gzip-compressed when accepted. The ETag is the result's content
+fingerprint, so a client revalidating with If-None-Match gets 304 without a body. `Age`
+is the result's age in seconds; an expired result being refreshed in the background is
+still served at once, with `Warning: 110 - "Response is Stale"`.
+
+Requires `pip install starlette uvicorn`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from .cache import TTLCache
+from .config import EastMoneyConfig
+from .datacenter import EastMoneyDataCenter
+from .export import FORMATS, iter_export
+from .fingerprint import fingerprint
+from .results import RESULTS
+from .securities import drop_ids
+from .sources.seat_track import ALL_CYCLES
+from .sources.survey import RANGE_1M, RANGE_1W
+from .transforms import _arrow
+from .transforms.engine import ENGINES
+
+if TYPE_CHECKING:
+    from .tables.graph import Freshness
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+
+# the Streamlit app reads tables from this sidecar when set
+TABLE_SERVER_ENV = "EASTMONEY_TABLE_SERVER"
+
+SERVED = ("t1", "t2", "t3", "t4")
+# exported but not served as a table: name -> graph node (its `.df`)
+EXPORT_ONLY = {"history": "trade_history"}
+T2_PARTS = {"netbuy": 0, "buycnt": 1, "inter": 2}
+# allowed values of enumerated / counted parameters: anything else is a 400, not a failed computation
+CHOICES = {
+    "days": (RANGE_1W.days_back, RANGE_1M.days_back),
+    "cycle": tuple(c.code for c in ALL_CYCLES),
+    "engine": ENGINES,
+    "part": tuple(T2_PARTS),
+}
+POSITIVE = ("k", "page_size")
+
+
+def require_starlette():
+    try:
+        import starlette.applications  # noqa: F401
+    except ImportError as e:  # optional dependency
+        raise ImportError("The table server requires `pip install starlette uvicorn`.") from e
+    return starlette
+
+
+def encode(frame, fmt: str) -> bytes:
+    """Serialize a result frame (SECURITY_ID is process-local and dropped)."""
+    if fmt == "arrow":
+        table = drop_ids(frame if _arrow.is_arrow(frame) else pa.Table.from_pandas(frame, preserve_index=False))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    df = drop_ids(frame.to_pandas() if _arrow.is_arrow(frame) else frame)
+    return df.to_json(orient="split", index=False, date_format="iso", force_ascii=False).encode()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists `etag` or is `*` (weak comparison: W/ is ignored)."""
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
+
+
+def decode(body: bytes, content_type: str) -> pd.DataFrame:
+    if content_type.startswith(ARROW_STREAM):
+        return pa.ipc.open_stream(body).read_all().to_pandas()
+    # dtype=False keeps codes like "000001" as strings
+    return pd.read_json(io.StringIO(body.decode()), orient="split", dtype=False)
+
+
+class TableService:
+    """Computes tables on the shared graph and caches their encoded bodies by ETag."""
+
+    def __init__(self, dc: Optional[EastMoneyDataCenter] = None, ttl_s: float = 600.0) -> None:
+        from .tables.graph import TABLES
+
+        self.dc = dc or EastMoneyDataCenter(EastMoneyConfig())
+        self.graph = TABLES
+        self._bodies = TTLCache(ttl_s=ttl_s, max_entries=256, store=RESULTS)
+        self._locks: Dict[Tuple, List] = {}  # key -> [lock, requests holding or waiting for it]
+        self._locks_guard = threading.Lock()
+
+    def parameters(self, name: str) -> Dict[str, Any]:
+        if name not in SERVED and name not in EXPORT_ONLY:
+            raise KeyError(f"Unknown table '{name}'. Available: {', '.join(SERVED + tuple(EXPORT_ONLY))}.")
+        params = dict(self.graph.nodes[EXPORT_ONLY.get(name, name)].defaults)
+        if name == "t2":
+            params["part"] = "inter"
+        return params
+
+    def parse(self, name: str, query: Dict[str, str]) -> Dict[str, Any]:
+        """Query string -> node parameters, typed like the node defaults."""
+        defaults = self.parameters(name)
+        params: Dict[str, Any] = {}
+        for k, raw in query.items():
+            if k == "format":
+                continue
+            if k not in defaults:
+                raise ValueError(f"Unknown parameter '{k}' for {name}. Expected: {', '.join(defaults)}.")
+            kind = type(defaults[k])
+            params[k] = kind(float(raw)) if kind is int else kind(raw)
+            if k in CHOICES and params[k] not in CHOICES[k]:
+                raise ValueError(f"{k} must be one of: {', '.join(map(str, CHOICES[k]))}.")
+            if k in POSITIVE and params[k] < 1:
+                raise ValueError(f"{k} must be a positive integer.")
+        return params
+
+    @contextmanager
+    def _single_flight(self, key: Tuple) -> Iterator[None]:
+        """Hold the lock of `key`; the entry is dropped once no request holds or waits for it."""
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def compute(self, name: str, params: Dict[str, Any]):
+        params = dict(params)
+        part = params.pop("part", "inter")
+        key = (name, tuple(sorted(params.items())))
+        # single flight: identical concurrent requests wait for one computation
+        with self._single_flight(key):
+            result = self.graph.compute(self.dc, EXPORT_ONLY.get(name, name), **params)
+        if name in EXPORT_ONLY:
+            return result.df
+        return result[T2_PARTS[part]] if name == "t2" else result
+
+    def freshness(self, name: str, params: Dict[str, Any]) -> Optional[Freshness]:
+        params = dict(params)
+        params.pop("part", None)
+        return self.graph.freshness(self.dc, name, **params)
+
+    def body(self, name: str, params: Dict[str, Any], fmt: str, compress: bool) -> Tuple[str, bytes]:
+        """(ETag, encoded body) of one table; the body is encoded once per ETag and format."""
+        result = self.compute(name, params)
+        etag = f'"{fingerprint(result)}"'
+        body = self._bodies.get_or_compute((etag, fmt, compress), lambda: self._encode(result, fmt, compress))
+        return etag, body
+
+    @staticmethod
+    def _encode(result, fmt: str, compress: bool) -> bytes:
+        body = encode(result, fmt)
+        return gzip.compress(body, compresslevel=6) if compress else body
+
+
+def _gzip_blocks(blocks: Iterator[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for block in blocks:
+        out = z.compress(block)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def create_app(service: Optional[TableService] = None):
+    """Starlette application serving `service` (default: a fresh datacenter client)."""
+    require_starlette()
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    service = service or TableService()
+
+    async def tables(request: Request) -> Response:
+        return JSONResponse({name: service.parameters(name) for name in SERVED})
+
+    async def table(request: Request) -> Response:
+        name = request.path_params["name"]
+        if name not in SERVED:
+            return JSONResponse({"error": f"Unknown table '{name}'. Available: {', '.join(SERVED)}."}, status_code=404)
+        try:
+            params = service.parse(name, dict(request.query_params))
+        except KeyError as e:
+            return JSONResponse({"error": str(e.args[0])}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        accept = request.headers.get("accept", "")
+        fmt = request.query_params.get("format") or ("arrow" if ARROW_STREAM in accept else "json")
+        compress = "gzip" in request.headers.get("accept-encoding", "")
+        fresh = service.freshness(name, params)  # what the computation below serves
+        try:
+            etag, body = await run_in_threadpool(service.body, name, params, fmt, compress)
+        except Exception as e:
+            return JSONResponse({"error": f"{type(e).__name__}: {e}"}, status_code=502)
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+        if fresh is not None:
+            headers["Age"] = str(int(fresh.age_s))
+            if fresh.stale:  # served while a background refresh runs
+                headers["Warning"] = '110 - "Response is Stale"'
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, media_type=ARROW_STREAM if fmt == "arrow" else JSON, headers=headers)
+
+    async def export(request: Request) -> Response:
+        name = request.path_params["name"]
+        fmt = request.query_params.get("format", "csv")
+        try:
+            params = service.parse(name, dict(request.query_params))
+        except KeyError as e:
+            return JSONResponse({"error": str(e.args[0])}, status_code=404)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if fmt not in FORMATS:
+            return JSONResponse({"error": f"format must be one of: {', '.join(FORMATS)}."}, status_code=400)
+        try:
+            result = await run_in_threadpool(service.compute, name, params)
+        except Exception as e:
+            return JSONResponse({"error": f"{type(e).__name__}: {e}"}, status_code=502)
+
+        media_type, ext = FORMATS[fmt]
+        headers = {
+            "ETag": f'"{fingerprint(result)}"',
+            "Content-Disposition": f'attachment; filename="{name}.{ext}"',
+        }
+        blocks = iter_export(result, fmt)
+        if fmt == "csv" and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            blocks = _gzip_blocks(blocks)
+        # sync iterator: Starlette pulls each block in its threadpool
+        return StreamingResponse(blocks, media_type=media_type, headers=headers)
+
+    async def healthz(request: Request) -> Response:
+        return JSONResponse({"ok": True})
+
+    return Starlette(routes=[
+        Route("/tables", tables),
+        Route("/tables/{name}", table),
+        Route("/tables/{name}/export", export),
+        Route("/healthz", healthz),
+    ])
+
+
+class RemoteTables:
+    """Client of the sidecar: `table(name, **params)` revalidates with the last ETag (304 -> cached frame)."""
+
+    def __init__(self, base_url: str, fmt: str = "arrow", timeout_s: float = 60.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.fmt = fmt
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        self._last = TTLCache(ttl_s=86400.0, max_entries=64, store=RESULTS)  # request -> (etag, frame)
+
+    def table(self, name: str, **params: Any) -> pd.DataFrame:
+        url = f"{self.base_url}/tables/{name}"
+        key = (name, tuple(sorted(params.items())))
+        cached = self._last.get(key)
+        headers = {"Accept": ARROW_STREAM if self.fmt == "arrow" else JSON, "Accept-Encoding": "gzip"}
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout_s)
+        if resp.status_code == 304 and cached is not None:
+            return cached[1]
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code} for {resp.url}\nBody: {resp.text[:300]}")
+        frame = decode(resp.content, resp.headers.get("content-type", ""))
+        self._last.set(key, (resp.headers.get("etag", ""), frame))
+        return frame
+
+
+def remote_from_env() -> Optional[RemoteTables]:
+    url = os.environ.get(TABLE_SERVER_ENV)
+    return RemoteTables(url) if url else None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve t1-t4 over HTTP for dashboard replicas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-url", default=None, help="upstream datacenter endpoint (default: EastMoney)")
+    parser.add_argument("--result-format", default="pandas", choices=("pandas", "arrow"))
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    overrides = {"base_url": args.base_url} if args.base_url else {}
+    cfg = EastMoneyConfig(result_format=args.result_format, **overrides)
+    uvicorn.run(create_app(TableService(EastMoneyDataCenter(cfg))), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,8 @@ CYCLE_1M = SeatCycle(code="02", label="近一月")
 CYCLE_3M = SeatCycle(code="03", label="近三月")
 CYCLE_6M = SeatCycle(code="04", label="近六月")
 
+ALL_CYCLES = (CYCLE_1M, CYCLE_3M, CYCLE_6M)
+
 
 def build_params(
     cycle: SeatCycle,
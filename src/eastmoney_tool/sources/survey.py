@@ -10,11 +10,12 @@ REPORT_NAME = "RPT_ORG_SURVEYNEW"
 @dataclass(frozen=True)
 class SurveyRange:
     label: str
-    days_back: int
+    days_back: int  # identifies the range (parameter "days" of the t1 node / SQL macro)
+    sessions: int  # trading sessions actually covered, counted back from the latest published one
 
 
-RANGE_1W = SurveyRange(label="近一周", days_back=7)
-RANGE_1M = SurveyRange(label="近一月", days_back=30)
+RANGE_1W = SurveyRange(label="近一周", days_back=7, sessions=5)
+RANGE_1M = SurveyRange(label="近一月", days_back=30, sessions=20)
 
 
 def build_params(
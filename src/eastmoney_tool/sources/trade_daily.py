@@ -12,13 +12,14 @@ class TradeWindow:
     """UI-friendly window descriptor. We translate it into a filter (usually TRADE_DATE>=...)."""
     label: str
     days_back: int  # 0 means today only (still needs explicit date outside this module)
+    sessions: int  # the same window in trading sessions (1 = the latest session)
 
 
-WINDOW_TODAY = TradeWindow(label="今天", days_back=0)
-WINDOW_3D = TradeWindow(label="近三日", days_back=3)
-WINDOW_5D = TradeWindow(label="近五日", days_back=5)
-WINDOW_10D = TradeWindow(label="近十日", days_back=10)
-WINDOW_1M = TradeWindow(label="近一月", days_back=30)
+WINDOW_TODAY = TradeWindow(label="今天", days_back=0, sessions=1)
+WINDOW_3D = TradeWindow(label="近三日", days_back=3, sessions=3)
+WINDOW_5D = TradeWindow(label="近五日", days_back=5, sessions=5)
+WINDOW_10D = TradeWindow(label="近十日", days_back=10, sessions=10)
+WINDOW_1M = TradeWindow(label="近一月", days_back=30, sessions=20)
 
 
 def build_params(
@@ -0,0 +1,133 @@
+"""Local Parquet store of report snapshots (what the SQL query layer scans).
+
+Layout (hive partitioned, one file per snapshot):
+
+    <root>/survey/SNAPSHOT_DATE=2024-05-10/data.parquet
+    <root>/trade_daily/SNAPSHOT_DATE=2024-05-10/data.parquet
+    <root>/seat_track/STATISTICSCYCLE=02/SNAPSHOT_DATE=2024-05-10/data.parquet
+
+Each snapshot is the widest pull of a report (survey: 近一月, trade: the largest t3
+window, seat: one per cycle), so narrower windows are answered by filtering locally.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .datacenter import EastMoneyDataCenter
+from .scheduler import BACKFILL, request_class
+from .securities import ID_COL
+from .sources import seat_track, survey, trade_daily
+from .trading_calendar import CALENDAR
+
+SURVEY = "survey"
+TRADE = "trade_daily"
+SEAT = "seat_track"
+REPORTS = (SURVEY, TRADE, SEAT)
+
+# row keys used by snapshot diffs to tell changed rows from added / removed ones
+# (survey rows have no stable key)
+REPORT_KEYS = {SURVEY: None, TRADE: ("SECURITY_CODE", "TRADE_DATE"), SEAT: ("SECURITY_CODE",)}
+
+DEFAULT_ROOT = os.environ.get("EASTMONEY_SNAPSHOT_DIR", ".snapshots")
+
+Frame = Union[pd.DataFrame, pa.Table]
+
+
+class SnapshotStore:
+    """Write / locate Parquet snapshots under `root` (created on first write)."""
+
+    def __init__(self, root: Union[str, Path, None] = None) -> None:
+        self.root = Path(root or DEFAULT_ROOT)
+
+    def path(self, report: str, snapshot_date: dt.date, **partitions: str) -> Path:
+        if report not in REPORTS:
+            raise ValueError(f"Unknown report '{report}'. Expected one of: {', '.join(REPORTS)}.")
+        parts = [f"{k}={v}" for k, v in partitions.items()]
+        return self.root.joinpath(report, *parts, f"SNAPSHOT_DATE={snapshot_date.isoformat()}", "data.parquet")
+
+    def write(
+        self,
+        report: str,
+        frame: Frame,
+        snapshot_date: Optional[dt.date] = None,
+        **partitions: str,
+    ) -> Path:
+        """Store one snapshot (replacing a same-day one atomically); returns the file path."""
+        table = frame if isinstance(frame, pa.Table) else pa.Table.from_pandas(frame, preserve_index=False)
+        # SECURITY_ID is a per-process interning, meaningless on disk
+        if ID_COL in table.column_names:
+            table = table.drop_columns([ID_COL])
+        path = self.path(report, snapshot_date or CALENDAR.now().date(), **partitions)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        return path
+
+    def read(self, report: str, snapshot_date: dt.date, **partitions: str) -> pa.Table:
+        return pq.read_table(self.path(report, snapshot_date, **partitions))
+
+    def has(self, report: str) -> bool:
+        return any((self.root / report).rglob("*.parquet"))
+
+    def glob(self, report: str) -> str:
+        """read_parquet pattern covering every snapshot of `report`."""
+        return (self.root / report).as_posix() + "/**/*.parquet"
+
+    def snapshot_dates(self, report: str, **partitions: str) -> List[dt.date]:
+        base = self.root.joinpath(report, *(f"{k}={v}" for k, v in partitions.items()))
+        dates = {
+            dt.date.fromisoformat(p.parent.name.split("=", 1)[1])
+            for p in base.rglob("SNAPSHOT_DATE=*/data.parquet")
+        }
+        return sorted(dates)
+
+
+def sync_snapshots(
+    dc: EastMoneyDataCenter,
+    store: SnapshotStore,
+    page_size: int = 500,
+    max_pages: int = 50,
+) -> Dict[str, int]:
+    """Pull the widest window of every report into `store`; returns rows written per snapshot.
+
+    Snapshots are dated with the latest published session of their report, so a re-sync
+    before the next publication replaces the same snapshot. Requests run in the BACKFILL
+    class of the scheduler. A survey window longer than `max_pages` raises
+    RuntimeError rather than storing a truncated snapshot.
+    """
+    from .tables.t3_trade import HISTORY_SESSIONS
+
+    rows: Dict[str, int] = {}
+
+    # bulk pull: yields upstream slots to interactive and prefetch requests
+    with request_class(BACKFILL, tenant="snapshot-sync"):
+        as_of = CALENDAR.as_of(survey.REPORT_NAME)
+        date_gt = CALENDAR.window_cutoff(as_of, survey.RANGE_1M.sessions).strftime("%Y-%m-%d")
+        # a truncated survey undercounts every window; fail like t1 instead of storing it
+        frame = dc.get_all_pages(
+            survey.build_params(receive_start_date_gt=date_gt), page_size=page_size, max_pages=max_pages, on_truncate="raise"
+        )
+        store.write(SURVEY, frame, as_of)
+        rows[SURVEY] = len(frame)
+
+        as_of = CALENDAR.as_of(trade_daily.REPORT_NAME)
+        date_gte = CALENDAR.window_start(as_of, HISTORY_SESSIONS).strftime("%Y-%m-%d")
+        frame = dc.get_all_pages(trade_daily.build_params(trade_date_gte=date_gte), page_size=page_size, max_pages=max_pages)
+        store.write(TRADE, frame, as_of)
+        rows[TRADE] = len(frame)
+
+        as_of = CALENDAR.as_of(seat_track.REPORT_NAME)
+        for cycle in (seat_track.CYCLE_1M, seat_track.CYCLE_3M, seat_track.CYCLE_6M):
+            frame = dc.get_all_pages(seat_track.build_params(cycle=cycle), page_size=page_size, max_pages=max_pages)
+            store.write(SEAT, frame, as_of, STATISTICSCYCLE=cycle.code)
+            rows[f"{SEAT}/{cycle.code}"] = len(frame)
+    return rows
@@ -0,0 +1,460 @@
+"""Tables as a dependency graph with memoized intermediate results.
+
+    survey_events ─> t1
+    trade_history (widest window) ─> t3[threshold] ─┐
+    seat_panel (all cycles) ─> t2[cycle, k] ────────┴─> t4
+
+The engine is a parameter of the derived nodes, so it is part of their keys. With
+engine="polars" t4 reads the two sources directly and runs t3, t2 and the intersection
+as one fused plan; memoization, freshness and stale serving work the same.
+
+Every node result is memoized under a content key derived from the node name, the
+parameters it actually reads and the keys of its inputs (source nodes add the endpoint,
+result container, page size and the latest published session of their report, see
+`trading_calendar`). Changing the t3 threshold therefore re-runs only t3 and t4, and t4
+after t2 and t3 is a single intersection. Missing nodes whose inputs are ready run in
+parallel. A memoized result expires at the next expected publication of any report it
+depends on, so outside publish windows it is never refetched.
+
+Derived nodes are also memoized by the content fingerprints of their inputs: when a
+source is re-fetched (memo expired) and upstream returned the same rows, the nodes
+below it reuse their previous results instead of recomputing (`last_run["unchanged"]`).
+That reuse is also keyed by the sessions the windows are counted from.
+
+Stale-while-revalidate: once a result has expired, `compute` returns the last good
+result for the same node and parameters immediately and refreshes it in one background
+run (`freshness` tells how old the served result is). Expiry is the result's TTL, not
+its presence in the memo: a result the memo lost to the store's byte budget before its
+TTL is rebuilt from its inputs in the calling thread. A failed refresh keeps the last
+good result and is retried after `retry_s`. `invalidate()` drops the last good results
+too, so an explicit refresh waits for new data.
+
+The memo is the only cache on the graph's path: source nodes call the table fetchers
+with `use_cache=False`, so a refresh (expired memo, revalidation or `invalidate()`)
+always goes upstream instead of reusing an entry of the fetchers' own TTL caches.
+
+`compute_many` computes several targets in one run (e.g. the whole dashboard): their
+inputs are expanded into one graph, so shared nodes run once and independent sources are
+fetched in parallel, and each target is reported through `on_ready` as soon as it is done.
+The batch takes about as long as its slowest chain instead of the sum of them.
+`last_run["seconds"]` holds the time spent in each node of the last run.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from ..cache import TTLCache
+from ..datacenter import EastMoneyDataCenter
+from ..fingerprint import fingerprint
+from ..profiling import profiled
+from ..results import RESULTS, ResultStore
+from ..scheduler import PREFETCH, request_class
+from ..sources import seat_track, survey, trade_daily
+from ..sources.seat_track import ALL_CYCLES
+from ..sources.survey import RANGE_1M, RANGE_1W
+from ..trading_calendar import CALENDAR
+from ..transforms.engine import POLARS, resolve_engine
+from ..transforms.set_ops import intersect_by_key
+from .t1_survey import aggregate_survey_events, get_survey_events
+from .t2_seat import get_seat_panel, seat_topk_from_index
+from .t3_trade import aggregate_trade_windows, get_trade_window_index
+from .t4_intersection import trade_x_seat_polars
+
+Task = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+@dataclass(frozen=True)
+class Node:
+    """`fn(dc, params, *inputs)`; `deps(params)` lists input tasks as (node name, params)."""
+
+    fn: Callable[..., Any]
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    deps: Callable[[Dict[str, Any]], List[Tuple[str, Dict[str, Any]]]] = lambda p: []
+    source: bool = False  # reads upstream data
+    report: Optional[str] = None  # upstream report of a source node (publication schedule)
+
+
+@dataclass(frozen=True)
+class Freshness:
+    """How current the result served for a node and parameters is."""
+
+    stale: bool  # expired; a newer one is being (or will be) computed
+    age_s: float  # since the served result was computed
+    refreshing: bool
+    error: Optional[str] = None  # why the last background refresh failed
+
+
+def _task(name: str, params: Dict[str, Any], node: Node) -> Task:
+    return name, tuple(sorted((k, params.get(k, v)) for k, v in node.defaults.items()))
+
+
+class TableGraph:
+    """Memoizing, parallel executor over a fixed set of nodes."""
+
+    def __init__(
+        self,
+        nodes: Dict[str, Node],
+        ttl_s: float = 600.0,
+        max_entries: int = 256,
+        max_workers: int = 8,
+        content_ttl_s: float = 86400.0,
+        stale_s: float = 86400.0,
+        retry_s: float = 60.0,
+        store: Optional[ResultStore] = None,
+    ) -> None:
+        self.nodes = nodes
+        # with `store` the memos keep their values in it, under its byte budget
+        self.memo = TTLCache(ttl_s=ttl_s, max_entries=max_entries, store=store)
+        # results of derived nodes by (node, params, input fingerprints); outlives `memo`
+        self.content_memo = TTLCache(ttl_s=content_ttl_s, max_entries=max_entries, store=store)
+        # last good result per (namespace, task), served while it is revalidated; kept
+        # `stale_s` (0 disables stale serving). `_good_at` holds when each was computed,
+        # until when it is current and its content key: expiry is tracked here, so a memo
+        # value evicted by the store's byte budget is rebuilt, not served stale.
+        self.stale_s = stale_s
+        self.retry_s = retry_s
+        self.last_good = TTLCache(ttl_s=stale_s, max_entries=max_entries, store=store)
+        self._good_at: Dict[Tuple, Tuple[float, float, str]] = {}  # slot -> (computed, expires, key)
+        self._refreshing: Dict[Tuple, threading.Thread] = {}
+        self._failed: Dict[Tuple, Tuple[float, str]] = {}  # slot -> (when, error)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.last_run: Dict[str, Any] = {"computed": [], "reused": [], "unchanged": [], "stale": [], "seconds": {}}
+
+    def _expand(
+        self, dc: EastMoneyDataCenter, root: Task
+    ) -> Tuple[Dict[Task, str], Dict[Task, List[Task]], Dict[Task, FrozenSet[str]]]:
+        """Content key, input tasks and upstream reports of every task reachable from `root`."""
+        keys: Dict[Task, str] = {}
+        inputs: Dict[Task, List[Task]] = {}
+        reports: Dict[Task, FrozenSet[str]] = {}
+
+        def visit(task: Task) -> str:
+            if task in keys:
+                return keys[task]
+            name, params = task
+            node = self.nodes[name]
+            deps = [_task(d, p, self.nodes[d]) for d, p in node.deps(dict(params))]
+            inputs[task] = deps
+            parts = [name, repr(params)] + [visit(d) for d in deps]
+            reports[task] = frozenset(r for d in deps for r in reports[d]) | ({node.report} if node.report else set())
+            if node.source:
+                day = CALENDAR.as_of(node.report) if node.report else CALENDAR.now().date()
+                parts += [repr(dc.cache_namespace), day.isoformat()]
+            keys[task] = hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+            return keys[task]
+
+        visit(root)
+        return keys, inputs, reports
+
+    @profiled
+    def compute(self, dc: EastMoneyDataCenter, target: str, **params: Any) -> Any:
+        """Result of node `target`, computing only the nodes missing from the memo.
+
+        An expired result is served stale (and refreshed in the background) when a last
+        good one exists.
+        """
+        root = _task(target, params, self.nodes[target])
+        keys, inputs, reports = self._expand(dc, root)
+        if self.stale_s > 0 and self._expired(dc, root, keys[root]):
+            last = self.last_good.get((dc.cache_namespace, root))
+            if last is not None:
+                self._revalidate(dc, root, keys, inputs, reports)
+                with self._lock:
+                    self.last_run = {"computed": [], "reused": [], "unchanged": [], "stale": [target], "seconds": {}}
+                return last
+        return self._run(dc, [root], keys, inputs, reports)[root]
+
+    @profiled
+    def compute_many(
+        self,
+        dc: EastMoneyDataCenter,
+        targets: Dict[str, Tuple[str, Dict[str, Any]]],
+        on_ready: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """Results of several nodes, `{label: (target, params)}`, computed in one run.
+
+        Nodes shared by the targets run once and independent ones in parallel.
+        `on_ready(label, value)` is called in the calling thread as soon as each target is
+        ready (memo hits and stale results first). Expired targets are served stale as in
+        `compute`.
+        """
+        roots: Dict[Task, List[str]] = {}
+        keys: Dict[Task, str] = {}
+        inputs: Dict[Task, List[Task]] = {}
+        reports: Dict[Task, FrozenSet[str]] = {}
+        for label, (target, params) in targets.items():
+            root = _task(target, params, self.nodes[target])
+            roots.setdefault(root, []).append(label)
+            if root not in keys:
+                k, i, r = self._expand(dc, root)
+                keys.update(k)
+                inputs.update(i)
+                reports.update(r)
+
+        results: Dict[str, Any] = {}
+
+        def ready(root: Task, value: Any) -> None:
+            for label in roots[root]:
+                results[label] = value
+                if on_ready is not None:
+                    on_ready(label, value)
+
+        fresh: List[Task] = []
+        stale: List[str] = []
+        for root in roots:
+            if self.stale_s > 0 and self._expired(dc, root, keys[root]):
+                last = self.last_good.get((dc.cache_namespace, root))
+                if last is not None:
+                    self._revalidate(dc, root, keys, inputs, reports)
+                    stale.append(root[0])
+                    ready(root, last)
+                    continue
+            fresh.append(root)
+        self._run(dc, fresh, keys, inputs, reports, on_ready=ready)
+        with self._lock:
+            self.last_run["stale"] = stale
+        return results
+
+    def _expired(self, dc: EastMoneyDataCenter, root: Task, key: str) -> bool:
+        """Whether the last result of `root` is past its TTL or for other inputs (present in the memo or not)."""
+        with self._lock:
+            good = self._good_at.get((dc.cache_namespace, root))
+        return good is None or good[2] != key or time.time() >= good[1]
+
+    def _revalidate(self, dc: EastMoneyDataCenter, root: Task, keys, inputs, reports) -> None:
+        """Start one background refresh of `root` (none while one runs or right after a failure)."""
+        slot = (dc.cache_namespace, root)
+        with self._lock:
+            if slot in self._refreshing:
+                return
+            failed = self._failed.get(slot)
+            if failed is not None and time.time() - failed[0] < self.retry_s:
+                return
+
+            def refresh() -> None:
+                try:
+                    # background work yields to interactive requests
+                    with request_class(PREFETCH, tenant="revalidate"):
+                        self._run(dc, [root], keys, inputs, reports, record=False)
+                    with self._lock:
+                        self._failed.pop(slot, None)
+                except Exception as e:  # keep serving the last good result
+                    with self._lock:
+                        self._failed[slot] = (time.time(), f"{type(e).__name__}: {e}")
+                        self._prune()
+                finally:
+                    with self._lock:
+                        self._refreshing.pop(slot, None)
+
+            ctx = contextvars.copy_context()
+            thread = threading.Thread(target=ctx.run, args=(refresh,), name=f"revalidate-{root[0]}", daemon=True)
+            self._refreshing[slot] = thread
+        thread.start()
+
+    def freshness(self, dc: EastMoneyDataCenter, target: str, **params: Any) -> Optional[Freshness]:
+        """Age and state of the result `compute` would serve now for these parameters (None before the first one)."""
+        root = _task(target, params, self.nodes[target])
+        slot = (dc.cache_namespace, root)
+        last = self.last_good.get(slot)
+        if last is None:
+            return None
+        keys, _, _ = self._expand(dc, root)
+        with self._lock:
+            failed = self._failed.get(slot)
+            refreshing = slot in self._refreshing
+            computed_at = self._good_at.get(slot, (time.time(),))[0]
+        return Freshness(
+            stale=self._expired(dc, root, keys[root]),
+            age_s=time.time() - computed_at,
+            refreshing=refreshing,
+            error=failed[1] if failed else None,
+        )
+
+    def _run(
+        self,
+        dc: EastMoneyDataCenter,
+        roots: Sequence[Task],
+        keys,
+        inputs,
+        reports,
+        record: bool = True,
+        on_ready: Optional[Callable[[Task, Any], None]] = None,
+    ) -> Dict[Task, Any]:
+        # top-down: a memo hit cuts off its whole subtree
+        values: Dict[Task, Any] = {}
+        needed: List[Task] = []
+        stack = list(roots)
+        while stack:
+            task = stack.pop()
+            if task in values or task in needed:
+                continue
+            hit = self.memo.get(keys[task])
+            if hit is not None:
+                values[task] = hit
+                continue
+            needed.append(task)
+            stack.extend(inputs[task])
+
+        unchanged: List[str] = []
+        seconds: Dict[str, float] = {}
+        if on_ready is not None:
+            for root in dict.fromkeys(roots):
+                if root in values:
+                    on_ready(root, values[root])
+
+        def run(task: Task) -> Any:
+            t0 = time.perf_counter()
+            name, p = task
+            node = self.nodes[name]
+            args = [values[d] for d in inputs[task]]
+            sessions = tuple(sorted((r, CALENDAR.as_of(r)) for r in reports[task]))
+            ttl_s = min((CALENDAR.ttl_s(r) for r in reports[task]), default=None)
+            value = None
+            if not node.source:
+                content_key = (name, p, sessions) + tuple(fingerprint(a) for a in args)
+                value = self.content_memo.get(content_key)
+                if value is not None:
+                    unchanged.append(name)
+            if value is None:
+                value = node.fn(dc, dict(p), *args)
+                if not node.source:
+                    self.content_memo.set(content_key, value)
+            self.memo.set(keys[task], value, ttl_s=ttl_s)
+            self.last_good.set((dc.cache_namespace, task), value)
+            now = time.time()
+            with self._lock:
+                expires = now + (self.memo.ttl_s if ttl_s is None else ttl_s)
+                self._good_at[(dc.cache_namespace, task)] = (now, expires, keys[task])
+                self._prune()
+            seconds[name] = seconds.get(name, 0.0) + time.perf_counter() - t0
+            return value
+
+        pending = set(needed)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                for task in [t for t in pending if all(d in values for d in inputs[t])]:
+                    pending.discard(task)
+                    running[pool.submit(contextvars.copy_context().run, run, task)] = task
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    task = running.pop(fut)
+                    values[task] = fut.result()
+                    if on_ready is not None and task in roots:
+                        on_ready(task, values[task])
+
+        if record:
+            with self._lock:
+                self.last_run = {
+                    "computed": [t[0] for t in needed],
+                    "reused": [t[0] for t in values if t not in set(needed)],
+                    "unchanged": unchanged,
+                    "stale": [],
+                    "seconds": seconds,
+                }
+        return {root: values[root] for root in roots}
+
+    def _prune(self) -> None:
+        """Drop the bookkeeping of slots whose last good result is gone (with `_lock` held).
+
+        `last_good` holds at most `max_entries` results, so this bounds `_good_at` and
+        `_failed` although every new parameter tuple adds a slot.
+        """
+        limit = self.last_good.max_entries
+        if len(self._good_at) <= limit and len(self._failed) <= limit:
+            return
+        for slots in (self._good_at, self._failed):
+            for slot in [s for s in slots if self.last_good.get(s) is None]:
+                del slots[slot]
+
+    def invalidate(self) -> None:
+        """Forget memoized and last good results so sources are fetched again (content-keyed results stay valid)."""
+        self.memo.invalidate()
+        self.last_good.invalidate()
+        with self._lock:
+            self._good_at.clear()
+            self._failed.clear()
+
+
+_CYCLES = {c.code: c for c in ALL_CYCLES}
+_RANGES = {r.days_back: r for r in (RANGE_1W, RANGE_1M)}
+
+_T3 = {"ratio_col": "RATIO", "threshold": 10.0, "key_col": "SECURITY_CODE", "page_size": 500, "engine": "pandas"}
+_T2 = {
+    "cycle": "02", "k": 10, "netbuy_col": "NET_BUY_AMT", "buycnt_col": "BUY_TIMES", "key_col": "SECURITY_CODE",
+    "page_size": 500, "engine": "pandas",
+}
+
+
+def _t4_deps(p: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    # polars fuses t3, t2 and the intersection into one plan over the two sources
+    if resolve_engine(p["engine"]) == POLARS:
+        return [("trade_history", p), ("seat_panel", p)]
+    return [("t3", p), ("t2", p)]
+
+
+def _t4(dc: EastMoneyDataCenter, p: Dict[str, Any], a: Any, b: Any) -> Any:
+    if resolve_engine(p["engine"]) == POLARS:
+        return trade_x_seat_polars(
+            a.df, b.index(_CYCLES[p["cycle"]]), ratio_col=p["ratio_col"], threshold=p["threshold"], k=p["k"],
+            netbuy_col=p["netbuy_col"], buycnt_col=p["buycnt_col"], key_col=p["key_col"],
+        )
+    return intersect_by_key(a, b[2], key=p["key_col"])
+
+
+NODES: Dict[str, Node] = {
+    "survey_events": Node(
+        lambda dc, p: get_survey_events(dc, _RANGES[p["days"]], page_size=p["page_size"]),
+        defaults={"days": RANGE_1W.days_back, "page_size": 500},
+        source=True,
+        report=survey.REPORT_NAME,
+    ),
+    "t1": Node(
+        lambda dc, p, events: aggregate_survey_events(events, engine=p["engine"]),
+        defaults={"days": RANGE_1W.days_back, "page_size": 500, "engine": "pandas"},
+        deps=lambda p: [("survey_events", p)],
+    ),
+    "trade_history": Node(
+        lambda dc, p: get_trade_window_index(dc, page_size=p["page_size"], use_cache=False),
+        defaults={"page_size": 500},
+        source=True,
+        report=trade_daily.REPORT_NAME,
+    ),
+    "t3": Node(
+        lambda dc, p, idx: aggregate_trade_windows(
+            idx.df, ratio_col=p["ratio_col"], threshold=p["threshold"], key_col=p["key_col"], engine=p["engine"]
+        ),
+        defaults=_T3,
+        deps=lambda p: [("trade_history", p)],
+    ),
+    "seat_panel": Node(
+        lambda dc, p: get_seat_panel(dc, page_size=p["page_size"], use_cache=False),
+        defaults={"page_size": 500},
+        source=True,
+        report=seat_track.REPORT_NAME,
+    ),
+    "t2": Node(
+        lambda dc, p, panel: seat_topk_from_index(
+            panel.index(_CYCLES[p["cycle"]]), k=p["k"], netbuy_col=p["netbuy_col"],
+            buycnt_col=p["buycnt_col"], key_col=p["key_col"], engine=p["engine"],
+        ),
+        defaults=_T2,
+        deps=lambda p: [("seat_panel", p)],
+    ),
+    "t4": Node(
+        _t4,
+        defaults={**_T3, **_T2},
+        deps=_t4_deps,
+    ),
+}
+
+# 进程级共享的表依赖图
+TABLES = TableGraph(NODES, store=RESULTS)
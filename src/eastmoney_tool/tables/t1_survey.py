@@ -2,39 +2,222 @@
 
 from __future__ import annotations
 
-import datetime as dt
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from ..cache import TTLCache
 from ..datacenter import EastMoneyDataCenter
-from ..sources.survey import build_params, RANGE_1W, RANGE_1M, SurveyRange
+from ..profiling import profiled
+from ..results import RESULTS
+from ..securities import ID_COL
+from ..transforms import _arrow, _polars
+from ..transforms.engine import POLARS, resolve_engine
+from ..sources.survey import build_params, REPORT_NAME, RANGE_1W, RANGE_1M, SurveyRange
+from ..trading_calendar import CALENDAR
 
 
+# 聚合结果缓存：同一时间窗口内调整SUM阈值不会再请求接口；有效期到下一次数据发布
+_SURVEY_CACHE = TTLCache(ttl_s=600.0, store=RESULTS)
+
+
+def get_survey_events(
+    dc: EastMoneyDataCenter,
+    range_type: SurveyRange,
+    page_size: int = 500,
+    max_pages: int = 50,
+) -> pd.DataFrame:
+    """分页拉取时间窗口内的全部调研事件（每次调研一行，NUMBERNEW="1"）。
+
+    窗口按交易日计：已发布的最新交易日往前 range_type.sessions 个交易日（含其间的周末 / 节假日）。
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        range_type: 时间范围（RANGE_1W或RANGE_1M）
+        page_size: 每页大小（接口上限500）
+        max_pages: 最多拉取的页数；窗口超过此页数时报错（RuntimeError），不返回截断的窗口
+
+    Returns:
+        窗口内全部调研事件的DataFrame（cfg.result_format="arrow" 时为pyarrow.Table）
+    """
+    as_of = CALENDAR.as_of(REPORT_NAME)
+    date_gt = CALENDAR.window_cutoff(as_of, range_type.sessions).strftime("%Y-%m-%d")
+
+    params = build_params(receive_start_date_gt=date_gt)
+    # 表一是整个窗口的聚合，截断的窗口会给出错误的SUM，宁可报错
+    return dc.get_all_pages(params, page_size=page_size, max_pages=max_pages, on_truncate="raise")
+
+
+def aggregate_survey_events(
+    events: pd.DataFrame,
+    key_col: str = "SECURITY_CODE",
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """按股票聚合调研事件（一次groupby完成），并按SUM降序排序。
+
+    输出列：
+        SUM: 窗口内累计接待机构数量
+        SURVEY_TIMES: 调研次数
+        LATEST_RECEIVE_DATE: 最近一次接待日期
+        RECEIVE_WAYS: 接待方式（去重后以“、”连接）
+        以及 SECUCODE / SECURITY_NAME_ABBR / CLOSE_PRICE / CHANGE_RATE（取最近一次调研的值）
+    """
+    if resolve_engine(engine) == POLARS and len(events) > 0:
+        return _aggregate_survey_polars(events, key_col=key_col)
+    if _arrow.is_arrow(events):
+        return _aggregate_survey_arrow(events, key_col=key_col)
+    if events.empty or key_col not in events.columns:
+        return events
+
+    df = events.copy()
+    df["SUM"] = pd.to_numeric(df.get("SUM"), errors="coerce").fillna(0)
+    # 最近一次调研排在前面，first() 即取最新的行情/名称字段
+    if "RECEIVE_START_DATE" in df.columns:
+        df = df.sort_values("RECEIVE_START_DATE", ascending=False, kind="mergesort")
+
+    # 有 SECURITY_ID 时按整数ID分组，避免对代码字符串重复哈希
+    group_col = ID_COL if ID_COL in df.columns and key_col == "SECURITY_CODE" else key_col
+    identity = (key_col, "SECUCODE", "SECURITY_NAME_ABBR")
+    spec = {col: (col, "first") for col in identity if col in df.columns and col != group_col}
+    spec["SUM"] = ("SUM", "sum")
+    spec["SURVEY_TIMES"] = ("SUM", "size")
+    if "RECEIVE_START_DATE" in df.columns:
+        spec["LATEST_RECEIVE_DATE"] = ("RECEIVE_START_DATE", "max")
+    for col in ("CLOSE_PRICE", "CHANGE_RATE"):
+        if col in df.columns:
+            spec[col] = (col, "first")
+
+    agg = df.groupby(group_col, sort=False).agg(**spec)
+
+    if "RECEIVE_WAY_EXPLAIN" in df.columns:
+        ways = (
+            df[[group_col, "RECEIVE_WAY_EXPLAIN"]]
+            .dropna()
+            .drop_duplicates()
+            .groupby(group_col, sort=False)["RECEIVE_WAY_EXPLAIN"]
+            .agg("、".join)
+        )
+        agg["RECEIVE_WAYS"] = ways.reindex(agg.index).fillna("")
+
+    agg = agg.sort_values("SUM", ascending=False, kind="mergesort").reset_index()
+    if group_col != key_col:
+        # SECURITY_CODE 在前，SECURITY_ID 放到最后
+        agg = agg[[c for c in agg.columns if c != group_col] + [group_col]]
+    return agg
+
+
+def _aggregate_survey_arrow(events: pa.Table, key_col: str = "SECURITY_CODE") -> pa.Table:
+    """aggregate_survey_events 的 Arrow 版本（pyarrow group_by，一次聚合）。"""
+    if events.num_rows == 0 or key_col not in events.column_names:
+        return events
+
+    t = events.set_column(
+        events.column_names.index("SUM"), "SUM", pc.fill_null(_arrow.numeric(events.column("SUM")), 0.0)
+    ) if "SUM" in events.column_names else events.append_column("SUM", pa.array([0.0] * events.num_rows))
+    if "RECEIVE_START_DATE" in t.column_names:
+        t = t.take(pc.sort_indices(t, sort_keys=[("RECEIVE_START_DATE", "descending")]))
+
+    group_col = ID_COL if ID_COL in t.column_names and key_col == "SECURITY_CODE" else key_col
+    identity = [c for c in (key_col, "SECUCODE", "SECURITY_NAME_ABBR") if c in t.column_names and c != group_col]
+    aggs = [(c, "first") for c in identity] + [("SUM", "sum"), ("SUM", "count")]
+    names = identity + ["SUM", "SURVEY_TIMES"]
+    if "RECEIVE_START_DATE" in t.column_names:
+        aggs.append(("RECEIVE_START_DATE", "max"))
+        names.append("LATEST_RECEIVE_DATE")
+    for col in ("CLOSE_PRICE", "CHANGE_RATE"):
+        if col in t.column_names:
+            aggs.append((col, "first"))
+            names.append(col)
+    if "RECEIVE_WAY_EXPLAIN" in t.column_names:
+        aggs.append(("RECEIVE_WAY_EXPLAIN", "distinct"))
+        names.append("RECEIVE_WAYS")
+
+    agg = t.group_by(group_col, use_threads=False).aggregate(aggs)
+    renames = {f"{col}_{fn}": name for (col, fn), name in zip(aggs, names)}
+    agg = agg.rename_columns([renames.get(c, c) for c in agg.column_names])
+    if "RECEIVE_WAYS" in names:
+        i = agg.column_names.index("RECEIVE_WAYS")
+        agg = agg.set_column(i, "RECEIVE_WAYS", pc.binary_join(agg.column(i), "、"))
+    # 列顺序与pandas版本一致：SECURITY_CODE 在前，SECURITY_ID 在最后
+    agg = agg.select([key_col] + names if group_col == key_col else names + [group_col])
+    return agg.take(pc.sort_indices(agg, sort_keys=[("SUM", "descending")]))
+
+
+def _aggregate_survey_polars(events, key_col: str = "SECURITY_CODE"):
+    """aggregate_survey_events 的Polars版本（惰性group_by，多线程执行）。"""
+    pl = _polars.require_polars()
+    lf = _polars.lazy(events)
+    cols = lf.collect_schema().names()
+    if key_col not in cols:
+        return events
+
+    if "SUM" in cols:
+        lf = lf.with_columns(_polars.numeric(lf, "SUM").fill_null(0.0).alias("SUM"))
+    else:
+        lf = lf.with_columns(pl.lit(0.0).alias("SUM"))
+    if "RECEIVE_START_DATE" in cols:
+        lf = lf.sort("RECEIVE_START_DATE", descending=True, maintain_order=True)
+
+    group_col = ID_COL if ID_COL in cols and key_col == "SECURITY_CODE" else key_col
+    identity = [c for c in (key_col, "SECUCODE", "SECURITY_NAME_ABBR") if c in cols and c != group_col]
+    aggs = [pl.col(c).first() for c in identity]
+    aggs += [pl.col("SUM").sum(), pl.len().alias("SURVEY_TIMES")]
+    if "RECEIVE_START_DATE" in cols:
+        aggs.append(pl.col("RECEIVE_START_DATE").max().alias("LATEST_RECEIVE_DATE"))
+    aggs += [pl.col(c).first() for c in ("CLOSE_PRICE", "CHANGE_RATE") if c in cols]
+    if "RECEIVE_WAY_EXPLAIN" in cols:
+        aggs.append(
+            pl.col("RECEIVE_WAY_EXPLAIN").drop_nulls().unique(maintain_order=True).str.join("、").alias("RECEIVE_WAYS")
+        )
+
+    plan = lf.group_by(group_col, maintain_order=True).agg(aggs)
+    names = [c for c in plan.collect_schema().names() if c != group_col]
+    plan = plan.select([key_col] + names if group_col == key_col else names + [group_col])
+    plan = plan.sort("SUM", descending=True, maintain_order=True)
+    return _polars.collect_like([plan], events)[0]
+
+
+@profiled
 def get_survey_data(
     dc: EastMoneyDataCenter,
     range_type: SurveyRange,
-    page_size: int = 200,
+    page_size: int = 500,
+    use_cache: bool = True,
+    engine: Optional[str] = None,
 ) -> pd.DataFrame:
-    """获取机构调研统计数据，并按SUM（接待机构数量）降序排序。
-    
+    """获取机构调研统计数据：拉取整个时间窗口，按股票聚合，并按SUM（接待机构数量）降序排序。
+
+    结果会缓存（按窗口起始日期，到下一次数据发布为止），阈值过滤请在返回结果上用 `filter_survey_sum` 完成。
+
     Args:
         dc: EastMoneyDataCenter实例
         range_type: 时间范围（RANGE_1W或RANGE_1M）
         page_size: 每页大小
-        
+        use_cache: 是否使用进程内缓存
+        engine: 聚合引擎（"pandas" / "polars"），默认取 dc.cfg.engine
+
     Returns:
-        按SUM降序排序的DataFrame
+        每只股票一行、按SUM降序排序的DataFrame
     """
-    today = dt.date.today()
-    date_gt = (today - dt.timedelta(days=range_type.days_back)).strftime("%Y-%m-%d")
-    
-    params = build_params(receive_start_date_gt=date_gt, page_size=page_size)
-    df = dc.get_result_df(params)
-    
-    # 按SUM降序排序（如果API已经排序，这里作为保障）
-    if 'SUM' in df.columns and len(df) > 0:
-        df = df.sort_values('SUM', ascending=False, kind='mergesort')
-    
-    return df.reset_index(drop=True)
+    as_of = CALENDAR.as_of(REPORT_NAME)
+    date_gt = CALENDAR.window_cutoff(as_of, range_type.sessions).strftime("%Y-%m-%d")
+    key = ("t1_survey", dc.cache_namespace, date_gt, page_size)
+
+    def compute() -> pd.DataFrame:
+        events = get_survey_events(dc, range_type, page_size=page_size)
+        return aggregate_survey_events(events, engine=engine or dc.cfg.engine)
+
+    if not use_cache:
+        return compute()
+    return _SURVEY_CACHE.get_or_compute(key, compute, ttl_s=CALENDAR.ttl_s(REPORT_NAME))
+
 
+def filter_survey_sum(df: pd.DataFrame, threshold: Optional[float]) -> pd.DataFrame:
+    """只保留 SUM > threshold 的行（纯内存操作）。"""
+    if _arrow.is_arrow(df):
+        return df if threshold is None else _arrow.filter_threshold(df, "SUM", threshold)
+    if df.empty or threshold is None or "SUM" not in df.columns:
+        return df
+    return df.loc[df["SUM"] > threshold].reset_index(drop=True)
@@ -2,14 +2,178 @@
 
 from __future__ import annotations
 
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
 import pandas as pd
 
+from ..cache import TTLCache
 from ..datacenter import EastMoneyDataCenter
-from ..sources.seat_track import build_params, SeatCycle, CYCLE_1M, CYCLE_3M, CYCLE_6M
-from ..transforms.topk import topk
+from ..profiling import profiled
+from ..results import RESULTS
+from ..securities import CODE_COL
+from ..sources.seat_track import build_params, REPORT_NAME, SeatCycle, ALL_CYCLES, CYCLE_1M, CYCLE_3M, CYCLE_6M
+from ..trading_calendar import CALENDAR
+from ..transforms import _polars
+from ..transforms.engine import POLARS, resolve_engine
+from ..transforms.ranking import RankingIndex
 from ..transforms.set_ops import intersect_by_key
 
 
+# 席位面板缓存：三个统计周期一次并行拉取，TopK/周期变化只做切片；有效期到下一次数据发布
+_SEAT_CACHE = TTLCache(ttl_s=600.0, store=RESULTS)
+
+SEAT_METRICS = ("NET_BUY_AMT", "BUY_TIMES")
+
+# 面板列名后缀
+CYCLE_SUFFIX = {CYCLE_1M.code: "1M", CYCLE_3M.code: "3M", CYCLE_6M.code: "6M"}
+
+
+class SeatPanel:
+    """所有统计周期的席位快照：每个周期一个RankingIndex，另可展开为按股票的宽表。"""
+
+    def __init__(self, indexes: Dict[str, RankingIndex]) -> None:
+        self.indexes = indexes  # {cycle.code: RankingIndex}
+
+    def index(self, cycle: SeatCycle) -> RankingIndex:
+        return self.indexes[cycle.code]
+
+    def frame(self, metrics: Iterable[str] = SEAT_METRICS, key_col: str = CODE_COL) -> pd.DataFrame:
+        """每只股票一行：各周期的指标值与排名（`<指标>_<周期>` / `<指标>_RANK_<周期>`）。"""
+        parts, names = [], []
+        for code, idx in self.indexes.items():
+            if idx.empty or key_col not in idx.columns:
+                continue
+            sfx = CYCLE_SUFFIX.get(code, code)
+            keys = idx.column(key_col)
+            cols = {}
+            for m in metrics:
+                if m in idx.columns:
+                    cols[f"{m}_{sfx}"] = idx.values(m)
+                    cols[f"{m}_RANK_{sfx}"] = idx.rank(m)
+            parts.append(pd.DataFrame(cols, index=pd.Index(keys, name=key_col)).groupby(level=0, sort=False).first())
+            if "SECURITY_NAME_ABBR" in idx.columns:
+                names.append(pd.Series(idx.column("SECURITY_NAME_ABBR"), index=keys).groupby(level=0, sort=False).first())
+        if not parts:
+            return pd.DataFrame()
+        panel = pd.concat(parts, axis=1, join="outer")
+        if names:
+            panel.insert(0, "SECURITY_NAME_ABBR", pd.concat(names, axis=1).bfill(axis=1).iloc[:, 0].reindex(panel.index))
+        return panel.rename_axis(key_col).reset_index()
+
+    def persistence(self, k: int = 10, netbuy_col: str = "NET_BUY_AMT", buycnt_col: str = "BUY_TIMES") -> pd.DataFrame:
+        """跨周期持续性：`IN_T2_<周期>` 为该周期表二（TopK交集）是否包含该股票，`T2_CYCLES` 为包含的周期数。"""
+        panel = self.frame(metrics=(netbuy_col, buycnt_col))
+        if panel.empty:
+            return panel
+        flags = []
+        for code in self.indexes:
+            sfx = CYCLE_SUFFIX.get(code, code)
+            col = f"IN_T2_{sfx}"
+            nb, bt = panel.get(f"{netbuy_col}_RANK_{sfx}"), panel.get(f"{buycnt_col}_RANK_{sfx}")
+            panel[col] = (nb <= k) & (bt <= k) if nb is not None and bt is not None else False
+            flags.append(col)
+        panel["T2_CYCLES"] = panel[flags].sum(axis=1).astype(int)
+        return panel.sort_values("T2_CYCLES", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+@profiled
+def get_seat_panel(
+    dc: EastMoneyDataCenter,
+    page_size: int = 500,
+    use_cache: bool = True,
+) -> SeatPanel:
+    """并行拉取全部统计周期（CYCLE_1M / 3M / 6M）的全量席位快照，建立SeatPanel。
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        page_size: 每页大小
+        use_cache: 是否使用进程内缓存
+
+    Returns:
+        SeatPanel
+    """
+    key = ("t2_seat_panel", dc.cache_namespace, CALENDAR.as_of(REPORT_NAME).isoformat(), page_size)
+
+    def fetch(cycle: SeatCycle) -> RankingIndex:
+        df = dc.get_all_pages(build_params(cycle=cycle), page_size=page_size)
+        return RankingIndex(df, metrics=SEAT_METRICS)
+
+    def compute() -> SeatPanel:
+        # 每个任务带上调用方的上下文（请求优先级等 contextvars）
+        with ThreadPoolExecutor(max_workers=len(ALL_CYCLES)) as pool:
+            futures = {c.code: pool.submit(contextvars.copy_context().run, fetch, c) for c in ALL_CYCLES}
+            return SeatPanel({code: f.result() for code, f in futures.items()})
+
+    if not use_cache:
+        return compute()
+    return _SEAT_CACHE.get_or_compute(key, compute, ttl_s=CALENDAR.ttl_s(REPORT_NAME))
+
+
+def get_seat_index(
+    dc: EastMoneyDataCenter,
+    cycle: SeatCycle,
+    page_size: int = 500,
+    use_cache: bool = True,
+) -> RankingIndex:
+    """某统计周期的排名索引（NET_BUY_AMT / BUY_TIMES），取自 `get_seat_panel`。
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        cycle: 统计周期（CYCLE_1M, CYCLE_3M, CYCLE_6M）
+        page_size: 每页大小
+        use_cache: 是否使用进程内缓存
+
+    Returns:
+        该周期快照的RankingIndex
+    """
+    return get_seat_panel(dc, page_size=page_size, use_cache=use_cache).index(cycle)
+
+
+def seat_topk_plans(
+    index: RankingIndex,
+    k: int = 10,
+    netbuy_col: str = "NET_BUY_AMT",
+    buycnt_col: str = "BUY_TIMES",
+    key_col: str = "SECURITY_CODE",
+) -> list:
+    """表二的Polars惰性查询计划：[TopK净买额, TopK买入次数, 交集]。"""
+    lf = _polars.lazy(index.df)
+    top_netbuy = _polars.topk(lf, netbuy_col, k=k)
+    top_buycnt = _polars.topk(lf, buycnt_col, k=k)
+    return [top_netbuy, top_buycnt, _polars.intersect_by_key(top_netbuy, top_buycnt, key=key_col)]
+
+
+def seat_topk_from_index(
+    index: RankingIndex,
+    k: int = 10,
+    netbuy_col: str = "NET_BUY_AMT",
+    buycnt_col: str = "BUY_TIMES",
+    key_col: str = "SECURITY_CODE",
+    engine: str = "pandas",
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """在已建立的排名索引上计算表二（纯内存切片，不发请求）。
+
+    engine="polars" 时三个结果在同一个惰性查询计划中并行计算。
+    """
+    if resolve_engine(engine) == POLARS and not index.empty:
+        plans = seat_topk_plans(index, k=k, netbuy_col=netbuy_col, buycnt_col=buycnt_col, key_col=key_col)
+        return tuple(_polars.collect_like(plans, index.df))
+
+    # Top10 by 净买额
+    top10_netbuy = index.topk(netbuy_col, k=k)
+
+    # Top10 by 买入次数
+    top10_buycnt = index.topk(buycnt_col, k=k)
+
+    # 交集
+    inter = intersect_by_key(top10_netbuy, top10_buycnt, key=key_col)
+
+    return top10_netbuy, top10_buycnt, inter
+
+
+@profiled
 def get_seat_topk_intersection(
     dc: EastMoneyDataCenter,
     cycle: SeatCycle,
@@ -17,10 +181,11 @@ def get_seat_topk_intersection(
     netbuy_col: str = "NET_BUY_AMT",
     buycnt_col: str = "BUY_TIMES",
     key_col: str = "SECURITY_CODE",
-    page_size: int = 200,
+    page_size: int = 500,
+    engine: Optional[str] = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """获取表二：TopK交集
-    
+
     Args:
         dc: EastMoneyDataCenter实例
         cycle: 统计周期（CYCLE_1M, CYCLE_3M, CYCLE_6M）
@@ -29,21 +194,14 @@ def get_seat_topk_intersection(
         buycnt_col: 买入次数字段名
         key_col: 交集键字段名
         page_size: 每页大小
-        
+        engine: 计算引擎（"pandas" / "polars"），默认取 dc.cfg.engine
+
     Returns:
         (top10_netbuy, top10_buycnt, intersection) 三个DataFrame
     """
-    params = build_params(cycle=cycle, page_size=page_size)
-    df = dc.get_result_df(params)
-    
-    # Top10 by 净买额
-    top10_netbuy = topk(df, netbuy_col, k=k, ascending=False)
-    
-    # Top10 by 买入次数
-    top10_buycnt = topk(df, buycnt_col, k=k, ascending=False)
-    
-    # 交集
-    inter = intersect_by_key(top10_netbuy, top10_buycnt, key=key_col)
-    
-    return top10_netbuy, top10_buycnt, inter
+    from .graph import TABLES  # graph.py builds on this module
 
+    return TABLES.compute(
+        dc, "t2", cycle=cycle.code, k=k, netbuy_col=netbuy_col, buycnt_col=buycnt_col,
+        key_col=key_col, page_size=page_size, engine=resolve_engine(engine or dc.cfg.engine),
+    )
@@ -1,72 +1,301 @@
-"""Table 3: 机构买卖每日统计 (Trade Daily) - 多窗口去重合并"""
+"""Table 3: 机构买卖每日统计 (Trade Daily) - 跨窗口聚合"""
 
 from __future__ import annotations
 
 import datetime as dt
+from typing import Iterable, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from ..cache import TTLCache
 from ..datacenter import EastMoneyDataCenter
-from ..sources.trade_daily import build_params
-from ..transforms.trade_filters import filter_netbuy_ratio
+from ..profiling import profiled
+from ..results import RESULTS
+from ..securities import ID_COL
+from ..sources.trade_daily import REPORT_NAME, build_params
+from ..trading_calendar import CALENDAR
+from ..transforms import _arrow, _polars
+from ..transforms.engine import POLARS, resolve_engine
+from ..transforms.ranking import RankingIndex, to_numeric
 
 
-# 预定义的时间窗口
+# 预定义的时间窗口（交易日数：最近 n 个交易日，"today" 即最新一个交易日）
 WINDOWS = [
-    ("today", 0),
+    ("today", 1),
     ("3d", 3),
     ("5d", 5),
     ("10d", 10),
-    ("1m", 30),
+    ("1m", 20),
 ]
 
+# 窗口是嵌套的：最宽窗口的一次拉取覆盖所有窗口
+HISTORY_SESSIONS = max(n for _, n in WINDOWS)
 
+# 排名索引缓存（每个窗口长度一项）：阈值变化只做内存计算；有效期到下一次数据发布
+_TRADE_CACHE = TTLCache(ttl_s=600.0, store=RESULTS)
+
+
+@profiled
+def get_trade_window_index(
+    dc: EastMoneyDataCenter,
+    sessions: int = HISTORY_SESSIONS,
+    page_size: int = 500,
+    use_cache: bool = True,
+) -> RankingIndex:
+    """拉取最近 sessions 个交易日（截至已发布的最新交易日）的全部明细并建立排名索引（RATIO / NET_BUY_AMT）。
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        sessions: 窗口长度（交易日），默认取最宽窗口，覆盖WINDOWS中的所有窗口
+        page_size: 每页大小
+        use_cache: 是否使用进程内缓存（有效期到下一次数据发布，见 trading_calendar）
+
+    Returns:
+        明细快照的RankingIndex
+    """
+    as_of = CALENDAR.as_of(REPORT_NAME)
+    key = ("t3_trade", dc.cache_namespace, as_of.isoformat(), sessions, page_size)
+
+    def compute() -> RankingIndex:
+        date_gte = CALENDAR.window_start(as_of, sessions).strftime("%Y-%m-%d")
+        df = dc.get_all_pages(build_params(trade_date_gte=date_gte), page_size=page_size)
+        return RankingIndex(df, metrics=("RATIO", "NET_BUY_AMT"))
+
+    if not use_cache:
+        return compute()
+    return _TRADE_CACHE.get_or_compute(key, compute, ttl_s=CALENDAR.ttl_s(REPORT_NAME))
+
+
+def get_trade_delta(
+    dc: EastMoneyDataCenter,
+    since: dt.date,
+    page_size: int = 500,
+):
+    """只拉取 TRADE_DATE >= since 的明细（增量刷新用，通常 since = 上次见到的最新交易日）。"""
+    return dc.get_all_pages(build_params(trade_date_gte=since.strftime("%Y-%m-%d")), page_size=page_size)
+
+
+def window_labels(mask: int, windows: Sequence[Tuple[str, int]] = WINDOWS) -> str:
+    """WINDOWS_HIT 位掩码 -> "today,3d,..."（第i位对应windows[i]）。"""
+    return ",".join(label for i, (label, _) in enumerate(windows) if int(mask) >> i & 1)
+
+
+def aggregate_trade_windows(
+    history,
+    ratio_col: str = "RATIO",
+    threshold: float = 10.0,
+    key_col: str = "SECURITY_CODE",
+    windows: Sequence[Tuple[str, int]] = WINDOWS,
+    today: Optional[dt.date] = None,
+    engine: str = "pandas",
+):
+    """一次groupby完成表三：每只股票一行，汇总它在各窗口内占比 > threshold 的上榜记录。
+
+    窗口按交易日计：截至 today（默认为已发布的最新交易日）的最近 n 个交易日。
+
+    输出列：
+        WINDOWS_HIT: 命中窗口的位掩码（第i位 = windows[i]，见 `window_labels`）
+        MAX_RATIO / LATEST_RATIO: 命中记录中的最大占比 / 最近一天的占比
+        NET_BUY_AMT: 命中记录的净买额合计（同一股票同一天只计一次）
+        FIRST_TRADE_DATE / LAST_TRADE_DATE: 命中记录的首末交易日
+        以及 SECUCODE / SECURITY_NAME_ABBR（取最近一天的值）
+    结果按 NET_BUY_AMT 降序；history 为 pyarrow.Table 时结果也是 Table。
+    """
+    today = today or CALENDAR.as_of(REPORT_NAME)
+    if resolve_engine(engine) == POLARS and len(history) > 0:
+        plan = trade_windows_plan(history, ratio_col=ratio_col, threshold=threshold, key_col=key_col, windows=windows, today=today)
+        return _polars.collect_like([plan], history)[0] if plan is not None else _polars.empty_like(history)
+
+    if _arrow.is_arrow(history):
+        return _aggregate_trade_arrow(history, ratio_col, threshold, key_col, windows, today)
+    df = history
+    if df.empty or key_col not in df.columns or ratio_col not in df.columns or "TRADE_DATE" not in df.columns:
+        return pd.DataFrame()
+
+    day = pd.to_datetime(df["TRADE_DATE"].astype(str).str.slice(0, 10), errors="coerce")
+    age = pd.Series(CALENDAR.session_age(day, today), index=df.index)
+    ratio = to_numeric(df[ratio_col])
+    hit = (ratio > threshold) & (age <= max(d for _, d in windows))
+
+    rows = df.loc[hit].assign(
+        _DAY=day[hit], _RATIO=ratio[hit],
+        _NB=to_numeric(df["NET_BUY_AMT"])[hit] if "NET_BUY_AMT" in df.columns else 0.0,
+    )
+    rows = rows.drop_duplicates([key_col, "_DAY"], keep="first")  # 同一天多条上榜记录只计一次
+    for i, (_, d) in enumerate(windows):
+        rows[f"_W{i}"] = age[rows.index] <= d
+    # 最近一天排在前面，first() 即取最新的值
+    rows = rows.sort_values("_DAY", ascending=False, kind="mergesort")
+
+    group_col = ID_COL if ID_COL in rows.columns and key_col == "SECURITY_CODE" else key_col
+    spec = {col: (col, "first") for col in (key_col, "SECUCODE", "SECURITY_NAME_ABBR") if col in rows.columns and col != group_col}
+    spec.update({f"_W{i}": (f"_W{i}", "max") for i in range(len(windows))})
+    spec.update(
+        MAX_RATIO=("_RATIO", "max"),
+        LATEST_RATIO=("_RATIO", "first"),
+        NET_BUY_AMT=("_NB", "sum"),
+        FIRST_TRADE_DATE=("TRADE_DATE", "min"),
+        LAST_TRADE_DATE=("TRADE_DATE", "max"),
+    )
+    agg = rows.groupby(group_col, sort=False).agg(**spec)
+
+    wcols = [f"_W{i}" for i in range(len(windows))]
+    agg.insert(agg.columns.get_loc(wcols[0]), "WINDOWS_HIT", sum(agg[c].astype("int64") * (1 << i) for i, c in enumerate(wcols)))
+    agg = agg.drop(columns=wcols).sort_values("NET_BUY_AMT", ascending=False, kind="mergesort").reset_index()
+    if group_col != key_col:
+        # SECURITY_CODE 在前，SECURITY_ID 放到最后
+        agg = agg[[c for c in agg.columns if c != group_col] + [group_col]]
+    return agg
+
+
+def _aggregate_trade_arrow(
+    history: pa.Table,
+    ratio_col: str,
+    threshold: float,
+    key_col: str,
+    windows: Sequence[Tuple[str, int]],
+    today: dt.date,
+) -> pa.Table:
+    """aggregate_trade_windows 的 Arrow 版本（compute 内核 + group_by，不经过 pandas）。"""
+    names = history.column_names
+    if history.num_rows == 0 or key_col not in names or ratio_col not in names or "TRADE_DATE" not in names:
+        return history.slice(0, 0)
+
+    day = _arrow.days(history.column("TRADE_DATE"))
+    age = CALENDAR.session_age(day, today)
+    ratio = _arrow.numeric(history.column(ratio_col))
+    hit = pc.and_(pc.greater(ratio, threshold), pa.array(age <= max(d for _, d in windows)))
+    nb = (
+        pc.fill_null(_arrow.numeric(history.column("NET_BUY_AMT")), 0.0)
+        if "NET_BUY_AMT" in names else pa.array(np.zeros(history.num_rows))
+    )
+    t = history
+    for name, col in (("_DAY", pa.array(day)), ("_AGE", pa.array(age)), ("_RATIO", ratio), ("_NB", nb),
+                      ("_ROW", pa.array(np.arange(history.num_rows)))):
+        t = t.append_column(name, col)
+    t = t.filter(hit, null_selection_behavior="drop")
+    # 同一天多条上榜记录只计一次（保留第一条）
+    first = t.group_by([key_col, "_DAY"], use_threads=False).aggregate([("_ROW", "min")]).column("_ROW_min")
+    t = t.filter(pc.is_in(t.column("_ROW"), value_set=first.combine_chunks()))
+    # 最近一天排在前面，first 即取最新的值（排序是稳定的）
+    t = t.take(pc.sort_indices(t, sort_keys=[("_DAY", "descending")]))
+    for i, (_, d) in enumerate(windows):
+        t = t.append_column(f"_W{i}", pc.less_equal(t.column("_AGE"), d))
+
+    group_col = ID_COL if ID_COL in names and key_col == "SECURITY_CODE" else key_col
+    identity = [c for c in (key_col, "SECUCODE", "SECURITY_NAME_ABBR") if c in names and c != group_col]
+    aggs = [(c, "first") for c in identity] + [(f"_W{i}", "any") for i in range(len(windows))]
+    aggs += [("_RATIO", "max"), ("_RATIO", "first"), ("_NB", "sum"), ("TRADE_DATE", "min"), ("TRADE_DATE", "max")]
+    agg = t.group_by(group_col, use_threads=False).aggregate(aggs)
+
+    hit_mask = pa.array(np.zeros(agg.num_rows, dtype=np.int64))
+    for i in range(len(windows)):
+        hit_mask = pc.add(hit_mask, pc.multiply(pc.cast(agg.column(f"_W{i}_any"), pa.int64()), 1 << i))
+    renames = {"_RATIO_max": "MAX_RATIO", "_RATIO_first": "LATEST_RATIO", "_NB_sum": "NET_BUY_AMT",
+               "TRADE_DATE_min": "FIRST_TRADE_DATE", "TRADE_DATE_max": "LAST_TRADE_DATE"}
+    renames.update({f"{c}_first": c for c in identity})
+    agg = agg.append_column("WINDOWS_HIT", hit_mask).rename_columns(
+        [renames.get(c, c) for c in agg.column_names] + ["WINDOWS_HIT"]
+    )
+    cols = identity + ["WINDOWS_HIT", "MAX_RATIO", "LATEST_RATIO", "NET_BUY_AMT", "FIRST_TRADE_DATE", "LAST_TRADE_DATE"]
+    # 列顺序与pandas版本一致：SECURITY_CODE 在前，SECURITY_ID 在最后
+    agg = agg.select([key_col] + cols if group_col == key_col else cols + [group_col])
+    return agg.take(pc.sort_indices(agg, sort_keys=[("NET_BUY_AMT", "descending")]))
+
+
+def trade_windows_plan(
+    history,
+    ratio_col: str = "RATIO",
+    threshold: float = 10.0,
+    key_col: str = "SECURITY_CODE",
+    windows: Sequence[Tuple[str, int]] = WINDOWS,
+    today: Optional[dt.date] = None,
+):
+    """表三的Polars惰性查询计划（同 `aggregate_trade_windows`；无数据时返回None）。"""
+    if len(history) == 0:
+        return None
+    pl = _polars.require_polars()
+    lf = _polars.lazy(history)
+    names = lf.collect_schema().names()
+    if key_col not in names or ratio_col not in names or "TRADE_DATE" not in names:
+        return None
+
+    today = today or CALENDAR.as_of(REPORT_NAME)
+    day = pl.col("TRADE_DATE").cast(pl.Utf8).str.slice(0, 10).str.to_date("%Y-%m-%d", strict=False)
+    nb = _polars.numeric(lf, "NET_BUY_AMT") if "NET_BUY_AMT" in names else pl.lit(0.0)
+    lf = lf.with_columns(
+        day.alias("_DAY"),
+        day.map_batches(lambda s: pl.Series(CALENDAR.session_age(s.to_numpy(), today)), return_dtype=pl.Float64)
+        .fill_nan(None).alias("_AGE"),
+        _polars.numeric(lf, ratio_col).alias("_RATIO"),
+        nb.alias("_NB"),
+    )
+    lf = (
+        lf.filter((pl.col("_RATIO") > threshold) & (pl.col("_AGE") <= max(d for _, d in windows)))
+        .unique(subset=[key_col, "_DAY"], keep="first", maintain_order=True)
+        .sort("_DAY", descending=True, maintain_order=True)
+    )
+
+    group_col = ID_COL if ID_COL in names and key_col == "SECURITY_CODE" else key_col
+    identity = [pl.col(c).first() for c in (key_col, "SECUCODE", "SECURITY_NAME_ABBR") if c in names and c != group_col]
+    mask = pl.sum_horizontal(
+        [(pl.col("_AGE") <= d).any().cast(pl.Int64) * (1 << i) for i, (_, d) in enumerate(windows)]
+    )
+    plan = lf.group_by(group_col, maintain_order=True).agg(
+        identity + [
+            mask.alias("WINDOWS_HIT"),
+            pl.col("_RATIO").max().alias("MAX_RATIO"),
+            pl.col("_RATIO").first().alias("LATEST_RATIO"),
+            pl.col("_NB").sum().alias("NET_BUY_AMT"),
+            pl.col("TRADE_DATE").min().alias("FIRST_TRADE_DATE"),
+            pl.col("TRADE_DATE").max().alias("LAST_TRADE_DATE"),
+        ]
+    )
+    cols = [c for c in plan.collect_schema().names() if c != group_col]
+    plan = plan.select(cols + [group_col] if group_col != key_col else [key_col] + cols)
+    return plan.sort("NET_BUY_AMT", descending=True, maintain_order=True)
+
+
+def trade_threshold_curve(
+    index: RankingIndex,
+    ratio_col: str = "RATIO",
+    thresholds: Optional[Iterable[float]] = None,
+    key_col: str = "SECURITY_CODE",
+) -> pd.DataFrame:
+    """表三的“股票数 vs 阈值”曲线：某只股票在最宽窗口内的最大占比 > 阈值即计入。"""
+    if index.empty or key_col not in index.columns or ratio_col not in index.columns:
+        return pd.DataFrame({"threshold": [], "count": []})
+    rows = pd.DataFrame({key_col: index.column(key_col), ratio_col: index.values(ratio_col)})
+    best = rows.groupby(key_col)[ratio_col].max().reset_index()
+    return RankingIndex(best).count_curve(ratio_col, thresholds)
+
+
+@profiled
 def get_trade_netbuy_ratio_filtered(
     dc: EastMoneyDataCenter,
     ratio_col: str = "RATIO",
     threshold: float = 10.0,
-    page_size: int = 200,
+    page_size: int = 500,
+    engine: Optional[str] = None,
 ) -> pd.DataFrame:
-    """获取表三：从所有窗口内找出净买额占比 > threshold 的股票，去重合并
-    
+    """获取表三：所有窗口内净买额占比 > threshold 的股票，每只股票一行（跨窗口聚合）
+
     Args:
         dc: EastMoneyDataCenter实例
         ratio_col: 占比字段名，默认"RATIO"
         threshold: 占比阈值（百分比），默认10.0
         page_size: 每页大小
-        
+        engine: 计算引擎（"pandas" / "polars"），默认取 dc.cfg.engine
+
     Returns:
-        去重后的DataFrame（以SECURITY_CODE为键）
+        每只股票一行的DataFrame（列见 `aggregate_trade_windows`）
     """
-    today = dt.date.today()
-    frames = []
-    
-    for label, days in WINDOWS:
-        date_gte = (today - dt.timedelta(days=days)).strftime("%Y-%m-%d")
-        params = build_params(trade_date_gte=date_gte, page_size=page_size)
-        df = dc.get_result_df(params)
-        
-        # 过滤占比 > threshold
-        df_filtered = filter_netbuy_ratio(df, ratio_col=ratio_col, threshold=threshold)
-        
-        if not df_filtered.empty:
-            frames.append(df_filtered)
-    
-    if not frames:
-        return pd.DataFrame()
-    
-    # 合并并去重（以SECURITY_CODE为键）
-    # 过滤掉空DataFrame以避免FutureWarning
-    non_empty_frames = [f for f in frames if not f.empty]
-    if not non_empty_frames:
-        return pd.DataFrame()
-    combined = pd.concat(non_empty_frames, ignore_index=True)
-    key_col = "SECURITY_CODE"
-    
-    if key_col in combined.columns:
-        deduped = combined.drop_duplicates(subset=[key_col], keep="first")
-        return deduped.reset_index(drop=True)
-    else:
-        # 如果没有SECURITY_CODE字段，直接返回合并结果
-        return combined.reset_index(drop=True)
+    from .graph import TABLES  # graph.py builds on this module
 
+    return TABLES.compute(
+        dc, "t3", ratio_col=ratio_col, threshold=threshold, page_size=page_size,
+        engine=resolve_engine(engine or dc.cfg.engine),
+    )
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+import datetime as dt
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
 import pandas as pd
 
 from ..datacenter import EastMoneyDataCenter
-from ..sources.seat_track import SeatCycle, CYCLE_1M, CYCLE_3M, CYCLE_6M
-from ..transforms.set_ops import intersect_by_key
-from .t2_seat import get_seat_topk_intersection
-from .t3_trade import get_trade_netbuy_ratio_filtered
+from ..profiling import profiled
+from ..sources.seat_track import SeatCycle, CYCLE_1M, CYCLE_3M, CYCLE_6M, build_params as seat_params
+from ..sources.trade_daily import REPORT_NAME as TRADE_REPORT
+from ..trading_calendar import CALENDAR
+from ..transforms import _arrow, _polars
+from ..transforms.engine import resolve_engine
+from ..transforms.ranking import RankingIndex, to_numeric
+from .t2_seat import get_seat_index, seat_topk_plans
+from .t3_trade import WINDOWS, aggregate_trade_windows, get_trade_delta, get_trade_window_index, trade_windows_plan
 
 
+@profiled
 def get_trade_x_seat_intersection(
     dc: EastMoneyDataCenter,
     cycle: SeatCycle,
@@ -20,7 +31,8 @@ def get_trade_x_seat_intersection(
     t2_netbuy_col: str = "NET_BUY_AMT",
     t2_buycnt_col: str = "BUY_TIMES",
     key_col: str = "SECURITY_CODE",
-    page_size: int = 200,
+    page_size: int = 500,
+    engine: Optional[str] = None,
 ) -> pd.DataFrame:
     """获取表四：表三 ∩ 表二
     
@@ -28,29 +40,305 @@ def get_trade_x_seat_intersection(
         dc: EastMoneyDataCenter实例
         cycle: 表二的统计周期（CYCLE_1M, CYCLE_3M, CYCLE_6M）
         t3_ratio_col: 表三的占比字段名
-        t3_threshold: 表三的占比阈值
+        t3_threshold: 表三的占比阈值（表三为跨窗口聚合，每只股票一行）
         t2_k: 表二的TopK数量
         t2_netbuy_col: 表二的净买额字段名
         t2_buycnt_col: 表二的买入次数字段名
         key_col: 交集键字段名
         page_size: 每页大小
+        engine: 计算引擎（"pandas" / "polars"），默认取 dc.cfg.engine；
+            polars 时表三与表二的计划和最终交集融合为一次执行
         
     Returns:
         表三 ∩ 表二的交集结果
     """
-    # 获取表三（单一结果表）
-    t3_df = get_trade_netbuy_ratio_filtered(
-        dc, ratio_col=t3_ratio_col, threshold=t3_threshold, page_size=page_size
-    )
-    
-    # 获取表二（对应周期的交集结果）
-    _, _, t2_inter = get_seat_topk_intersection(
-        dc, cycle=cycle, k=t2_k, netbuy_col=t2_netbuy_col, 
-        buycnt_col=t2_buycnt_col, key_col=key_col, page_size=page_size
+    from .graph import TABLES  # graph.py builds on this module
+
+    # 表三 ∩ 表二：在依赖图上求值，表三/表二（及其原始快照）已算过的节点直接复用；
+    # 引擎是节点参数，polars 时 t4 节点直接在两份快照上执行融合计划
+    return TABLES.compute(
+        dc, "t4",
+        cycle=cycle.code, ratio_col=t3_ratio_col, threshold=t3_threshold, k=t2_k,
+        netbuy_col=t2_netbuy_col, buycnt_col=t2_buycnt_col, key_col=key_col, page_size=page_size,
+        engine=resolve_engine(engine or dc.cfg.engine),
     )
-    
-    # 表三 ∩ 表二
-    result = intersect_by_key(t3_df, t2_inter, key=key_col)
-    
-    return result
 
+
+def trade_x_seat_polars(
+    history,
+    seat_index: RankingIndex,
+    ratio_col: str = "RATIO",
+    threshold: float = 10.0,
+    k: int = 10,
+    netbuy_col: str = "NET_BUY_AMT",
+    buycnt_col: str = "BUY_TIMES",
+    key_col: str = "SECURITY_CODE",
+) -> pd.DataFrame:
+    """表四的Polars版本：表三计划 semi-join 表二交集计划，一次collect（依赖图 t4 节点 engine="polars" 的实现）。
+
+    Args:
+        history: 表三的每日明细（trade_history 节点的 `.df`）
+        seat_index: 表二该周期的席位排名索引
+    """
+    t3_plan = trade_windows_plan(history, ratio_col=ratio_col, threshold=threshold, key_col=key_col)
+    if t3_plan is None or seat_index.empty:
+        return _polars.empty_like(seat_index.df)
+
+    _, _, t2_inter = seat_topk_plans(seat_index, k=k, netbuy_col=netbuy_col, buycnt_col=buycnt_col, key_col=key_col)
+    plan = _polars.intersect_by_key(t3_plan, t2_inter, key=key_col)
+    return _polars.collect_like([plan], seat_index.df)[0]
+
+
+@dataclass
+class T4Change:
+    """一次增量更新的结果：新进入 / 移出表四的股票（行分别取自更新后 / 更新前的表三）。"""
+
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    affected: int = 0  # 重新判断过的股票数
+
+    @property
+    def empty(self) -> bool:
+        return self.added.empty and self.removed.empty
+
+
+def _pandas(frame) -> pd.DataFrame:
+    if frame is None:
+        return pd.DataFrame()
+    return frame.to_pandas() if _arrow.is_arrow(frame) else frame
+
+
+def _trade_days(frame: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(frame["TRADE_DATE"].astype(str).str.slice(0, 10), errors="coerce")
+
+
+class IncrementalT4:
+    """表四的增量维护：保存表三的达标状态与表二的两个TopK集合，新数据只重算受影响的股票。
+
+    状态：
+        表三：最宽窗口内的达标明细（每只股票每天一条）及按股票聚合的结果
+        表二：该周期的席位快照，以及按净买额 / 买入次数的TopK集合
+
+    `update` 接收一次同步得到的增量行：
+        trade_rows: 新的每日明细；同一（股票, 交易日）的行整体替换旧行（盘中重拉同一天）
+        seat_rows: 席位快照中新增 / 变化的行，按股票代码覆盖（新股票追加在末尾）
+        today: 交易日前移时，只有跨过窗口边界的股票会重算
+    返回进出表四的股票；结果与对（基础数据 + 增量行）全量重算一致（同值的行序除外）。
+    """
+
+    def __init__(
+        self,
+        trade_history,
+        seat_snapshot,
+        ratio_col: str = "RATIO",
+        threshold: float = 10.0,
+        k: int = 10,
+        netbuy_col: str = "NET_BUY_AMT",
+        buycnt_col: str = "BUY_TIMES",
+        key_col: str = "SECURITY_CODE",
+        windows: Sequence[Tuple[str, int]] = WINDOWS,
+        today: Optional[dt.date] = None,
+    ) -> None:
+        self.ratio_col = ratio_col
+        self.threshold = threshold
+        self.k = k
+        self.metrics = (netbuy_col, buycnt_col)
+        self.key_col = key_col
+        self.windows = list(windows)
+        self.today = today or CALENDAR.as_of(TRADE_REPORT)
+        self._max_sessions = max(n for _, n in self.windows)
+
+        trade = _pandas(trade_history)
+        self.last_trade_day = self._last_day(trade, None)
+        self._hits = self._qualify(trade)
+        self._t3 = self._aggregate(self._hits)
+
+        self._seat = _pandas(seat_snapshot).reset_index(drop=True)
+        self._top: Dict[str, List[str]] = {}
+        self._kth: Dict[str, float] = {}
+        for m in self.metrics:
+            self._rank(m)
+        self._members = self._t2_keys() & set(self._t3.index)
+
+    @classmethod
+    def from_datacenter(cls, dc: EastMoneyDataCenter, cycle: SeatCycle, page_size: int = 500, **kwargs) -> "IncrementalT4":
+        """从缓存的表三明细索引与表二席位快照建立初始状态。"""
+        return cls(
+            get_trade_window_index(dc, page_size=page_size).df,
+            get_seat_index(dc, cycle=cycle, page_size=page_size).df,
+            **kwargs,
+        )
+
+    # ---- 表三 ----
+
+    def _last_day(self, frame: pd.DataFrame, current: Optional[dt.date]) -> Optional[dt.date]:
+        if frame.empty or "TRADE_DATE" not in frame.columns:
+            return current
+        last = _trade_days(frame).max()
+        if pd.isna(last):
+            return current
+        return max(current, last.date()) if current else last.date()
+
+    def _qualify(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """占比 > threshold 且在最宽窗口内的行，每只股票每天保留第一条（同 aggregate_trade_windows）。"""
+        key = self.key_col
+        if frame.empty or not {key, self.ratio_col, "TRADE_DATE"} <= set(frame.columns):
+            return pd.DataFrame({key: pd.Series(dtype=object), "_DAY": pd.Series(dtype="datetime64[ns]")})
+        day = _trade_days(frame)
+        age = CALENDAR.session_age(day, self.today)
+        hit = (to_numeric(frame[self.ratio_col]) > self.threshold) & (age <= self._max_sessions)
+        rows = frame.loc[hit].assign(_DAY=day[hit])
+        return rows.drop_duplicates([key, "_DAY"], keep="first").reset_index(drop=True)
+
+    def _aggregate(self, hits: pd.DataFrame) -> pd.DataFrame:
+        agg = aggregate_trade_windows(
+            hits.drop(columns="_DAY"), ratio_col=self.ratio_col, threshold=self.threshold,
+            key_col=self.key_col, windows=self.windows, today=self.today,
+        )
+        if agg.empty:
+            return pd.DataFrame()
+        return agg.set_axis(pd.Index(agg[self.key_col].astype(str)), axis=0)
+
+    def _keys(self, frame: pd.DataFrame) -> pd.Series:
+        return frame[self.key_col].astype(str)
+
+    def _advance(self, today: dt.date) -> Set[str]:
+        """日期前移：跨过某个窗口边界（交易日计）的股票需要重算，超出最宽窗口的明细丢弃。"""
+        if today < self.today:
+            raise ValueError(f"Cannot move back from {self.today} to {today}; rebuild instead.")
+        old, self.today = self.today, today
+        if self._hits.empty:
+            return set()
+        old_age = CALENDAR.session_age(self._hits["_DAY"], old)
+        new_age = CALENDAR.session_age(self._hits["_DAY"], today)
+        crossed = np.zeros(len(self._hits), dtype=bool)
+        for _, n in self.windows:
+            crossed |= (old_age <= n) & (new_age > n)
+        keys = set(self._keys(self._hits)[crossed])
+        self._hits = self._hits.loc[new_age <= self._max_sessions].reset_index(drop=True)
+        return keys
+
+    def _apply_trade(self, delta: pd.DataFrame) -> Set[str]:
+        if delta.empty or not {self.key_col, "TRADE_DATE"} <= set(delta.columns):
+            return set()
+        self.last_trade_day = self._last_day(delta, self.last_trade_day)
+        pairs = pd.MultiIndex.from_arrays([self._keys(delta), _trade_days(delta)])
+        replaced = pd.MultiIndex.from_arrays([self._keys(self._hits), self._hits["_DAY"]]).isin(pairs)
+        new = self._qualify(delta)
+        keys = set(self._keys(self._hits)[replaced]) | set(self._keys(new))
+        self._hits = pd.concat([f for f in (self._hits.loc[~replaced], new) if not f.empty] or [new], ignore_index=True)
+        return keys
+
+    def _reaggregate(self, keys: Set[str]) -> None:
+        fresh = self._aggregate(self._hits.loc[self._keys(self._hits).isin(keys).to_numpy()])
+        kept = self._t3.loc[~self._t3.index.isin(keys)] if not self._t3.empty else self._t3
+        self._t3 = pd.concat([f for f in (kept, fresh) if not f.empty] or [fresh])
+
+    # ---- 表二 ----
+
+    def _rank(self, metric: str) -> None:
+        if self._seat.empty or metric not in self._seat.columns:
+            self._top[metric], self._kth[metric] = [], np.nan
+            return
+        index = RankingIndex(self._seat)
+        rows = index.order(metric)[: self.k]
+        self._top[metric] = list(self._keys(self._seat).to_numpy()[rows])
+        values = index.values(metric)[rows]
+        self._kth[metric] = values[-1] if len(rows) == self.k else np.nan
+
+    def _t2_keys(self) -> Set[str]:
+        a, b = (self._top[m] for m in self.metrics)
+        return set(a) & set(b)
+
+    def _apply_seat(self, delta: pd.DataFrame, removed: Iterable[str]) -> None:
+        removed = set(map(str, removed))
+        if delta.empty and not removed:
+            return
+        key = self.key_col
+        codes = self._keys(self._seat) if not self._seat.empty else pd.Series(dtype=object)
+        if not delta.empty:
+            delta = delta.drop_duplicates(key, keep="first").reset_index(drop=True)
+        dcodes = self._keys(delta) if not delta.empty else pd.Series(dtype=object)
+
+        # 指标值变化（或新出现）的股票才可能改变TopK
+        pos = pd.Series(np.arange(len(codes)), index=codes.to_numpy())
+        pos = pos[~pos.index.duplicated()]
+        old_pos = dcodes.map(pos)
+        changed = old_pos.isna().to_numpy().copy()
+        for m in self.metrics:
+            if m in delta.columns:
+                new_v = to_numeric(delta[m]).to_numpy(dtype=float)
+                old_v = np.full(len(delta), np.nan)
+                hit = ~old_pos.isna().to_numpy()
+                old_v[hit] = to_numeric(self._seat[m]).to_numpy(dtype=float)[old_pos[hit].astype(int)]
+                changed |= ~((new_v == old_v) | (np.isnan(new_v) & np.isnan(old_v)))
+
+        # 原位覆盖、新股票追加、移除的股票删除：行序与全量快照一致
+        drop = codes.isin(set(dcodes) | removed).to_numpy()
+        new_pos = old_pos.to_numpy(dtype=float).copy()
+        new_pos[np.isnan(new_pos)] = len(codes) + np.arange(int(np.isnan(new_pos).sum()))
+        parts = [self._seat.loc[~drop].assign(_POS=np.arange(len(codes))[~drop])]
+        if not delta.empty:
+            parts.append(delta.loc[~dcodes.isin(removed).to_numpy()].assign(_POS=new_pos[~dcodes.isin(removed).to_numpy()]))
+        parts = [p for p in parts if not p.empty] or parts[:1]
+        self._seat = pd.concat(parts, ignore_index=True).sort_values("_POS", kind="mergesort").drop(columns="_POS").reset_index(drop=True)
+
+        touched = set(dcodes[changed]) | removed
+        for m in self.metrics:
+            top, kth = self._top[m], self._kth[m]
+            if touched & set(top) or np.isnan(kth) or m not in delta.columns:
+                self._rank(m)
+                continue
+            # TopK集合外的股票只有升到第K名（含）以上才会改变集合
+            new_v = to_numeric(delta[m]).to_numpy(dtype=float)[changed]
+            if np.any(new_v >= kth):
+                self._rank(m)
+
+    # ---- 表四 ----
+
+    def _rows(self, t3: pd.DataFrame, keys: Set[str]) -> pd.DataFrame:
+        if t3.empty:
+            return pd.DataFrame()
+        rows = t3.loc[t3.index.isin(keys)]
+        return rows.sort_values("NET_BUY_AMT", ascending=False, kind="mergesort").reset_index(drop=True)
+
+    def table(self) -> pd.DataFrame:
+        """当前的表四（按 NET_BUY_AMT 降序）。"""
+        return self._rows(self._t3, self._members)
+
+    def update(
+        self,
+        trade_rows=None,
+        seat_rows=None,
+        today: Optional[dt.date] = None,
+        seat_removed: Iterable[str] = (),
+    ) -> T4Change:
+        """应用一批增量行，返回进出表四的股票（见类说明）。"""
+        old_t3 = self._t3
+        t2_before = self._t2_keys()
+
+        affected: Set[str] = set()
+        if today is not None and today != self.today:
+            affected |= self._advance(today)
+        affected |= self._apply_trade(_pandas(trade_rows))
+        if affected:
+            self._reaggregate(affected)
+
+        self._apply_seat(_pandas(seat_rows), seat_removed)
+        t2_after = self._t2_keys()
+
+        candidates = affected | (t2_before ^ t2_after)
+        now = {c for c in candidates if c in t2_after and c in self._t3.index}
+        was = self._members & candidates
+        added, removed = now - was, was - now
+        self._members = (self._members - removed) | added
+        return T4Change(added=self._rows(self._t3, added), removed=self._rows(old_t3, removed), affected=len(candidates))
+
+    def refresh(self, dc: EastMoneyDataCenter, cycle: SeatCycle, page_size: int = 500, today: Optional[dt.date] = None) -> T4Change:
+        """增量刷新：表三只拉取最近一个交易日起的明细，表二重拉该周期的快照并只应用变化的行。"""
+        today = today or CALENDAR.as_of(TRADE_REPORT)
+        since = self.last_trade_day or today
+        trade = get_trade_delta(dc, since=since, page_size=page_size)
+        seat = _pandas(dc.get_all_pages(seat_params(cycle=cycle), page_size=page_size))
+        gone = set(self._keys(self._seat)) - set(self._keys(seat)) if not seat.empty and not self._seat.empty else set()
+        return self.update(trade_rows=trade, seat_rows=seat, today=today, seat_removed=gone)
@@ -0,0 +1,82 @@
+"""Table 5: 机构资金滚动分析 (Rolling Institutional Flows) - 一次拉取，任意窗口"""
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ..cache import TTLCache
+from ..datacenter import EastMoneyDataCenter
+from ..profiling import profiled
+from ..results import RESULTS
+from ..sources.trade_daily import REPORT_NAME, build_params
+from ..trading_calendar import CALENDAR
+from ..transforms.rolling import FlowGrid
+from .t3_trade import WINDOWS
+
+
+# 日度历史 -> FlowGrid 缓存：窗口组合变化只做累加和差分，不再请求接口；有效期到下一次数据发布
+_FLOW_CACHE = TTLCache(ttl_s=600.0, store=RESULTS)
+
+
+def get_trade_history(
+    dc: EastMoneyDataCenter,
+    days: int = 30,
+    page_size: int = 500,
+    max_pages: int = 100,
+) -> pd.DataFrame:
+    """分页拉取已发布的最新交易日往前 `days` 天的机构买卖每日明细（一次拉取覆盖所有窗口）。"""
+    date_gte = (CALENDAR.as_of(REPORT_NAME) - dt.timedelta(days=days)).strftime("%Y-%m-%d")
+    return dc.get_all_pages(build_params(trade_date_gte=date_gte), page_size=page_size, max_pages=max_pages)
+
+
+@profiled
+def get_flow_grid(
+    dc: EastMoneyDataCenter,
+    days: int = 30,
+    page_size: int = 500,
+    use_cache: bool = True,
+) -> FlowGrid:
+    """拉取历史并建立 日期×股票 网格（截止到已发布的最新交易日，窗口按自然日计）。
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        days: 历史长度（自然日），应不小于最大窗口
+        page_size: 每页大小
+        use_cache: 是否使用进程内缓存
+
+    Returns:
+        FlowGrid
+    """
+    as_of = CALENDAR.as_of(REPORT_NAME)
+    key = ("t5_flows", dc.cache_namespace, as_of.isoformat(), days, page_size)
+
+    def compute() -> FlowGrid:
+        return FlowGrid(get_trade_history(dc, days=days, page_size=page_size), end=pd.Timestamp(as_of))
+
+    if not use_cache:
+        return compute()
+    return _FLOW_CACHE.get_or_compute(key, compute, ttl_s=CALENDAR.ttl_s(REPORT_NAME))
+
+
+@profiled
+def get_rolling_flows(
+    dc: EastMoneyDataCenter,
+    windows: Optional[Sequence[Tuple[str, int]]] = None,
+    page_size: int = 500,
+) -> pd.DataFrame:
+    """获取表五：每只股票在各窗口内的 净买额合计 / 最大占比 / 上榜天数
+
+    Args:
+        dc: EastMoneyDataCenter实例
+        windows: [(标签, 自然日数)]，默认为表三的 WINDOWS（交易日）换算成的自然日跨度
+        page_size: 每页大小
+
+    Returns:
+        每只股票一行，按最大窗口的净买额降序
+    """
+    windows = list(windows or CALENDAR.calendar_windows(WINDOWS, CALENDAR.as_of(REPORT_NAME)))
+    grid = get_flow_grid(dc, days=max(d for _, d in windows), page_size=page_size)
+    return grid.snapshot(windows)
@@ -0,0 +1,207 @@
+"""A-share trading calendar and report publication schedule.
+
+Windows such as "last 5 days" are counted in trading sessions (SSE/SZSE), and cached
+snapshots stay valid until the report's next expected publication instead of for a fixed
+wall-clock TTL. Outside a publish window nothing upstream changes, so caches keyed by
+`as_of(report)` and expiring at `expires_at(report)` are not refetched on weekends,
+holidays or before the close.
+
+Weekday closures for the bundled years are listed in `_CLOSURES`. Other years fall back
+to "every weekday is a session". Extra closures can be supplied in a text file named by
+EASTMONEY_HOLIDAYS_FILE (one ISO date per line, `#` starts a comment), e.g. when the
+exchanges publish the next year's schedule before a release ships it. EASTMONEY_NOW pins
+the clock (see cassette.py).
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HOLIDAYS_FILE_ENV = "EASTMONEY_HOLIDAYS_FILE"
+# Pins "now" (ISO datetime, Beijing time if naive), e.g. to replay a cassette recorded on another day.
+NOW_ENV = "EASTMONEY_NOW"
+
+BEIJING = dt.timezone(dt.timedelta(hours=8), "Asia/Shanghai")
+
+# Weekday exchange closures (weekends are closed anyway)
+_CLOSURES = {
+    2024: [
+        "2024-01-01", "2024-02-09", "2024-02-12", "2024-02-13", "2024-02-14", "2024-02-15", "2024-02-16",
+        "2024-04-04", "2024-04-05", "2024-05-01", "2024-05-02", "2024-05-03", "2024-06-10", "2024-09-16",
+        "2024-09-17", "2024-10-01", "2024-10-02", "2024-10-03", "2024-10-04", "2024-10-07",
+    ],
+    2025: [
+        "2025-01-01", "2025-01-28", "2025-01-29", "2025-01-30", "2025-01-31", "2025-02-03", "2025-02-04",
+        "2025-04-04", "2025-05-01", "2025-05-02", "2025-05-05", "2025-06-02", "2025-10-01", "2025-10-02",
+        "2025-10-03", "2025-10-06", "2025-10-07", "2025-10-08",
+    ],
+    2026: [
+        "2026-01-01", "2026-01-02", "2026-02-16", "2026-02-17", "2026-02-18", "2026-02-19", "2026-02-20",
+        "2026-02-23", "2026-04-06", "2026-05-01", "2026-05-04", "2026-05-05", "2026-06-19", "2026-09-25",
+        "2026-10-01", "2026-10-02", "2026-10-05", "2026-10-06", "2026-10-07",
+    ],
+}
+
+
+@dataclass(frozen=True)
+class PublishWindow:
+    """When a report's data for a session appears upstream (Beijing time, on sessions only).
+
+    Inside the window cached results are re-checked every `poll_s`; outside it they are
+    valid until the next window opens.
+    """
+
+    start: dt.time
+    end: dt.time
+    poll_s: float = 600.0
+
+
+# report name -> publication window (report names as in sources/*.REPORT_NAME)
+PUBLISH_WINDOWS: Dict[str, PublishWindow] = {
+    # 机构买卖每日统计 / 机构席位追踪: published after the close
+    "RPT_ORGANIZATION_TRADE_DETAILSNEW": PublishWindow(dt.time(15, 30), dt.time(20, 0)),
+    "RPT_ORGANIZATION_SEATNEW": PublishWindow(dt.time(15, 30), dt.time(20, 0)),
+    # 机构调研: announcements trickle in through the day
+    "RPT_ORG_SURVEYNEW": PublishWindow(dt.time(8, 0), dt.time(23, 0), poll_s=1800.0),
+}
+
+
+def _load_extra_closures() -> List[str]:
+    path = os.environ.get(HOLIDAYS_FILE_ENV)
+    if not path:
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def _to_date(day) -> dt.date:
+    if isinstance(day, dt.datetime):
+        return day.date()
+    if isinstance(day, dt.date):
+        return day
+    return pd.Timestamp(day).date()
+
+
+class TradingCalendar:
+    """Exchange sessions plus the publication schedule of each report."""
+
+    def __init__(
+        self,
+        closures: Iterable = (),
+        windows: Optional[Dict[str, PublishWindow]] = None,
+    ) -> None:
+        self.closures = sorted({_to_date(d) for d in closures})
+        self.windows = dict(PUBLISH_WINDOWS if windows is None else windows)
+        self._bdc = np.busdaycalendar(weekmask="1111100", holidays=np.array(self.closures, dtype="datetime64[D]"))
+
+    # --- sessions -----------------------------------------------------------------
+
+    def is_session(self, day) -> bool:
+        return bool(np.is_busday(np.datetime64(_to_date(day), "D"), busdaycal=self._bdc))
+
+    def latest_session(self, day) -> dt.date:
+        """`day` if it is a session, else the session before it."""
+        d = np.busday_offset(np.datetime64(_to_date(day), "D"), 0, roll="backward", busdaycal=self._bdc)
+        return d.astype(dt.date)
+
+    def next_session(self, day) -> dt.date:
+        """The first session strictly after `day`."""
+        d = np.busday_offset(np.datetime64(_to_date(day), "D"), 0, roll="forward", busdaycal=self._bdc)
+        if d.astype(dt.date) == _to_date(day):
+            d = np.busday_offset(d, 1, busdaycal=self._bdc)
+        return d.astype(dt.date)
+
+    def window_start(self, as_of, sessions: int) -> dt.date:
+        """First session of the window made of the `sessions` latest sessions up to `as_of` (1 = the latest)."""
+        last = np.busday_offset(np.datetime64(_to_date(as_of), "D"), 0, roll="backward", busdaycal=self._bdc)
+        return np.busday_offset(last, -(max(int(sessions), 1) - 1), busdaycal=self._bdc).astype(dt.date)
+
+    def window_cutoff(self, as_of, sessions: int) -> dt.date:
+        """The session just before that window: days after it (weekends included) are inside."""
+        return self.latest_session(self.window_start(as_of, sessions) - dt.timedelta(days=1))
+
+    def session_age(self, days, as_of) -> np.ndarray:
+        """Number of sessions in [day, as_of] for each day (float; NaN where the day is missing).
+
+        A row from the as_of session has age 1, so "last n sessions" is `age <= n`.
+        """
+        values = pd.to_datetime(pd.Series(days, copy=False), errors="coerce").to_numpy("datetime64[D]")
+        valid = ~np.isnat(values)
+        out = np.full(len(values), np.nan)
+        if valid.any():
+            stop = np.datetime64(_to_date(as_of), "D") + 1
+            out[valid] = np.clip(np.busday_count(values[valid], stop, busdaycal=self._bdc), 0, None)
+        return out
+
+    def sessions(self, start, end) -> List[dt.date]:
+        """Sessions in [start, end]."""
+        days = np.arange(np.datetime64(_to_date(start), "D"), np.datetime64(_to_date(end), "D") + 1)
+        return [d.astype(dt.date) for d in days[np.is_busday(days, busdaycal=self._bdc)]]
+
+    def calendar_windows(self, windows: Sequence[Tuple[str, int]], as_of) -> List[Tuple[str, int]]:
+        """[(label, sessions)] -> [(label, calendar days back from as_of)] covering the same sessions."""
+        as_of = _to_date(as_of)
+        return [(label, (as_of - self.window_start(as_of, n)).days) for label, n in windows]
+
+    # --- publication schedule -------------------------------------------------------
+
+    def now(self) -> dt.datetime:
+        """Current Beijing time, or the time pinned by EASTMONEY_NOW."""
+        pinned = os.environ.get(NOW_ENV)
+        if pinned:
+            return self._now(dt.datetime.fromisoformat(pinned))
+        return dt.datetime.now(BEIJING)
+
+    def _now(self, now: Optional[dt.datetime]) -> dt.datetime:
+        if now is None:
+            return self.now()
+        return now.astimezone(BEIJING) if now.tzinfo is not None else now.replace(tzinfo=BEIJING)
+
+    def _window(self, report: str) -> PublishWindow:
+        try:
+            return self.windows[report]
+        except KeyError:
+            raise KeyError(f"No publication window for report '{report}'. Known: {', '.join(self.windows)}") from None
+
+    def as_of(self, report: str, now: Optional[dt.datetime] = None) -> dt.date:
+        """The latest session whose data for `report` may already be published."""
+        now = self._now(now)
+        today = now.date()
+        if self.is_session(today) and now.time() >= self._window(report).start:
+            return today
+        return self.latest_session(today - dt.timedelta(days=1))
+
+    def expires_at(self, report: str, now: Optional[dt.datetime] = None) -> dt.datetime:
+        """When a result fetched at `now` should be checked again."""
+        now = self._now(now)
+        window = self._window(report)
+        today = now.date()
+        if self.is_session(today):
+            start = dt.datetime.combine(today, window.start, BEIJING)
+            end = dt.datetime.combine(today, window.end, BEIJING)
+            if now < start:
+                return start
+            if now < end:
+                return min(now + dt.timedelta(seconds=window.poll_s), end)
+        return dt.datetime.combine(self.next_session(today), window.start, BEIJING)
+
+    def ttl_s(self, report: str, now: Optional[dt.datetime] = None) -> float:
+        """Seconds until `expires_at` (at least one)."""
+        now = self._now(now)
+        return max((self.expires_at(report, now) - now).total_seconds(), 1.0)
+
+
+def _default_calendar() -> TradingCalendar:
+    closures = [d for year in _CLOSURES.values() for d in year]
+    return TradingCalendar(closures + _load_extra_closures())
+
+
+# shared by the tables, the graph and the query layer
+CALENDAR = _default_calendar()
@@ -0,0 +1,118 @@
+"""pyarrow.compute implementations of the transforms (used when frames are `pa.Table`)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..securities import CODE_COL, ID_COL, SECURITIES
+
+
+def is_arrow(obj) -> bool:
+    return isinstance(obj, pa.Table)
+
+
+# what pd.to_numeric accepts once '%' is stripped (decimal / exponent / inf / nan)
+_NUMBER_RE = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$|^[+-]?(?i:inf|infinity|nan)$"
+
+
+def numeric(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """float64 view of a column; string columns may carry a trailing '%', bad values -> null.
+
+    Strings are cleaned and parsed with compute kernels (no per-value Python round-trip).
+    """
+    if pa.types.is_integer(col.type) or pa.types.is_floating(col.type) or pa.types.is_decimal(col.type):
+        return pc.cast(col, pa.float64())
+    if pa.types.is_null(col.type):
+        return pa.chunked_array([pa.nulls(len(col), pa.float64())])
+    s = pc.utf8_trim_whitespace(pc.replace_substring(pc.cast(col, pa.string()), "%", ""))
+    valid = pc.match_substring_regex(s, _NUMBER_RE)
+    return pc.cast(pc.if_else(valid, s, pa.scalar(None, pa.string())), pa.float64(), safe=False)
+
+
+def days(col: pa.ChunkedArray) -> np.ndarray:
+    """datetime64[D] of a date / timestamp column or of "YYYY-MM-DD..." strings (NaT where unparsable)."""
+    if pa.types.is_date(col.type) or pa.types.is_timestamp(col.type):
+        return pc.cast(col, pa.date32()).to_numpy()
+    s = pc.utf8_slice_codeunits(pc.cast(col, pa.string()), 0, 10)
+    return pc.cast(pc.strptime(s, format="%Y-%m-%d", unit="s", error_is_null=True), pa.date32()).to_numpy()
+
+
+def numeric_np(table: pa.Table, col: str) -> np.ndarray:
+    return numeric(table.column(col)).to_numpy()
+
+
+def _require(table: pa.Table, col: str) -> None:
+    if col not in table.column_names:
+        raise KeyError(f"Column '{col}' not found. Available: {table.column_names[:20]} ...")
+
+
+def _id_key(key: str, *tables: pa.Table) -> bool:
+    return key in (CODE_COL, ID_COL) and all(ID_COL in t.column_names for t in tables)
+
+
+def topk(table: pa.Table, col: str, k: int = 10, ascending: bool = False) -> pa.Table:
+    if table.num_rows == 0:
+        return table
+    _require(table, col)
+    order = pc.sort_indices(
+        pa.table({col: numeric(table.column(col))}),
+        sort_keys=[(col, "ascending" if ascending else "descending")],
+    )  # nulls sort last by default, like pandas NaN
+    return table.take(order[:k])
+
+
+def filter_threshold(table: pa.Table, col: str, threshold: float) -> pa.Table:
+    if table.num_rows == 0:
+        return table
+    _require(table, col)
+    return table.filter(pc.greater(numeric(table.column(col)), threshold), null_selection_behavior="drop")
+
+
+def intersect_by_key(a: pa.Table, b: pa.Table, key: str = CODE_COL) -> pa.Table:
+    if a.num_rows == 0 or b.num_rows == 0:
+        return a.slice(0, 0)
+    if _id_key(key, a, b):
+        bm = SECURITIES.bitmap(b.column(ID_COL).to_numpy())
+        return a.filter(pa.array(bm[a.column(ID_COL).to_numpy()]))
+    if key not in a.column_names or key not in b.column_names:
+        raise KeyError(f"Missing key '{key}' in one of the frames.")
+    return a.filter(pc.is_in(a.column(key), value_set=pc.unique(b.column(key)).combine_chunks()))
+
+
+def difference_by_key(a: pa.Table, b: pa.Table, key: str = CODE_COL) -> pa.Table:
+    if a.num_rows == 0 or b.num_rows == 0:
+        return a
+    if _id_key(key, a, b):
+        bm = SECURITIES.bitmap(b.column(ID_COL).to_numpy())
+        return a.filter(pa.array(~bm[a.column(ID_COL).to_numpy()]))
+    if key not in a.column_names or key not in b.column_names:
+        raise KeyError(f"Missing key '{key}' in one of the frames.")
+    mask = pc.is_in(pc.cast(a.column(key), pa.string()), value_set=pc.unique(pc.cast(b.column(key), pa.string())).combine_chunks())
+    return a.filter(pc.invert(pc.fill_null(mask, False)))
+
+
+def first_by_key(table: pa.Table, key: str) -> pa.Table:
+    """Keep the first row per key, in original row order (drop_duplicates(keep="first"))."""
+    rows = pa.array(np.arange(table.num_rows, dtype=np.int64))
+    firsts = (
+        pa.table({key: table.column(key), "__row": rows})
+        .group_by(key, use_threads=False)
+        .aggregate([("__row", "min")])
+        .column("__row_min")
+    )
+    return table.take(np.sort(firsts.to_numpy()))
+
+
+def union_by_key(tables: list, key: str = CODE_COL) -> pa.Table:
+    if not tables:
+        return pa.table({})
+    table = pa.concat_tables(tables, promote_options="permissive")
+    if table.num_rows == 0:
+        return table
+    if _id_key(key, table):
+        return first_by_key(table, ID_COL)
+    if key in table.column_names:
+        return first_by_key(table, key)
+    return table
@@ -0,0 +1,91 @@
+"""Lazy Polars building blocks of the table builders (the "polars" engine).
+
+The engine is chosen per table builder (`aggregate_survey_events`, `seat_topk_from_index`,
+`aggregate_trade_windows`, `get_trade_x_seat_intersection` take `engine=`); the public
+transforms in this package stay pandas / Arrow. A builder composes the helpers here into
+one `pl.LazyFrame` plan per table (t3: one window aggregation; t2: two TopKs and a semi
+join; t4: both of them and the final intersection), which Polars optimizes and runs on
+all cores. `collect_like` materializes plans back into the caller's container (pandas
+or Arrow), so the rest of the app is unaffected by the engine choice.
+
+Polars is optional: `pip install polars`.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import pandas as pd
+
+from ..securities import CODE_COL, ID_COL
+from . import _arrow
+
+
+def require_polars():
+    try:
+        import polars as pl
+    except ImportError as e:  # optional dependency
+        raise ImportError('The "polars" engine requires `pip install polars`.') from e
+    return pl
+
+
+def lazy(frame):
+    """pandas DataFrame / pyarrow Table -> pl.LazyFrame."""
+    pl = require_polars()
+    if _arrow.is_arrow(frame):
+        return pl.from_arrow(frame).lazy()
+    return pl.from_pandas(frame).lazy()
+
+
+def _names(lf) -> List[str]:
+    return lf.collect_schema().names()
+
+
+def numeric(lf, col: str):
+    pl = require_polars()
+    dtype = lf.collect_schema()[col]
+    if dtype.is_numeric():
+        return pl.col(col).cast(pl.Float64)
+    return pl.col(col).cast(pl.Utf8).str.replace("%", "", literal=True).cast(pl.Float64, strict=False)
+
+
+def _require(lf, col: str) -> None:
+    names = _names(lf)
+    if col not in names:
+        raise KeyError(f"Column '{col}' not found. Available: {names[:20]} ...")
+
+
+def _key(key: str, *lfs) -> str:
+    if key in (CODE_COL, ID_COL) and all(ID_COL in _names(lf) for lf in lfs):
+        return ID_COL
+    return key
+
+
+def topk(lf, col: str, k: int = 10, ascending: bool = False):
+    _require(lf, col)
+    return lf.sort(numeric(lf, col), descending=not ascending, nulls_last=True, maintain_order=True).head(k)
+
+
+def intersect_by_key(a, b, key: str = CODE_COL):
+    k = _key(key, a, b)
+    if k not in _names(a) or k not in _names(b):
+        raise KeyError(f"Missing key '{key}' in one of the frames.")
+    right = b.select(k).unique()
+    try:
+        return a.join(right, on=k, how="semi", maintain_order="left")
+    except TypeError:  # polars < 1.19: semi joins keep left order anyway
+        return a.join(right, on=k, how="semi")
+
+
+def collect_like(lfs: Sequence, like) -> list:
+    """Run several plans in one parallel pass; return frames of the same type as `like`."""
+    pl = require_polars()
+    frames = pl.collect_all(list(lfs))
+    if _arrow.is_arrow(like):
+        return [f.to_arrow() for f in frames]
+    return [f.to_pandas() for f in frames]
+
+
+def empty_like(like):
+    """Empty result in the container of `like` (the same type a collected plan would have)."""
+    return like.slice(0, 0) if _arrow.is_arrow(like) else pd.DataFrame()
@@ -0,0 +1,25 @@
+"""Transform engine names for the table builders.
+
+The engine switches whole table builders (`engine=` / `EastMoneyConfig.engine`), which
+compile one Polars plan per table (see `_polars`). The public transforms (`topk`,
+`set_ops`, `trade_filters`) are single operations on pandas / Arrow and take no engine.
+"""
+
+from __future__ import annotations
+
+PANDAS = "pandas"
+POLARS = "polars"
+
+ENGINES = (PANDAS, POLARS)
+
+
+def resolve_engine(name: str | None) -> str:
+    """Validate an engine name ("pandas" is the default); fail early if Polars is missing."""
+    name = name or PANDAS
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Expected one of: {', '.join(ENGINES)}.")
+    if name == POLARS:
+        from ._polars import require_polars
+
+        require_polars()
+    return name
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import _arrow
+
+
+def to_numeric(s: pd.Series) -> pd.Series:
+    """Coerce an EastMoney column to float; string columns may carry a trailing '%'."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+    return pd.to_numeric(s.astype(str).str.replace("%", "", regex=False), errors="coerce")
+
+
+class RankingIndex:
+    """Per-metric argsort over one snapshot frame.
+
+    Built once per (report, cycle/window) snapshot; afterwards TopK is a slice and a
+    threshold query is a binary search, so UI slider moves never touch the network.
+    Metric orders are built lazily on first use and kept for the life of the index.
+    The snapshot may be a pandas DataFrame or a pyarrow Table; results keep its type.
+    """
+
+    def __init__(self, df: pd.DataFrame, metrics: Iterable[str] = ()) -> None:
+        self.is_arrow = _arrow.is_arrow(df)
+        # a default RangeIndex is kept as is, so the frame (and its fingerprint stamp) is shared
+        plain = self.is_arrow or df.index.equals(pd.RangeIndex(len(df)))
+        self.df = df if plain else df.reset_index(drop=True)
+        self.columns = list(df.column_names) if self.is_arrow else list(df.columns)
+        self._desc_order: Dict[str, np.ndarray] = {}
+        self._asc_values: Dict[str, np.ndarray] = {}
+        for m in metrics:
+            if m in self.columns:
+                self._ensure(m)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.df) == 0
+
+    def _take(self, rows: np.ndarray) -> pd.DataFrame:
+        if self.is_arrow:
+            return self.df.take(rows)
+        return self.df.take(rows).reset_index(drop=True)
+
+    def column(self, col: str) -> np.ndarray:
+        if self.is_arrow:
+            return self.df.column(col).to_numpy(zero_copy_only=False)
+        return self.df[col].to_numpy()
+
+    def values(self, metric: str) -> np.ndarray:
+        """The metric column as float64 (NaN for missing / unparsable values)."""
+        if self.is_arrow:
+            return np.asarray(_arrow.numeric_np(self.df, metric), dtype=float)
+        return to_numeric(self.df[metric]).to_numpy(dtype=float)
+
+    def _ensure(self, metric: str) -> None:
+        if metric in self._desc_order:
+            return
+        if metric not in self.columns:
+            raise KeyError(f"Column '{metric}' not found. Available: {self.columns[:20]} ...")
+        values = self.values(metric)
+        # stable descending order, NaN last: same row order as sort_values(ascending=False, kind="mergesort")
+        order = np.argsort(-values, kind="stable")
+        self._desc_order[metric] = order
+        valid = values[~np.isnan(values)]
+        self._asc_values[metric] = np.sort(valid, kind="stable")
+
+    def order(self, metric: str) -> np.ndarray:
+        """Row positions sorted by `metric` descending."""
+        self._ensure(metric)
+        return self._desc_order[metric]
+
+    def rank(self, metric: str) -> np.ndarray:
+        """1-based descending rank of every row (ties broken by row order); NaN for missing values."""
+        order = self.order(metric)
+        rank = np.empty(len(order), dtype=float)
+        rank[order] = np.arange(1, len(order) + 1)
+        rank[np.isnan(self.values(metric))] = np.nan
+        return rank
+
+    def count_above(self, metric: str, threshold: float) -> int:
+        """Number of rows with metric > threshold (binary search)."""
+        self._ensure(metric)
+        asc = self._asc_values[metric]
+        return int(len(asc) - np.searchsorted(asc, threshold, side="right"))
+
+    def topk(self, metric: str, k: int = 10) -> pd.DataFrame:
+        if self.empty:
+            return self.df
+        return self._take(self.order(metric)[:k])
+
+    def above(self, metric: str, threshold: float, keep_order: bool = False) -> pd.DataFrame:
+        """Rows with metric > threshold, in descending metric order
+        (or in the snapshot's original row order when keep_order=True)."""
+        if self.empty:
+            return self.df
+        n = self.count_above(metric, threshold)
+        rows = self.order(metric)[:n]
+        if keep_order:
+            rows = np.sort(rows)
+        return self._take(rows)
+
+    def count_curve(self, metric: str, thresholds: Optional[Iterable[float]] = None) -> pd.DataFrame:
+        """"count vs threshold" curve: how many rows remain for each threshold."""
+        self._ensure(metric)
+        asc = self._asc_values[metric]
+        if thresholds is None:
+            thresholds = np.unique(asc)
+        t = np.asarray(list(thresholds), dtype=float)
+        counts = len(asc) - np.searchsorted(asc, t, side="right")
+        return pd.DataFrame({"threshold": t, "count": counts})
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import warnings
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..securities import CODE_COL
+from . import _arrow
+from .ranking import to_numeric
+
+
+class FlowGrid:
+    """Daily trade history laid out as a (calendar day x security) grid.
+
+    Cells hold the day's NET_BUY_AMT and RATIO and whether the stock was on the
+    institutional list that day; several records of one stock on one day count once
+    (the first, as in t3). Rolling sums / counts for any window length come from
+    one cumulative sum (C[t] - C[t - span]), rolling max from a sliding-window view, so a
+    whole window set is answered from a single history pull.
+
+    A window of `days` covers the calendar days [t - days, t] (days=0 is the day itself).
+    Unlike t3, whose windows count trading sessions, weekends and holidays use up
+    window days here: "5" is five calendar days, not five sessions.
+    """
+
+    def __init__(
+        self,
+        history: pd.DataFrame,
+        date_col: str = "TRADE_DATE",
+        key_col: str = CODE_COL,
+        netbuy_col: str = "NET_BUY_AMT",
+        ratio_col: str = "RATIO",
+        end: Optional[pd.Timestamp] = None,
+    ) -> None:
+        cols = _columns(history, date_col, key_col, netbuy_col, ratio_col)
+        days = cols["days"] if cols is not None else np.array([], dtype="datetime64[D]")
+        valid = ~np.isnat(days)
+        if not valid.any():
+            # no history, or no TRADE_DATE that parses
+            self.dates = pd.DatetimeIndex([])
+            self.codes = np.array([], dtype=object)
+            self.names = np.array([], dtype=object)
+            self.netbuy = np.zeros((0, 0))
+            self.ratio = np.zeros((0, 0))
+            self.on_list = np.zeros((0, 0), dtype=bool)
+            return
+
+        days = days[valid]
+        start = days.min()
+        stop = np.datetime64(pd.Timestamp(end).date(), "D") if end is not None else days.max()
+        self.dates = pd.date_range(pd.Timestamp(start), pd.Timestamp(stop), freq="D")
+
+        codes, sec = np.unique(cols["keys"][valid], return_inverse=True)
+        self.codes = codes
+        row = (days - start).astype(np.int64)
+        keep = np.flatnonzero(row < len(self.dates))
+        # one record per (security, day), the first in input order, like t3's drop_duplicates
+        _, first = np.unique(row[keep] * len(codes) + sec[keep], return_index=True)
+        keep = keep[np.sort(first)]
+        row, sec = row[keep], sec[keep]
+        shape = (len(self.dates), len(codes))
+
+        netbuy = cols["netbuy"][valid][keep]
+        ratio = cols["ratio"][valid][keep]
+
+        self.netbuy = np.zeros(shape)
+        np.add.at(self.netbuy, (row, sec), np.nan_to_num(netbuy))
+        self.ratio = np.full(shape, np.nan)
+        np.fmax.at(self.ratio, (row, sec), ratio)
+        self.on_list = np.zeros(shape, dtype=bool)
+        self.on_list[row, sec] = True
+
+        # latest name per security (rows sorted by day, last write wins)
+        self.names = np.full(len(codes), None, dtype=object)
+        if cols["names"] is not None:
+            order = np.argsort(row, kind="stable")
+            self.names[sec[order]] = cols["names"][valid][keep][order]
+
+    @property
+    def empty(self) -> bool:
+        return self.netbuy.size == 0
+
+    @staticmethod
+    def _rolling_sum(grid: np.ndarray, span: int) -> np.ndarray:
+        c = np.cumsum(grid, axis=0, dtype=float)
+        out = c.copy()
+        out[span:] -= c[:-span]
+        return out
+
+    def rolling(self, days: int, sec=slice(None)) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(NET_BUY_AMT sum, max RATIO, days on list) over the window ending at every date; each T x S.
+
+        `sec` selects security columns first (e.g. `[pos]`) when only a few are needed.
+        """
+        span = int(days) + 1
+        netbuy = self._rolling_sum(self.netbuy[:, sec], span)
+        on_days = self._rolling_sum(self.on_list[:, sec], span).astype(np.int64)
+        ratio = self.ratio[:, sec]
+        padded = np.vstack([np.full((span - 1, ratio.shape[1]), np.nan), ratio])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, span, axis=0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows -> NaN is intended
+            ratio = np.nanmax(windows, axis=-1)
+        return netbuy, ratio, on_days
+
+    def snapshot(self, windows: Sequence[Tuple[str, int]], as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """One row per security with `NET_BUY_AMT_<label>`, `MAX_RATIO_<label>`, `DAYS_ON_LIST_<label>`
+        for every window ending at `as_of` (default: last date); only stocks listed in some window."""
+        if self.empty:
+            return pd.DataFrame()
+        t = len(self.dates) - 1 if as_of is None else self.dates.get_loc(pd.Timestamp(as_of).normalize())
+        out = {CODE_COL: self.codes, "SECURITY_NAME_ABBR": self.names}
+        listed = np.zeros(len(self.codes), dtype=bool)
+        for label, days in windows:
+            netbuy, ratio, on_days = (a[t] for a in self.rolling(days))
+            out[f"NET_BUY_AMT_{label}"] = netbuy
+            out[f"MAX_RATIO_{label}"] = ratio
+            out[f"DAYS_ON_LIST_{label}"] = on_days
+            listed |= on_days > 0
+        df = pd.DataFrame(out)[listed]
+        if windows:
+            df = df.sort_values(f"NET_BUY_AMT_{windows[-1][0]}", ascending=False, kind="mergesort")
+        return df.reset_index(drop=True)
+
+    def series(self, code: str, windows: Iterable[Tuple[str, int]], metric: str = "NET_BUY_AMT") -> pd.DataFrame:
+        """Rolling `metric` ("NET_BUY_AMT" / "MAX_RATIO" / "DAYS_ON_LIST") of one security, one column per window."""
+        pos = np.searchsorted(self.codes, code)
+        if pos >= len(self.codes) or self.codes[pos] != code:
+            raise KeyError(f"Security '{code}' not in history.")
+        which = {"NET_BUY_AMT": 0, "MAX_RATIO": 1, "DAYS_ON_LIST": 2}[metric]
+        cols: Dict[str, np.ndarray] = {label: self.rolling(days, [pos])[which][:, 0] for label, days in windows}
+        return pd.DataFrame(cols, index=self.dates)
+
+
+def _columns(history, date_col: str, key_col: str, netbuy_col: str, ratio_col: str) -> Optional[Dict[str, np.ndarray]]:
+    """The grid's inputs as numpy arrays (None without rows / key columns).
+
+    A pyarrow.Table is read column by column with compute kernels, without converting the
+    whole table to pandas.
+    """
+    if _arrow.is_arrow(history):
+        names = history.column_names
+        if history.num_rows == 0 or date_col not in names or key_col not in names:
+            return None
+        n = history.num_rows
+        return {
+            "days": _arrow.days(history.column(date_col)),
+            "keys": history.column(key_col).to_numpy(zero_copy_only=False).astype(str),
+            "netbuy": _arrow.numeric_np(history, netbuy_col) if netbuy_col in names else np.zeros(n),
+            "ratio": _arrow.numeric_np(history, ratio_col) if ratio_col in names else np.full(n, np.nan),
+            "names": history.column("SECURITY_NAME_ABBR").to_numpy(zero_copy_only=False) if "SECURITY_NAME_ABBR" in names else None,
+        }
+    df = history
+    if len(df) == 0 or date_col not in df.columns or key_col not in df.columns:
+        return None
+    n = len(df)
+    return {
+        "days": pd.to_datetime(df[date_col].astype(str).str.slice(0, 10), errors="coerce").to_numpy("datetime64[D]"),
+        "keys": df[key_col].astype(str).to_numpy(),
+        "netbuy": to_numeric(df[netbuy_col]).to_numpy(dtype=float) if netbuy_col in df.columns else np.zeros(n),
+        "ratio": to_numeric(df[ratio_col]).to_numpy(dtype=float) if ratio_col in df.columns else np.full(n, np.nan),
+        "names": df["SECURITY_NAME_ABBR"].to_numpy() if "SECURITY_NAME_ABBR" in df.columns else None,
+    }
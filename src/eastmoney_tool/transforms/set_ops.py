@@ -2,10 +2,23 @@ from __future__ import annotations
 
 import pandas as pd
 
+from ..securities import CODE_COL, ID_COL, SECURITIES, has_ids
+from . import _arrow
+
+
+def _id_key(key: str, *frames: pd.DataFrame) -> bool:
+    """Use the interned int32 SECURITY_ID instead of the code strings when possible."""
+    return key in (CODE_COL, ID_COL) and has_ids(*frames)
+
 
 def intersect_by_key(a: pd.DataFrame, b: pd.DataFrame, key: str = "SECURITY_CODE") -> pd.DataFrame:
+    if _arrow.is_arrow(a):
+        return _arrow.intersect_by_key(a, b, key=key)
     if a.empty or b.empty:
         return a.iloc[0:0].copy()
+    if _id_key(key, a, b):
+        bm = SECURITIES.bitmap(b[ID_COL].to_numpy())
+        return a.loc[bm[a[ID_COL].to_numpy()]].reset_index(drop=True)
     if key not in a.columns or key not in b.columns:
         raise KeyError(f"Missing key '{key}' in one of the frames.")
     return a.merge(b[[key]].drop_duplicates(), on=key, how="inner")
@@ -13,16 +26,25 @@ def intersect_by_key(a: pd.DataFrame, b: pd.DataFrame, key: str = "SECURITY_CODE
 def union_by_key(frames: list[pd.DataFrame], key: str = "SECURITY_CODE") -> pd.DataFrame:
     if not frames:
         return pd.DataFrame()
+    if _arrow.is_arrow(frames[0]):
+        return _arrow.union_by_key(frames, key=key)
     df = pd.concat(frames, ignore_index=True)
-    if key in df.columns:
+    if _id_key(key, df):
+        df = df.loc[~df[ID_COL].duplicated(keep="first")]
+    elif key in df.columns:
         df = df.drop_duplicates(subset=[key], keep="first")
     return df.reset_index(drop=True)
 
 def difference_by_key(a: pd.DataFrame, b: pd.DataFrame, key: str = "SECURITY_CODE") -> pd.DataFrame:
+    if _arrow.is_arrow(a):
+        return _arrow.difference_by_key(a, b, key=key)
     if a.empty:
         return a
     if b.empty:
         return a.reset_index(drop=True)
+    if _id_key(key, a, b):
+        bm = SECURITIES.bitmap(b[ID_COL].to_numpy())
+        return a.loc[~bm[a[ID_COL].to_numpy()]].reset_index(drop=True)
     if key not in a.columns or key not in b.columns:
         raise KeyError(f"Missing key '{key}' in one of the frames.")
     bkeys = set(b[key].dropna().astype(str).tolist())
@@ -2,8 +2,12 @@ from __future__ import annotations
 
 import pandas as pd
 
+from . import _arrow
+
 
 def topk(df: pd.DataFrame, col: str, k: int = 10, ascending: bool = False) -> pd.DataFrame:
+    if _arrow.is_arrow(df):
+        return _arrow.topk(df, col, k=k, ascending=ascending)
     if df.empty:
         return df
     if col not in df.columns:
@@ -2,11 +2,16 @@ from __future__ import annotations
 
 import pandas as pd
 
+from . import _arrow
+
 
 def filter_netbuy_ratio(df: pd.DataFrame, ratio_col: str, threshold: float = 10.0) -> pd.DataFrame:
     """Filter rows where '机构净买额占总成交额占比' > threshold.
     Many EastMoney columns are string-typed; we coerce to numeric safely.
+    Accepts a pandas DataFrame or a pyarrow Table (filtered with Arrow compute kernels).
     """
+    if _arrow.is_arrow(df):
+        return _arrow.filter_threshold(df, ratio_col, threshold)
     if df.empty:
         return df
     if ratio_col not in df.columns:
@@ -0,0 +1,184 @@
+"""Pluggable HTTP transports.
+
+Every backend takes (url, params, headers, timeout) and returns an `HttpResponse`,
+so `HttpClient` (rate limiting, default headers) stays identical whichever one is used.
+
+Backends:
+  - "requests": requests.Session with an enlarged connection pool (default).
+  - "urllib3":  a raw urllib3 PoolManager, configurable pool size and TCP keep-alive,
+                gzip/deflate (+brotli/zstd when the codec is installed) negotiation.
+  - "httpx":    httpx.Client, HTTP/2 capable (needs `pip install "httpx[http2]"`).
+
+Any backend can be wrapped to record into, or be replaced by replaying from, a cassette
+(`EastMoneyConfig.cassette`, see cassette.py).
+"""
+
+from __future__ import annotations
+
+import re
+import socket
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Type
+from urllib.parse import urlencode
+
+from .config import EastMoneyConfig
+
+
+@dataclass
+class HttpResponse:
+    status_code: int
+    text: str
+    url: str
+
+
+_CHARSET_RE = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+
+
+def _decode_body(body: bytes, content_type: Optional[str]) -> str:
+    m = _CHARSET_RE.search(content_type or "")
+    encoding = m.group(1) if m else "utf-8"
+    return body.decode(encoding, errors="replace")
+
+
+def _with_query(url: str, params: Optional[Dict[str, Any]]) -> str:
+    if not params:
+        return url
+    sep = "&" if "?" in url else "?"
+    return f"{url}{sep}{urlencode(params)}"
+
+
+class Transport(ABC):
+    """Base class for HTTP backends. Subclasses implement `get`."""
+
+    name = "base"
+    # Exceptions meaning "the attempt failed in transit" (retried by HttpClient).
+    transient_errors: Tuple[Type[BaseException], ...] = (OSError,)
+    # True when no upstream is involved (cassette replay): HttpClient skips request spacing.
+    offline = False
+
+    @abstractmethod
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> HttpResponse:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    """requests.Session with a pool sized for parallel page fetches."""
+
+    name = "requests"
+
+    def __init__(self, pool_size: int = 16) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, params, headers, timeout) -> HttpResponse:
+        r = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        return HttpResponse(status_code=r.status_code, text=r.text, url=r.url)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """Bare urllib3 pool: no requests overhead, keep-alive sockets, compressed bodies."""
+
+    name = "urllib3"
+
+    def __init__(self, pool_size: int = 16, keepalive_s: int = 60) -> None:
+        import urllib3
+        from urllib3.connection import HTTPConnection
+
+        socket_options = list(HTTPConnection.default_socket_options)
+        if keepalive_s > 0:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive_s))
+
+        self.transient_errors = (urllib3.exceptions.HTTPError, OSError)
+        self._default_headers = urllib3.util.make_headers(keep_alive=True, accept_encoding=True)
+        self._pool = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=pool_size,
+            block=True,
+            retries=False,
+            socket_options=socket_options,
+        )
+
+    def get(self, url, params, headers, timeout) -> HttpResponse:
+        full_url = _with_query(url, params)
+        h = dict(self._default_headers)
+        h.update(headers)
+        r = self._pool.request("GET", full_url, headers=h, timeout=timeout)
+        return HttpResponse(
+            status_code=r.status,
+            text=_decode_body(r.data, r.headers.get("Content-Type")),
+            url=full_url,
+        )
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+class HttpxTransport(Transport):
+    """httpx client; negotiates HTTP/2 via ALPN on https endpoints."""
+
+    name = "httpx"
+
+    def __init__(self, pool_size: int = 16, keepalive_s: int = 60, http2: bool = True) -> None:
+        try:
+            import httpx
+        except ImportError as e:  # optional dependency
+            raise ImportError('The "httpx" transport requires `pip install "httpx[http2]"`.') from e
+
+        # keepalive_s=0 disables reuse (httpx reads keepalive_expiry=None as "keep forever")
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size if keepalive_s > 0 else 0,
+            keepalive_expiry=float(keepalive_s),
+        )
+        self._client = httpx.Client(http2=http2, limits=limits)
+        self.transient_errors = (httpx.TransportError, OSError)
+
+    def get(self, url, params, headers, timeout) -> HttpResponse:
+        r = self._client.get(url, params=params, headers=headers, timeout=timeout)
+        return HttpResponse(status_code=r.status_code, text=r.text, url=str(r.url))
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def make_transport(cfg: EastMoneyConfig) -> Transport:
+    """Build the backend selected by `cfg.transport`, wrapped for `cfg.cassette` if set."""
+    if cfg.cassette:
+        from .cassette import MODES, Cassette, RecordingTransport, ReplayTransport
+
+        if cfg.cassette_mode == "replay":
+            return ReplayTransport(Cassette(cfg.cassette), latency_ms=cfg.replay_latency_ms)
+        if cfg.cassette_mode == "record":
+            return RecordingTransport(_backend(cfg), Cassette(cfg.cassette))
+        raise ValueError(f"Unknown cassette mode '{cfg.cassette_mode}'. Expected one of: {', '.join(MODES)}.")
+    return _backend(cfg)
+
+
+def _backend(cfg: EastMoneyConfig) -> Transport:
+    if cfg.transport == "requests":
+        return RequestsTransport(pool_size=cfg.pool_size)
+    if cfg.transport == "urllib3":
+        return Urllib3Transport(pool_size=cfg.pool_size, keepalive_s=cfg.keepalive_s)
+    if cfg.transport == "httpx":
+        return HttpxTransport(pool_size=cfg.pool_size, keepalive_s=cfg.keepalive_s, http2=cfg.http2)
+    raise ValueError(f"Unknown transport '{cfg.transport}'. Expected one of: requests, urllib3, httpx.")
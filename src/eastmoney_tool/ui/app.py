@@ -1,16 +1,38 @@
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from eastmoney_tool import profiling
+from eastmoney_tool.config import EastMoneyConfig
 from eastmoney_tool.datacenter import EastMoneyDataCenter
+from eastmoney_tool.fingerprint import diff_frames, fingerprint
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.query import QueryLayer
+from eastmoney_tool.results import RESULTS
+from eastmoney_tool.scheduler import RequestScheduler
+from eastmoney_tool.server import RemoteTables, remote_from_env
 from eastmoney_tool.sources.seat_track import CYCLE_1M, CYCLE_3M, CYCLE_6M
 from eastmoney_tool.sources.survey import RANGE_1W, RANGE_1M
-from eastmoney_tool.tables.t1_survey import get_survey_data
-from eastmoney_tool.tables.t2_seat import get_seat_topk_intersection
-from eastmoney_tool.tables.t3_trade import get_trade_netbuy_ratio_filtered
-from eastmoney_tool.tables.t4_intersection import get_trade_x_seat_intersection
-from eastmoney_tool.ui.formatting import format_amount_to_wan
+from eastmoney_tool.store import REPORT_KEYS, SEAT, SURVEY, TRADE, SnapshotStore, sync_snapshots
+from eastmoney_tool.tables.graph import TABLES
+from eastmoney_tool.tables.t1_survey import filter_survey_sum
+from eastmoney_tool.tables.t2_seat import seat_topk_from_index
+from eastmoney_tool.tables.t3_trade import (
+    aggregate_trade_windows,
+    trade_threshold_curve,
+    window_labels,
+)
+from eastmoney_tool.tables.t4_intersection import IncrementalT4, get_trade_x_seat_intersection
+from eastmoney_tool.tables.t5_flows import get_flow_grid
+from eastmoney_tool.transforms.engine import ENGINES
+from eastmoney_tool.ui.formatting import HIDDEN_COLUMNS, format_amount_to_wan
+from eastmoney_tool.ui.table_view import export_controls, paged_table, take_page
 
 
 st.set_page_config(page_title="东方财富机构数据小工具", layout="wide")
@@ -18,9 +40,252 @@ st.set_page_config(page_title="东方财富机构数据小工具", layout="wide"
 st.title("东方财富数据中心：机构数据分析小工具")
 st.caption("数据来源：datacenter-web.eastmoney.com（网页背后的结构化接口）。建议合理控制请求频率。")
 
-dc = EastMoneyDataCenter()
+@st.cache_resource
+def get_scheduler() -> RequestScheduler:
+    """进程级共享的请求调度器：所有会话共用同一个限速预算。"""
+    return RequestScheduler(HttpClient(EastMoneyConfig()))
+
+
+@st.cache_resource
+def get_datacenter(result_format: str = "pandas", engine: str = "pandas") -> EastMoneyDataCenter:
+    return EastMoneyDataCenter(EastMoneyConfig(result_format=result_format, engine=engine), http=get_scheduler())
+
+
+@st.cache_resource
+def get_query_layer() -> QueryLayer:
+    """进程级共享的 DuckDB 查询层（本地 Parquet 快照）。"""
+    return QueryLayer(SnapshotStore())
+
+
+@st.cache_resource
+def get_remote_tables() -> RemoteTables | None:
+    """设置了 EASTMONEY_TABLE_SERVER 时，表一~表四改从表服务读取（多个副本共享一次拉取和计算）。"""
+    return remote_from_env()
+
+
+def render_once(slot: str, inputs: tuple, build):
+    """按输入的内容指纹缓存展示用的表：输入未变时复用上次结果，跳过重新计算和格式化。
+
+    结果存放在进程级的 RESULTS 中（按指纹在会话间共享、受内存预算约束），会话里只保存指纹。
+
+    Returns:
+        (结果, 是否与上次不同)
+    """
+    key = (slot, *(fingerprint(x) for x in inputs))
+    changed = st.session_state.get(slot) != key
+    st.session_state[slot] = key
+    return RESULTS.get_or_build(key, build), changed
+
+
+def stale_note(target: str, **params) -> str:
+    """在计算前调用：依赖图将返回过期结果（同时后台刷新）时，返回提示数据时间的说明，否则返回空串。"""
+    fresh = TABLES.freshness(dc, target, **params)
+    if fresh is None or not fresh.stale:
+        return ""
+    note = f"过期结果（{fresh.age_s / 60:.0f} 分钟前的数据），后台刷新中，再次计算即取新数据"
+    if fresh.error:
+        note += f"（上次刷新失败：{fresh.error}）"
+    return note
+
+
+def with_window_labels(page: pd.DataFrame) -> pd.DataFrame:
+    """表三当前页：命中窗口位掩码转为可读标签，插在第二列。"""
+    page = page.copy()
+    page.insert(1, "命中窗口", page["WINDOWS_HIT"].map(window_labels))
+    return page
+
+
+def source_key() -> tuple:
+    """结果存储键的数据源部分：表服务地址，或本地接口 + 结果容器 + 计算引擎。"""
+    if remote is not None:
+        return ("remote", remote.base_url)
+    return (*dc.cache_namespace, dc.cfg.engine)
+
+
+use_arrow = st.sidebar.toggle(
+    "Arrow 数据管线",
+    value=False,
+    help="接口结果直接解码为 pyarrow.Table，变换使用 Arrow compute，表格不经过 pandas。",
+)
+engine = st.sidebar.selectbox(
+    "计算引擎",
+    list(ENGINES),
+    index=0,
+    help="polars：过滤/合并/去重/交集编译为惰性查询计划，多线程执行（需 pip install polars）。",
+)
+dc = get_datacenter("arrow" if use_arrow else "pandas", engine)
+remote = get_remote_tables()
+if remote is not None:
+    st.sidebar.caption(f"数据源：表服务 {remote.base_url}（表一~表四）")
+
+with st.sidebar.expander("请求调度器状态", expanded=False):
+    st.dataframe(pd.DataFrame(dc.http.stats()).T, use_container_width=True)
+    upstream = dc.http.http.stats()
+    st.caption(
+        f"上游自适应并发上限 {upstream['limit']:.1f}（在途 {upstream['in_flight']}），"
+        f"重试 {upstream['retries']} 次，对冲 {upstream['hedges']} 次（胜出 {upstream['hedge_wins']}）"
+    )
+    stats = RESULTS.stats()
+    st.caption(
+        f"结果缓存（所有会话共享）：{stats['entries']} 项，{stats['used_mb']:.1f} / {stats['budget_mb']:.0f} MB，"
+        f"淘汰 {stats['evictions']} 次"
+    )
+
+# 性能采样（隐藏面板，URL 加 ?debug=1 显示）：开启后对表构建和接口拉取采样，结果写入 .profiles/
+if st.query_params.get("debug"):
+    with st.sidebar.expander("性能采样", expanded=False):
+        profiling.set_enabled(st.toggle("开启采样", value=profiling.is_enabled(), key="profile_on"))
+        runs = list(reversed(profiling.RUNS))
+        if not runs:
+            st.caption("暂无采样记录（开启后操作页面，下次刷新时显示）")
+        else:
+            run = st.selectbox(
+                "采样记录",
+                runs,
+                format_func=lambda r: f"{r.started_at:%H:%M:%S} {r.label}（{r.duration_s:.2f}s，{r.total} 样本）",
+            )
+            st.dataframe(run.top(15), use_container_width=True, hide_index=True)
+            for path in run.paths:
+                st.caption(str(path))
+
+CYCLES = {"近一月": CYCLE_1M, "近三月": CYCLE_3M, "近六月": CYCLE_6M}
+
+
+PREVIEW_ROWS = 20
+
+
+def refresh_all(slots: dict) -> None:
+    """一次计算表一~表四，结果写入各标签页的会话状态（与各自的按钮相同）。
+
+    参数取各标签页控件的当前值（首次打开时为默认值）。本地计算时四张表在依赖图的一次运行中求值：
+    表一/表二/表三的数据源并行拉取，表四直接在表三、表二的结果上求交集，不再拉取，
+    总耗时约等于最慢的一次拉取。表服务模式下表一、表四的请求并行发出，表二/表三按需向表服务读取。
 
-tab1, tab2, tab3, tab4 = st.tabs(["表一：机构调研统计", "表二：机构席位追踪", "表三：机构买卖每日统计", "表四：表三 ∩ 表二"])
+    每张表完成时（在完成回调里）立即把按当前参数得到的结果前几行画到该标签页顶部的占位 `slots[标签]`，
+    不必等其余的表；全部完成后各标签页按新的会话状态正常显示。
+    """
+    ss = st.session_state
+    range_type = RANGE_1W if ss.get("t1_range_opt", "近一周") == "近一周" else RANGE_1M
+    t1_size, t2_size, t3_size = (ss.get(k, 500) for k in ("t1_pagesize", "t2_pagesize", "t3_pagesize"))
+    cycle_label = ss.get("t4_cycle", "近一月")
+    t4_params = (
+        cycle_label, ss.get("t4_t3_ratio", "RATIO"), ss.get("t4_t3_threshold", 10.0), ss.get("t4_t2_k", 10),
+        ss.get("t4_t2_netbuy", "NET_BUY_AMT"), ss.get("t4_t2_buycnt", "BUY_TIMES"), ss.get("t4_key", "SECURITY_CODE"),
+        ss.get("t4_pagesize", 500),
+    )
+    t4_kwargs = dict(
+        zip(("ratio_col", "threshold", "k", "netbuy_col", "buycnt_col", "key_col", "page_size"), t4_params[1:]),
+        cycle=CYCLES[cycle_label].code,
+    )
+    # 标签 -> (依赖图节点及参数, RESULTS 键)；RESULTS 键与各标签页按钮使用的相同
+    jobs = {
+        "表一": (
+            ("t1", {"days": range_type.days_back, "page_size": t1_size, "engine": dc.cfg.engine}),
+            ("t1", source_key(), range_type.label, t1_size),
+        ),
+        "表二": (("seat_panel", {"page_size": t2_size}), ("t2_panel", source_key(), t2_size)),
+        "表三": (("trade_history", {"page_size": t3_size}), ("t3_index", source_key(), t3_size)),
+        "表四": (("t4", {**t4_kwargs, "engine": dc.cfg.engine}), ("t4", source_key(), *t4_params)),
+    }
+    started = time.perf_counter()
+    timings = {}
+
+    def done(label: str, ref, status) -> None:
+        timings[label] = time.perf_counter() - started
+        value = RESULTS.get(ref) if ref != "remote" else None
+        table = None  # 该标签页按当前参数显示的表（表服务模式下表二/表三为 None）
+        if label == "表一":
+            ss.t1_raw, ss.t1_range = ref, range_type.label
+            rows = f"{len(value)} 只股票"
+            range_opt = ss.get("t1_range_opt", "近一周")
+            table = filter_survey_sum(value, ss.get(f"t1_sum_threshold_{range_opt}", 50 if range_opt == "近一周" else 200))
+        elif label == "表二":
+            ss.t2_panel = ref
+            rows = "按需读取" if value is None else f"{len(value.index(CYCLES['近一月']))} 只股票（近一月快照）"
+            if value is not None:
+                table = seat_topk_from_index(
+                    value.index(CYCLES[ss.get("t2_cycle", "近一月")]), k=ss.get("t2_k", 10),
+                    netbuy_col=ss.get("t2_netbuy", "NET_BUY_AMT"), buycnt_col=ss.get("t2_buycnt", "BUY_TIMES"),
+                    key_col=ss.get("t2_key", "SECURITY_CODE"), engine=dc.cfg.engine,
+                )[2]
+        elif label == "表三":
+            ss.t3_index, ss.t3_note = ref, ""
+            rows = "按需读取" if value is None else f"{len(value.df)} 行明细"
+            if value is not None:
+                ratio_col, threshold = ss.get("t3_ratio", "RATIO"), ss.get("t3_threshold", 10.0)
+                # 与标签页相同的 render_once 键：标签页随后直接复用这次聚合
+                table, _ = render_once(
+                    "t3_result",
+                    (value, ratio_col, threshold, dc.cfg.engine),
+                    lambda: aggregate_trade_windows(value.df, ratio_col=ratio_col, threshold=threshold, engine=dc.cfg.engine),
+                )
+        else:
+            fp = fingerprint(value)
+            ss.t4_meta = f"表二周期：{cycle_label} | 交集行数：{len(value)} | 一键计算（{timings[label]:.2f}s）"
+            if ss.get("t4_fp") == fp:
+                ss.t4_meta += " | 数据与上次相同"
+            ss.t4_fp, ss.t4_data = fp, ref if len(value) > 0 else None
+            rows = f"{len(value)} 行"
+            table = value
+        status.write(f"✓ {label}：{rows}，{timings[label]:.2f}s")
+        with slots[label].container():
+            st.success(f"一键计算：{label}已完成（{rows}，{timings[label]:.2f}s），其余表完成后显示完整视图")
+            if table is not None and len(table) > 0:
+                st.caption(f"前 {min(PREVIEW_ROWS, len(table))} 行（共 {len(table)} 行）")
+                preview = take_page(table, np.arange(min(PREVIEW_ROWS, len(table))), 1, PREVIEW_ROWS)
+                st.dataframe(preview, use_container_width=True, column_config=HIDDEN_COLUMNS, hide_index=True)
+
+    with st.status("正在并行计算表一~表四...", expanded=True) as status:
+        try:
+            if remote is not None:
+                ss.t2_panel = ss.t3_index = "remote"
+                builds = {
+                    "表一": partial(remote.table, "t1", days=range_type.days_back, page_size=t1_size),
+                    "表四": partial(remote.table, "t4", **t4_kwargs),
+                }
+                with ThreadPoolExecutor(max_workers=len(builds)) as pool:
+                    futures = {pool.submit(RESULTS.put, jobs[label][1], build): label for label, build in builds.items()}
+                    for fut in as_completed(futures):
+                        done(futures[fut], fut.result(), status)
+            else:
+                # 依赖图求值的表：结果已在图的缓存中，RESULTS.put 的构建只是一次命中
+                TABLES.compute_many(
+                    dc,
+                    {label: target for label, (target, _) in jobs.items()},
+                    on_ready=lambda label, _: done(
+                        label, RESULTS.put(jobs[label][1], partial(TABLES.compute, dc, jobs[label][0][0], **jobs[label][0][1])), status
+                    ),
+                )
+        except Exception as e:
+            status.update(label="计算失败", state="error")
+            st.error(f"计算失败：{e}")
+            return
+        total = time.perf_counter() - started
+        status.update(label=f"表一~表四已完成，总耗时 {total:.2f}s", state="complete", expanded=False)
+    ss.all_timings = (timings, total, dict(TABLES.last_run.get("seconds", {})) if remote is None else {})
+
+
+with st.sidebar:
+    run_all = st.button("一键计算全部表", key="all_run", help="并行拉取表一/表二/表三的数据，表四由表三、表二直接求交集，参数取各标签页当前设置")
+    all_progress = st.container()
+
+tab1, tab2, tab3, tab4, tab5, tab_sql = st.tabs(
+    ["表一：机构调研统计", "表二：机构席位追踪", "表三：机构买卖每日统计", "表四：表三 ∩ 表二", "表五：资金滚动分析", "SQL 查询（本地快照）"]
+)
+
+if run_all:
+    # 各标签页顶部的占位：每张表一完成就画进去，全部完成后清空，由下面的正常视图接替
+    slots = {label: tab.empty() for label, tab in zip(("表一", "表二", "表三", "表四"), (tab1, tab2, tab3, tab4))}
+    with all_progress:
+        refresh_all(slots)
+    for slot in slots.values():
+        slot.empty()
+if st.session_state.get("all_timings"):
+    timings, total, nodes = st.session_state.all_timings
+    caption = "上次一键计算：" + "，".join(f"{label} {s:.2f}s" for label, s in timings.items()) + f"；总耗时 {total:.2f}s"
+    if nodes:  # 各节点耗时之和，即逐个串行计算所需的时间
+        caption += f"（各节点耗时合计 {sum(nodes.values()):.2f}s）"
+    all_progress.caption(caption)
 
 # -------------------
 # 表一：机构调研统计
@@ -30,9 +295,9 @@ with tab1:
     
     colA, colB, colC = st.columns(3)
     with colA:
-        range_opt = st.selectbox("时间范围", ["近一周", "近一月"], index=0)
+        range_opt = st.selectbox("时间范围", ["近一周", "近一月"], index=0, key="t1_range_opt")
     with colB:
-        page_size = st.slider("pageSize", 10, 200, 50, step=10)
+        page_size = st.slider("pageSize（分页拉取整个窗口）", 50, 500, 500, step=50, key="t1_pagesize")
     with colC:
         # 根据时间范围设置默认阈值：近一周默认50，近一月默认200
         # 使用组合key，使每个时间范围有独立的阈值设置
@@ -53,45 +318,43 @@ with tab1:
     range_type = RANGE_1W if range_opt == "近一周" else RANGE_1M
 
     # 初始化 session_state
-    if 't1_data' not in st.session_state:
-        st.session_state.t1_data = None
-    if 't1_meta' not in st.session_state:
-        st.session_state.t1_meta = None
+    # t1_raw 是整个窗口聚合结果在 RESULTS 中的引用；SUM阈值在每次rerun时于内存中过滤，无需重新拉取
+    if 't1_raw' not in st.session_state:
+        st.session_state.t1_raw = None
+    if 't1_range' not in st.session_state:
+        st.session_state.t1_range = None
 
     if st.button("拉取表一数据", key="t1_fetch"):
-        with st.spinner("正在获取数据..."):
-            df = get_survey_data(dc, range_type=range_type, page_size=page_size)
-        
-        # 按SUM阈值过滤
-        if len(df) > 0 and 'SUM' in df.columns:
-            df_filtered = df[df['SUM'] > sum_threshold].copy()
-            meta_text = f"原始返回行数：{len(df)}；过滤后行数：{len(df_filtered)}（SUM > {sum_threshold}）；时间范围：{range_type.label}"
-            
-            if len(df_filtered) > 0:
-                # 格式化金额字段为万元
-                df_display = format_amount_to_wan(df_filtered)
-                st.session_state.t1_data = df_display
-                st.session_state.t1_meta = meta_text
-            else:
-                st.session_state.t1_data = None
-                st.session_state.t1_meta = meta_text
-                st.info(f"未找到SUM > {sum_threshold}的数据")
-        else:
-            meta_text = f"返回行数：{len(df)}；时间范围：{range_type.label}"
-            if len(df) > 0:
-                # 格式化金额字段为万元
-                df_display = format_amount_to_wan(df)
-                st.session_state.t1_data = df_display
-                st.session_state.t1_meta = meta_text
-            else:
-                st.session_state.t1_data = None
-                st.session_state.t1_meta = meta_text
-                st.info("未获取到数据")
+        with st.spinner("正在分页拉取整个时间窗口并按股票聚合..."):
+            try:
+                if remote is not None:
+                    build = partial(remote.table, "t1", days=range_type.days_back, page_size=page_size)
+                else:
+                    # 与一键计算同一个构建：依赖图上的 t1 节点（按当前计算引擎聚合）
+                    build = partial(
+                        TABLES.compute, dc, "t1", days=range_type.days_back, page_size=page_size, engine=dc.cfg.engine
+                    )
+                st.session_state.t1_raw = RESULTS.put(("t1", source_key(), range_type.label, page_size), build)
+                st.session_state.t1_range = range_type.label
+            except Exception as e:
+                st.error(f"获取数据失败：{e}")
+                st.stop()
 
     # 显示已保存的数据（如果有）
-    if st.session_state.t1_data is not None:
-        st.write(st.session_state.t1_meta)
-        st.dataframe(st.session_state.t1_data, use_container_width=True)
+    if st.session_state.t1_raw is not None:
+        df = RESULTS.get(st.session_state.t1_raw)
+        df_filtered = filter_survey_sum(df, sum_threshold)
+        st.write(
+            f"窗口内股票数：{len(df)}；过滤后行数：{len(df_filtered)}（SUM > {sum_threshold}）；"
+            f"时间范围：{st.session_state.t1_range}"
+        )
+        if len(df_filtered) > 0:
+            # 服务端分页：只格式化并发送当前页
+            paged_table(df_filtered, key="t1_view", export_name="t1")
+        elif len(df) > 0:
+            st.info(f"未找到SUM > {sum_threshold}的数据")
+        else:
+            st.info("未获取到数据")
 
 # -------------------
 # 表二：机构席位追踪（Top10交集）
@@ -100,14 +363,14 @@ with tab2:
     st.subheader("表二：机构席位追踪（TopK 交集）")
     st.caption("计算方式：TopK by 净买额 ∩ TopK by 买入次数")
     
-    cycles = {"近一月": CYCLE_1M, "近三月": CYCLE_3M, "近六月": CYCLE_6M}
+    cycles = CYCLES
     c1, c2, c3 = st.columns(3)
     with c1:
-        cycle_label = st.selectbox("统计周期", list(cycles.keys()), index=0)
+        cycle_label = st.selectbox("统计周期", list(cycles.keys()), index=0, key="t2_cycle")
     with c2:
-        k = st.slider("TopK", 5, 50, 10)
+        k = st.slider("TopK", 5, 50, 10, key="t2_k")
     with c3:
-        page_size = st.slider("pageSize", 10, 200, 50, step=10, key="t2_pagesize")
+        page_size = st.slider("pageSize（分页拉取全量）", 50, 500, 500, step=50, key="t2_pagesize")
 
     # 默认字段名（已通过API验证）
     col_netbuy = "NET_BUY_AMT"
@@ -121,101 +384,144 @@ with tab2:
         key_col = st.text_input("交集键（股票代码字段）", value=key_col, key="t2_key")
 
     # 初始化 session_state
-    if 't2_data' not in st.session_state:
-        st.session_state.t2_data = None  # 存储 (top10_netbuy, top10_buycnt, inter) 的元组
-    if 't2_meta' not in st.session_state:
-        st.session_state.t2_meta = None
+    # t2_panel 是全部周期快照排名索引在 RESULTS 中的引用；周期/TopK变化只在索引上切片，无需重新拉取
+    if 't2_panel' not in st.session_state:
+        st.session_state.t2_panel = None
 
     if st.button("计算 TopK 交集", key="t2_run"):
-        with st.spinner("正在计算..."):
+        with st.spinner("正在并行拉取全部统计周期的全量快照并建立排名索引..."):
             try:
-                top10_netbuy, top10_buycnt, inter = get_seat_topk_intersection(
-                    dc,
-                    cycle=cycles[cycle_label],
+                # 表服务模式下只记录“已请求”，每次rerun按当前参数向表服务取结果（ETag未变时不传输数据）
+                st.session_state.t2_panel = "remote" if remote is not None else RESULTS.put(
+                    ("t2_panel", source_key(), page_size), partial(TABLES.compute, dc, "seat_panel", page_size=page_size)
+                )
+            except Exception as e:
+                st.error(f"计算失败：{e}")
+                st.stop()
+
+    # 显示已保存的数据（如果有）
+    if st.session_state.t2_panel is not None:
+        try:
+            if remote is not None:
+                params = dict(
+                    cycle=cycles[cycle_label].code, k=k, netbuy_col=col_netbuy, buycnt_col=col_buycnt,
+                    key_col=key_col, page_size=page_size,
+                )
+                top10_netbuy, top10_buycnt, inter = (
+                    remote.table("t2", part=part, **params) for part in ("netbuy", "buycnt", "inter")
+                )
+                snapshot_rows = "—"
+            else:
+                seat_index = RESULTS.get(st.session_state.t2_panel).index(cycles[cycle_label])
+                top10_netbuy, top10_buycnt, inter = seat_topk_from_index(
+                    seat_index,
                     k=k,
                     netbuy_col=col_netbuy,
                     buycnt_col=col_buycnt,
                     key_col=key_col,
-                    page_size=page_size,
+                    engine=dc.cfg.engine,
                 )
-            except Exception as e:
-                st.error(f"计算失败：{e}")
-                st.stop()
+                snapshot_rows = len(seat_index)
+        except Exception as e:
+            st.error(f"计算失败：{e}")
+            st.stop()
 
-        meta_text = f"统计周期：{cycle_label} | TopK：{k}"
-        st.session_state.t2_data = (
-            format_amount_to_wan(top10_netbuy),
-            format_amount_to_wan(top10_buycnt),
-            format_amount_to_wan(inter),
-        )
-        st.session_state.t2_meta = meta_text
+        st.write(f"统计周期：{cycle_label} | TopK：{k} | 快照股票数：{snapshot_rows}")
+
+        top10_netbuy = format_amount_to_wan(top10_netbuy)
+        top10_buycnt = format_amount_to_wan(top10_buycnt)
+        inter = format_amount_to_wan(inter)
 
-    # 显示已保存的数据（如果有）
-    if st.session_state.t2_data is not None:
-        top10_netbuy, top10_buycnt, inter = st.session_state.t2_data
-        st.write(st.session_state.t2_meta)
-        
         cA, cB, cC = st.columns(3)
         with cA:
             st.markdown(f"**Top{len(top10_netbuy)} by 净买额** ({len(top10_netbuy)} 行)")
-            st.dataframe(top10_netbuy, use_container_width=True, height=320)
+            st.dataframe(top10_netbuy, use_container_width=True, column_config=HIDDEN_COLUMNS, height=320)
         with cB:
             st.markdown(f"**Top{len(top10_buycnt)} by 买入次数** ({len(top10_buycnt)} 行)")
-            st.dataframe(top10_buycnt, use_container_width=True, height=320)
+            st.dataframe(top10_buycnt, use_container_width=True, column_config=HIDDEN_COLUMNS, height=320)
         with cC:
             st.markdown(f"**交集结果** ({len(inter)} 行)")
-            st.dataframe(inter, use_container_width=True, height=320)
+            st.dataframe(inter, use_container_width=True, column_config=HIDDEN_COLUMNS, height=320)
+
+        with st.expander("跨周期持续性（各周期的值与排名）", expanded=False):
+            if remote is not None:
+                st.info("表服务模式下不提供（需要本地席位面板）")
+            else:
+                persistence = RESULTS.get(st.session_state.t2_panel).persistence(
+                    k=k, netbuy_col=col_netbuy, buycnt_col=col_buycnt
+                )
+                if len(persistence) > 0:
+                    persistence = persistence[persistence["T2_CYCLES"] > 0]
+                st.write(f"至少在一个周期进入表二交集的股票：{len(persistence)}")
+                st.dataframe(format_amount_to_wan(persistence), use_container_width=True, column_config=HIDDEN_COLUMNS)
 
 # -------------------
 # 表三：机构买卖每日统计（多窗口去重合并）
 # -------------------
 with tab3:
     st.subheader("表三：机构买卖每日统计（净买额占比 > 阈值）")
-    st.caption("从 {today, 3d, 5d, 10d, 1m} 所有窗口内找出满足条件的股票，去重合并为一个表")
+    st.caption("一次拉取近20个交易日明细，在 {today, 3d, 5d, 10d, 1m}（按交易日计）窗口上做一次聚合：每只股票一行，含命中窗口、最大/最新占比、净买额合计、首末交易日")
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        threshold = st.slider("净买额占总成交额占比阈值（%）", 0.0, 50.0, 10.0, step=0.5)
+        threshold = st.slider("净买额占总成交额占比阈值（%）", 0.0, 50.0, 10.0, step=0.5, key="t3_threshold")
     with col2:
-        page_size = st.slider("pageSize", 10, 200, 50, step=10, key="t3_pagesize")
+        page_size = st.slider("pageSize（分页拉取全量）", 50, 500, 500, step=50, key="t3_pagesize")
     with col3:
         ratio_col = st.text_input("占比字段名", value="RATIO", key="t3_ratio")
 
     # 初始化 session_state
-    if 't3_data' not in st.session_state:
-        st.session_state.t3_data = None
-    if 't3_meta' not in st.session_state:
-        st.session_state.t3_meta = None
+    # t3_index 是最宽窗口明细排名索引在 RESULTS 中的引用；阈值滑块变化只在内存中重新聚合，无需重新拉取
+    if 't3_index' not in st.session_state:
+        st.session_state.t3_index = None
+        st.session_state.t3_note = ""
 
     if st.button("生成表三", key="t3_run"):
-        with st.spinner("正在从所有窗口获取数据并去重合并..."):
+        with st.spinner("正在拉取近一月明细并建立排名索引..."):
             try:
-                df = get_trade_netbuy_ratio_filtered(
-                    dc,
-                    ratio_col=ratio_col,
-                    threshold=threshold,
-                    page_size=page_size,
+                # 经依赖图的明细节点：数据过期时先返回上次的结果，后台刷新
+                st.session_state.t3_note = "" if remote is not None else stale_note("trade_history", page_size=page_size)
+                st.session_state.t3_index = "remote" if remote is not None else RESULTS.put(
+                    ("t3_index", source_key(), page_size), partial(TABLES.compute, dc, "trade_history", page_size=page_size)
                 )
             except Exception as e:
                 st.error(f"获取数据失败：{e}")
                 st.stop()
 
-        meta_text = f"去重后行数：{len(df)}（从所有窗口合并，阈值 > {threshold}%）"
+    # 显示已保存的数据（如果有）
+    if st.session_state.t3_index is not None:
+        try:
+            if remote is not None:
+                df = remote.table("t3", ratio_col=ratio_col, threshold=threshold, page_size=page_size)
+            else:
+                # 明细（按指纹）与参数都没变时，直接复用上次的聚合结果
+                t3_index = RESULTS.get(st.session_state.t3_index)
+                df, _ = render_once(
+                    "t3_result",
+                    (t3_index, ratio_col, threshold, dc.cfg.engine),
+                    lambda: aggregate_trade_windows(t3_index.df, ratio_col=ratio_col, threshold=threshold, engine=dc.cfg.engine),
+                )
+        except Exception as e:
+            st.error(f"计算失败：{e}")
+            st.stop()
+
+        st.write(f"股票数：{len(df)}（所有窗口聚合，阈值 > {threshold}%）")
+        if st.session_state.t3_note:
+            st.caption(st.session_state.t3_note)
+        if remote is None:
+            export_controls(t3_index.df, "history", key="t3_history", label="导出近20个交易日明细（表三的数据来源）")
+        with st.expander("股票数 vs 阈值曲线", expanded=False):
+            if remote is not None:
+                st.info("表服务模式下不提供（需要本地明细索引）")
+            else:
+                curve = trade_threshold_curve(t3_index, ratio_col=ratio_col, thresholds=[x / 2 for x in range(0, 101)])
+                st.line_chart(curve, x="threshold", y="count")
         if len(df) > 0:
-            # 格式化金额字段为万元
-            df_display = format_amount_to_wan(df)
-            st.session_state.t3_data = df_display
-            st.session_state.t3_meta = meta_text
+            # 服务端分页；命中窗口位掩码只对当前页转为可读标签
+            paged_table(df, key="t3_view", decorate=with_window_labels, export_name="t3")
         else:
-            st.session_state.t3_data = None
-            st.session_state.t3_meta = meta_text
             st.info("未找到满足条件的数据")
 
-    # 显示已保存的数据（如果有）
-    if st.session_state.t3_data is not None:
-        st.write(st.session_state.t3_meta)
-        st.dataframe(st.session_state.t3_data, use_container_width=True)
-
 # -------------------
 # 表四：表三 ∩ 表二
 # -------------------
@@ -223,13 +529,13 @@ with tab4:
     st.subheader("表四：表三 ∩ 表二")
     st.caption("表三（所有窗口的过滤结果）∩ 表二（对应周期的TopK交集）")
 
-    cycles = {"近一月": CYCLE_1M, "近三月": CYCLE_3M, "近六月": CYCLE_6M}
+    cycles = CYCLES
     
     col1, col2 = st.columns(2)
     with col1:
         cycle_label = st.selectbox("表二周期", list(cycles.keys()), index=0, key="t4_cycle")
     with col2:
-        page_size = st.slider("pageSize", 10, 200, 50, step=10, key="t4_pagesize")
+        page_size = st.slider("pageSize（分页拉取全量）", 50, 500, 500, step=50, key="t4_pagesize")
 
     # 表三的参数
     with st.expander("表三参数配置", expanded=False):
@@ -244,6 +550,7 @@ with tab4:
         key_col = st.text_input("交集键（股票代码字段）", value="SECURITY_CODE", key="t4_key")
 
     # 初始化 session_state
+    # t4_data 是表四在 RESULTS 中的引用（被淘汰时按参数重新计算）；展示时服务端分页
     if 't4_data' not in st.session_state:
         st.session_state.t4_data = None
     if 't4_meta' not in st.session_state:
@@ -252,26 +559,54 @@ with tab4:
     if st.button("计算表四（交集）", key="t4_run"):
         with st.spinner("正在计算表三和表二，并求交集..."):
             try:
-                df = get_trade_x_seat_intersection(
-                    dc,
-                    cycle=cycles[cycle_label],
-                    t3_ratio_col=t3_ratio_col,
-                    t3_threshold=t3_threshold,
-                    t2_k=t2_k,
-                    t2_netbuy_col=t2_netbuy_col,
-                    t2_buycnt_col=t2_buycnt_col,
-                    key_col=key_col,
-                    page_size=page_size,
+                if remote is not None:
+                    build = partial(
+                        remote.table,
+                        "t4", cycle=cycles[cycle_label].code, ratio_col=t3_ratio_col, threshold=t3_threshold,
+                        k=t2_k, netbuy_col=t2_netbuy_col, buycnt_col=t2_buycnt_col, key_col=key_col,
+                        page_size=page_size,
+                    )
+                else:
+                    build = partial(
+                        get_trade_x_seat_intersection,
+                        dc,
+                        cycle=cycles[cycle_label],
+                        t3_ratio_col=t3_ratio_col,
+                        t3_threshold=t3_threshold,
+                        t2_k=t2_k,
+                        t2_netbuy_col=t2_netbuy_col,
+                        t2_buycnt_col=t2_buycnt_col,
+                        key_col=key_col,
+                        page_size=page_size,
+                    )
+                note = "" if remote is not None else stale_note(
+                    "t4", cycle=cycles[cycle_label].code, ratio_col=t3_ratio_col, threshold=t3_threshold, k=t2_k,
+                    netbuy_col=t2_netbuy_col, buycnt_col=t2_buycnt_col, key_col=key_col, page_size=page_size,
+                    engine=dc.cfg.engine,
                 )
+                t4_params = (cycle_label, t3_ratio_col, t3_threshold, t2_k, t2_netbuy_col, t2_buycnt_col, key_col, page_size)
+                t4_ref = RESULTS.put(("t4", source_key(), *t4_params), build)
+                df = RESULTS.get(t4_ref)
             except Exception as e:
                 st.error(f"计算失败：{e}")
                 st.stop()
 
         meta_text = f"表二周期：{cycle_label} | 交集行数：{len(df)}"
+        if remote is None:
+            run = TABLES.last_run
+            meta_text += (
+                f" | 依赖图：计算 {len(run['computed'])} 个节点（其中 {len(run['unchanged'])} 个输入未变直接复用），"
+                f"复用 {len(run['reused'])} 个"
+            )
+            if note:
+                meta_text += f" | {note}"
         if len(df) > 0:
-            # 格式化金额字段为万元
-            df_display = format_amount_to_wan(df)
-            st.session_state.t4_data = df_display
+            # 结果与上次相同（指纹一致）时提示
+            fp = fingerprint(df)
+            if st.session_state.get("t4_fp") == fp:
+                meta_text += " | 数据与上次相同"
+            st.session_state.t4_fp = fp
+            st.session_state.t4_data = t4_ref
             st.session_state.t4_meta = meta_text
         else:
             st.session_state.t4_data = None
@@ -281,4 +616,162 @@ with tab4:
     # 显示已保存的数据（如果有）
     if st.session_state.t4_data is not None:
         st.write(st.session_state.t4_meta)
-        st.dataframe(st.session_state.t4_data, use_container_width=True)
+        paged_table(RESULTS.get(st.session_state.t4_data), key="t4_view", export_name="t4")
+
+    # 增量刷新：保存表三达标状态和表二TopK集合，只拉取最新交易日的明细并重算受影响的股票
+    with st.expander("增量刷新（只显示进出表四的股票）", expanded=False):
+        inc_params = (cycle_label, t3_ratio_col, t3_threshold, t2_k, t2_netbuy_col, t2_buycnt_col, key_col, page_size)
+        if "t4_inc" not in st.session_state or st.session_state.get("t4_inc_params") != inc_params:
+            st.session_state.t4_inc = None
+        if st.button("增量刷新", key="t4_inc_run"):
+            with st.spinner("正在拉取增量数据..."):
+                try:
+                    if st.session_state.t4_inc is None:
+                        st.session_state.t4_inc = IncrementalT4.from_datacenter(
+                            dc, cycles[cycle_label], page_size=page_size,
+                            ratio_col=t3_ratio_col, threshold=t3_threshold, k=t2_k,
+                            netbuy_col=t2_netbuy_col, buycnt_col=t2_buycnt_col, key_col=key_col,
+                        )
+                        st.session_state.t4_inc_params = inc_params
+                    change = st.session_state.t4_inc.refresh(dc, cycles[cycle_label], page_size=page_size)
+                except Exception as e:
+                    st.error(f"增量刷新失败：{e}")
+                    st.stop()
+            inc = st.session_state.t4_inc
+            st.write(
+                f"当前表四行数：{len(inc.table())} | 重新判断 {change.affected} 只股票 | "
+                f"新进入 {len(change.added)} 只，移出 {len(change.removed)} 只"
+            )
+            if not change.added.empty:
+                st.write("新进入：")
+                st.dataframe(format_amount_to_wan(change.added), use_container_width=True, column_config=HIDDEN_COLUMNS)
+            if not change.removed.empty:
+                st.write("移出：")
+                st.dataframe(format_amount_to_wan(change.removed), use_container_width=True, column_config=HIDDEN_COLUMNS)
+
+
+# -------------------
+# 表五：资金滚动分析
+# -------------------
+with tab5:
+    st.subheader("表五：机构资金滚动分析（每只股票：窗口净买额合计 / 最大占比 / 上榜天数）")
+    st.caption("只拉取一次日度明细，任意窗口组合都在 日期×股票 网格上用累加和差分一次算出。窗口按自然日计（周末、节假日也占天数），与表三按交易日计的窗口不同。")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        history_days = st.selectbox("历史长度（自然日）", [30, 60, 90], index=0, key="t5_days")
+    with col2:
+        windows_text = st.text_input("窗口（自然日，逗号分隔；0=当天）", value="0,3,5,10,30", key="t5_windows")
+
+    try:
+        window_days = sorted({int(x) for x in windows_text.replace("，", ",").split(",") if x.strip()})
+    except ValueError:
+        st.error("窗口格式错误，请输入逗号分隔的整数")
+        st.stop()
+    window_days = [d for d in window_days if 0 <= d <= history_days]
+    windows = [(f"{d}d", d) for d in window_days]
+
+    if "t5_grid" not in st.session_state:
+        st.session_state.t5_grid = None
+
+    if st.button("拉取日度明细", key="t5_run"):
+        with st.spinner("正在分页拉取机构买卖每日明细..."):
+            try:
+                st.session_state.t5_grid = RESULTS.put(
+                    ("t5_grid", source_key(), history_days), partial(get_flow_grid, dc, days=history_days)
+                )
+            except Exception as e:
+                st.error(f"计算失败：{e}")
+                st.stop()
+
+    grid = RESULTS.get(st.session_state.t5_grid)
+    if grid is not None and windows:
+        if grid.empty:
+            st.info("没有日度明细数据")
+        else:
+            snap = grid.snapshot(windows)
+            st.write(f"上榜股票数：{len(snap)} | 日期范围：{grid.dates[0]:%Y-%m-%d} ~ {grid.dates[-1]:%Y-%m-%d}")
+            st.dataframe(format_amount_to_wan(snap), use_container_width=True, column_config=HIDDEN_COLUMNS)
+
+            if len(snap) > 0:
+                code = st.selectbox("单只股票的滚动序列", snap["SECURITY_CODE"].tolist(), key="t5_code")
+                metric = st.radio("指标", ["NET_BUY_AMT", "MAX_RATIO", "DAYS_ON_LIST"], horizontal=True, key="t5_metric")
+                st.line_chart(grid.series(code, windows, metric=metric))
+
+# -------------------
+# SQL 查询（DuckDB，本地快照）
+# -------------------
+with tab_sql:
+    st.subheader("SQL 查询（DuckDB，本地快照）")
+    st.caption(
+        "先同步：把各报表最宽的时间窗口拉到本地 Parquet 快照；之后的查询都在本地列式数据上执行，不再请求接口。"
+        "可用视图：survey / trade / seat（最新快照），*_snapshots（全部快照）；"
+        "表宏：t1(days, threshold) / t2(cycle, k) / t3(threshold) / t4(cycle, k, threshold)。"
+    )
+
+    try:
+        ql = get_query_layer()
+    except ImportError as e:
+        st.info(str(e))
+        st.stop()
+
+    if st.button("同步快照到本地", key="sql_sync"):
+        with st.spinner("正在拉取各报表快照..."):
+            try:
+                rows = sync_snapshots(dc, ql.store)
+            except Exception as e:
+                st.error(f"同步失败：{e}")
+                st.stop()
+        ql.refresh()
+        st.success("已同步：" + "，".join(f"{k} {v} 行" for k, v in rows.items()))
+
+    st.write(" | ".join(f"{v}：{d.isoformat() if d else '无快照'}" for v, d in ql.latest_snapshots().items()))
+
+    sql = st.text_area(
+        "SQL",
+        value="SELECT * FROM t4(cycle := '02', k := 10, threshold := 10.0)",
+        height=140,
+        key="sql_text",
+    )
+    if st.button("执行查询", key="sql_run"):
+        try:
+            # 只接受一条只读 SELECT / WITH；行数和执行时间有上限，只能读取快照目录
+            st.session_state.sql_result = RESULTS.put(("sql", sql), partial(ql.read_query, sql))
+        except Exception as e:
+            st.session_state.sql_result = None
+            st.error(f"查询失败：{e}")
+
+    if st.session_state.get("sql_result") is not None:
+        result, truncated = RESULTS.get(st.session_state.sql_result)
+        st.write(f"结果行数：{len(result)}")
+        if truncated:
+            st.warning(f"结果超过 {len(result)} 行，只保留前 {len(result)} 行，请在 SQL 中加筛选或 LIMIT")
+        paged_table(result, key="sql_view", export_name="sql")
+
+    # 快照差异：按行内容哈希比较最近两次快照，有业务主键的报表区分“变化”与“新增/删除”
+    with st.expander("快照差异（最近两次快照）", expanded=False):
+        diff_targets = {
+            "survey": (SURVEY, {}),
+            "trade": (TRADE, {}),
+            "seat 近一月": (SEAT, {"STATISTICSCYCLE": CYCLE_1M.code}),
+            "seat 近三月": (SEAT, {"STATISTICSCYCLE": CYCLE_3M.code}),
+            "seat 近六月": (SEAT, {"STATISTICSCYCLE": CYCLE_6M.code}),
+        }
+        target = st.selectbox("报表", list(diff_targets), key="diff_report")
+        report, parts = diff_targets[target]
+        dates = ql.store.snapshot_dates(report, **parts)
+        if len(dates) < 2:
+            st.info("至少需要两次快照（不同日期）才能比较")
+        else:
+            prev, last = dates[-2], dates[-1]
+            diff = diff_frames(
+                ql.store.read(report, prev, **parts), ql.store.read(report, last, **parts), key=REPORT_KEYS[report]
+            )
+            st.write(
+                f"{prev.isoformat()} → {last.isoformat()}：新增 {len(diff.added)} 行，删除 {len(diff.removed)} 行，"
+                f"变化 {len(diff.changed)} 行，未变 {diff.unchanged} 行"
+            )
+            for label, frame in (("新增", diff.added), ("变化（新值）", diff.changed), ("删除", diff.removed)):
+                if len(frame) > 0:
+                    st.markdown(f"**{label}**")
+                    st.dataframe(format_amount_to_wan(frame), use_container_width=True, column_config=HIDDEN_COLUMNS)
@@ -3,6 +3,10 @@
 from __future__ import annotations
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..transforms import _arrow
 
 
 # 金额字段的模式（用于识别需要转换的列）
@@ -11,6 +15,25 @@ AMOUNT_COLUMN_PATTERNS = [
     'AMOUNT',
 ]
 
+# 内部字段：展示时隐藏（传给 st.dataframe 的 column_config）
+HIDDEN_COLUMNS = {
+    'SECURITY_ID': None,  # securities.SecurityDictionary 分配的整数ID
+}
+
+
+def _is_amount_col(col: str) -> bool:
+    col_upper = col.upper()
+    return any(pattern in col_upper for pattern in AMOUNT_COLUMN_PATTERNS)
+
+
+def _format_amount_to_wan_arrow(table: pa.Table) -> pa.Table:
+    """format_amount_to_wan 的 Arrow 版本：逐列计算，不经过pandas。"""
+    for i, col in enumerate(table.column_names):
+        if _is_amount_col(col):
+            wan = pc.divide(_arrow.numeric(table.column(i)), 10000.0)
+            table = table.set_column(i, f"{col}(万元)", wan)
+    return table
+
 
 def format_amount_to_wan(df: pd.DataFrame) -> pd.DataFrame:
     """将DataFrame中所有金额字段从"元"转换为"万元"
@@ -19,11 +42,13 @@ def format_amount_to_wan(df: pd.DataFrame) -> pd.DataFrame:
     同时更新列名，添加"(万元)"后缀以明确单位。
     
     Args:
-        df: 原始DataFrame
+        df: 原始DataFrame（也接受pyarrow.Table，结果仍为Table）
         
     Returns:
         格式化后的DataFrame（金额字段已转换为万元，列名已更新）
     """
+    if _arrow.is_arrow(df):
+        return _format_amount_to_wan_arrow(df)
     if df.empty:
         return df
     
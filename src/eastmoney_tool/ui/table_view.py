@@ -0,0 +1,218 @@
+"""服务端分页表格：结果留在服务端，每次只把当前页发送到浏览器。
+
+`st.dataframe(整张表)` 在每次 rerun 时都会格式化并序列化全部行，行数上万后明显变慢。
+这里的做法是：
+  - 筛选（代码/名称包含）和排序在服务端对缓存的结果进行，只得到行号数组；
+    行号按（结果指纹、筛选、排序）存入 RESULTS，翻页时直接复用
+  - 只取当前页的行，金额换算为万元也只作用于这一页
+  - 顶部的汇总（行数、各金额列合计）在筛选后的全部行上计算，与当前页无关
+浏览器收到的数据量和渲染时间只与每页行数有关，与结果大小无关。
+pandas.DataFrame 和 pyarrow.Table 都支持。
+
+`export_controls` 提供 CSV / Parquet / XLSX 导出：从缓存结果分块写入临时文件（见 export.py），
+不在内存中生成整份文件；同一结果、同一格式的文件复用。
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from ..export import FORMATS, write_export
+from ..fingerprint import fingerprint
+from ..results import RESULTS
+from ..transforms import _arrow
+from .formatting import HIDDEN_COLUMNS, _is_amount_col, format_amount_to_wan
+
+# 搜索框匹配的列（存在哪些用哪些）
+SEARCH_COLUMNS = ("SECURITY_CODE", "SECURITY_NAME_ABBR")
+PAGE_SIZES = (50, 100, 200, 500)
+NO_SORT = "（原顺序）"
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "eastmoney_exports")
+EXPORT_KEEP_S = 86400.0
+
+
+def _columns(frame) -> List[str]:
+    return list(frame.column_names if _arrow.is_arrow(frame) else frame.columns)
+
+
+def row_order(frame, search: str = "", sort_by: Optional[str] = None, descending: bool = True) -> np.ndarray:
+    """筛选 + 排序后的行号（int64 数组）。
+
+    search：在 SEARCH_COLUMNS 中做不区分大小写的包含匹配；sort_by 为空时保持原顺序。
+    排序稳定，空值排在最后。
+    """
+    n = frame.num_rows if _arrow.is_arrow(frame) else len(frame)
+    search = search.strip()
+    cols = [c for c in SEARCH_COLUMNS if c in _columns(frame)]
+    if search and cols:
+        if _arrow.is_arrow(frame):
+            mask = None
+            for c in cols:
+                hit = pc.match_substring(pc.cast(frame.column(c), pa.string()), search, ignore_case=True)
+                mask = hit if mask is None else pc.or_(mask, hit)
+            positions = np.flatnonzero(pc.fill_null(mask, False).to_numpy(zero_copy_only=False))
+        else:
+            mask = np.zeros(n, dtype=bool)
+            for c in cols:
+                mask |= frame[c].astype(str).str.contains(search, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+            positions = np.flatnonzero(mask)
+    else:
+        positions = np.arange(n)
+
+    if sort_by and len(positions):
+        if _arrow.is_arrow(frame):
+            values = frame.column(sort_by).take(pa.array(positions))
+            order = pc.array_sort_indices(values, order="descending" if descending else "ascending", null_placement="at_end")
+            positions = positions[order.to_numpy()]
+        else:
+            values = frame[sort_by].iloc[positions].reset_index(drop=True)
+            order = values.sort_values(ascending=not descending, na_position="last", kind="stable").index.to_numpy()
+            positions = positions[order]
+    return positions.astype(np.int64, copy=False)
+
+
+def summarize(frame, positions: np.ndarray) -> Dict[str, float]:
+    """筛选后全部行的汇总：行数 + 各金额列合计（万元）。"""
+    out: Dict[str, float] = {"行数": len(positions)}
+    for col in _columns(frame):
+        if not _is_amount_col(col):
+            continue
+        if _arrow.is_arrow(frame):
+            total = pc.sum(_arrow.numeric(frame.column(col).take(pa.array(positions)))).as_py() or 0.0
+        else:
+            total = pd.to_numeric(frame[col].iloc[positions], errors="coerce").sum()
+        out[f"{col}合计(万元)"] = float(total) / 10000
+    return out
+
+
+def take_page(frame, positions: np.ndarray, page: int, page_size: int):
+    """第 page 页（从 1 开始）的行，金额字段已换算为万元。"""
+    rows = positions[(page - 1) * page_size: page * page_size]
+    if _arrow.is_arrow(frame):
+        return format_amount_to_wan(frame.take(pa.array(rows))).to_pandas()
+    return format_amount_to_wan(frame.iloc[rows].reset_index(drop=True))
+
+
+def paged_table(
+    frame,
+    key: str,
+    default_sort: Optional[str] = None,
+    decorate: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    export_name: Optional[str] = None,
+) -> None:
+    """渲染服务端分页表格（筛选、排序、翻页、汇总）。
+
+    Args:
+        frame: 完整结果（pandas.DataFrame 或 pyarrow.Table），通常来自 RESULTS
+        key: 控件 key 前缀，同一页面内唯一
+        default_sort: 默认排序列（降序）；None 为原顺序
+        decorate: 对当前页（已格式化的 pandas.DataFrame）追加展示列，例如表三的“命中窗口”
+        export_name: 给出时在表格下方提供导出（导出完整结果，不受筛选影响），也是下载文件名
+    """
+    columns = [c for c in _columns(frame) if c not in HIDDEN_COLUMNS]
+    sort_options = [NO_SORT, *columns]
+
+    c1, c2, c3, c4 = st.columns([3, 3, 1, 1])
+    with c1:
+        search = st.text_input("筛选（代码/名称包含）", key=f"{key}_search")
+    with c2:
+        sort_by = st.selectbox(
+            "排序列",
+            sort_options,
+            index=sort_options.index(default_sort) if default_sort in sort_options else 0,
+            key=f"{key}_sort",
+        )
+    with c3:
+        descending = st.toggle("降序", value=True, key=f"{key}_desc")
+    with c4:
+        page_size = st.selectbox("每页行数", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    sort_col = None if sort_by == NO_SORT else sort_by
+    positions, summary = RESULTS.get_or_build(
+        ("table_view", fingerprint(frame), search.strip(), sort_col, descending),
+        lambda: _order_and_summary(frame, search, sort_col, descending),
+    )
+
+    items = list(summary.items())
+    for col, (label, value) in zip(st.columns(min(len(items), 5)), items[:5]):
+        col.metric(label, f"{value:,.0f}" if label == "行数" else f"{value:,.2f}")
+
+    pages = max(1, -(-len(positions) // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:  # 筛选后页数变少时回到最后一页
+        st.session_state[page_key] = pages
+    page = st.number_input("页码", min_value=1, max_value=pages, value=1, step=1, key=page_key)
+
+    view = take_page(frame, positions, int(page), page_size)
+    if decorate is not None and len(view) > 0:
+        view = decorate(view)
+    st.dataframe(view, use_container_width=True, hide_index=True, column_config=HIDDEN_COLUMNS)
+    start = (int(page) - 1) * page_size
+    st.caption(f"第 {page}/{pages} 页，第 {min(start + 1, len(positions))}–{min(start + page_size, len(positions))} 行，共 {len(positions)} 行")
+    if export_name:
+        export_controls(frame, export_name, key=key)
+
+
+def _export_file(frame, fmt: str) -> str:
+    """分块写出导出文件（按结果指纹命名，已存在则复用），顺带清理一天前的旧文件。"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    now = time.time()
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if now - entry.stat().st_mtime > EXPORT_KEEP_S:
+                os.remove(entry.path)
+        except FileNotFoundError:  # removed by another session meanwhile
+            pass
+    path = os.path.join(EXPORT_DIR, f"{fingerprint(frame)}.{FORMATS[fmt][1]}")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.part"
+        write_export(frame, fmt, tmp)
+        os.replace(tmp, path)
+    return path
+
+
+def _read_export(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def export_controls(frame, name: str, key: str, label: str = "导出") -> None:
+    """导出完整结果：先分块生成文件，生成后才显示下载按钮。
+
+    按钮的 data 是读文件的函数，点击下载时才读入，页面重跑时不读文件。
+    """
+    with st.expander(label, expanded=False):
+        fmt = st.radio("格式", list(FORMATS), horizontal=True, key=f"{key}_export_fmt")
+        if st.button("生成导出文件", key=f"{key}_export"):
+            with st.spinner("正在分块写出..."):
+                try:
+                    st.session_state[f"{key}_export_file"] = (_export_file(frame, fmt), fmt, fingerprint(frame))
+                except ImportError as e:
+                    st.error(str(e))
+        ready = st.session_state.get(f"{key}_export_file")
+        # 只为当前结果、当前格式已生成的文件显示按钮
+        if ready is not None and ready[1] == fmt and ready[2] == fingerprint(frame) and os.path.exists(ready[0]):
+            path = ready[0]
+            media_type, ext = FORMATS[fmt]
+            st.download_button(
+                f"下载 {name}.{ext}（{os.path.getsize(path) / 1024 / 1024:.1f} MB）",
+                data=partial(_read_export, path),
+                file_name=f"{name}.{ext}",
+                mime=media_type,
+                key=f"{key}_download",
+            )
+
+
+def _order_and_summary(frame, search: str, sort_by: Optional[str], descending: bool) -> Tuple[np.ndarray, Dict[str, Any]]:
+    positions = row_order(frame, search, sort_by, descending)
+    return positions, summarize(frame, positions)
@@ -0,0 +1,60 @@
+import pandas as pd
+import pyarrow as pa
+
+from eastmoney_tool.securities import SECURITIES
+from eastmoney_tool.transforms.set_ops import difference_by_key, intersect_by_key, union_by_key
+from eastmoney_tool.transforms.topk import topk
+from eastmoney_tool.transforms.trade_filters import filter_netbuy_ratio
+from eastmoney_tool.ui.formatting import format_amount_to_wan
+
+
+def _pair():
+    df = SECURITIES.encode(pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "300750", "000001", "002594"],
+        "NET_BUY_AMT": [5e7, 3e8, 3e8, -1e6, 2e7],
+        "RATIO": ["12.5", "3.1", "25%", "11", None],
+    }))
+    return df, pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _same(arrow_result, pandas_result):
+    pd.testing.assert_frame_equal(arrow_result.to_pandas(), pandas_result.reset_index(drop=True), check_dtype=False)
+
+
+def test_arrow_transforms_match_pandas():
+    df, t = _pair()
+    _same(topk(t, "NET_BUY_AMT", k=3), topk(df, "NET_BUY_AMT", k=3))
+    _same(filter_netbuy_ratio(t, "RATIO", 10.0), filter_netbuy_ratio(df, "RATIO", 10.0))
+    top = topk(df, "NET_BUY_AMT", k=2)
+    _same(intersect_by_key(t, pa.Table.from_pandas(top, preserve_index=False)), intersect_by_key(df, top))
+    _same(difference_by_key(t, pa.Table.from_pandas(top, preserve_index=False)), difference_by_key(df, top))
+    _same(union_by_key([t, t]), union_by_key([df, df]))
+    _same(format_amount_to_wan(t), format_amount_to_wan(df))
+
+
+def test_arrow_numeric_and_trade_windows_match_pandas():
+    import datetime as dt
+
+    import numpy as np
+
+    from eastmoney_tool.tables.t3_trade import aggregate_trade_windows
+    from eastmoney_tool.transforms._arrow import numeric
+    from eastmoney_tool.transforms.ranking import to_numeric
+
+    raw = ["1.5", " 12 ", "-3e2", "25%", "abc", "", None, ".5", "1,234"]
+    np.testing.assert_array_equal(
+        numeric(pa.chunked_array([pa.array(raw)])).to_numpy(), to_numeric(pd.Series(raw, dtype=object)).to_numpy()
+    )
+
+    history = SECURITIES.encode(pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "000001", "300750", "000001", "600000"],
+        "SECURITY_NAME_ABBR": ["平安银行", "浦发银行", "平安银行", "宁德时代", "平安银行", "浦发银行"],
+        "TRADE_DATE": ["2024-05-10 00:00:00", "2024-05-10 00:00:00", "2024-05-08 00:00:00",
+                       "2024-05-08 00:00:00", "2024-05-08 00:00:00", "2024-04-20 00:00:00"],
+        "NET_BUY_AMT": [1, 2, 3, 4, None, 6],
+        "RATIO": ["12.5", "3.1", "25%", "11", "30", "40"],
+    }))
+    today = dt.date(2024, 5, 10)
+    out = aggregate_trade_windows(pa.Table.from_pandas(history, preserve_index=False), today=today)
+    assert isinstance(out, pa.Table)
+    _same(out, aggregate_trade_windows(history, today=today))
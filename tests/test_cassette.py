@@ -0,0 +1,64 @@
+import datetime as dt
+import json
+import time
+
+import pytest
+
+from eastmoney_tool import cassette
+from eastmoney_tool.cassette import Cassette, CassetteMiss, RecordingTransport, ReplayTransport
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.datacenter import EastMoneyDataCenter
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.trading_calendar import BEIJING, CALENDAR, NOW_ENV
+from eastmoney_tool.transport import HttpResponse, Transport, make_transport
+
+
+class _Upstream(Transport):
+    name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params, headers, timeout):
+        self.calls += 1
+        page = int(params["pageNumber"])
+        body = {"result": {"pages": 2, "data": [{"SECURITY_CODE": f"00000{page}", "PAGE": page}]}}
+        time.sleep(0.02)
+        return HttpResponse(200, json.dumps(body), f"{url}?page={page}")
+
+
+def _dc(transport, base_url="http://live/api/data/v1/get"):
+    cfg = EastMoneyConfig(base_url=base_url, cassette=None)
+    return EastMoneyDataCenter(cfg, http=HttpClient(cfg, min_interval_s=0.0, transport=transport))
+
+
+def test_record_then_replay_offline(tmp_path):
+    upstream = _Upstream()
+    recorded = _dc(RecordingTransport(upstream, Cassette(tmp_path))).get_all_pages_df({"reportName": "X"}, page_size=1)
+    assert upstream.calls == 2 and len(Cassette(tmp_path)) == 2
+
+    # another host, no network, no latency: same frame
+    replay = ReplayTransport(Cassette(tmp_path), latency_ms=0)
+    replayed = _dc(replay, base_url="http://127.0.0.1:1/api/data/v1/get").get_all_pages_df({"reportName": "X"}, page_size=1)
+    assert replayed.equals(recorded)
+
+    with pytest.raises(CassetteMiss):
+        _dc(replay).get_raw({"reportName": "Y"})
+
+
+def test_replay_latency_recorded_or_synthetic(tmp_path):
+    _dc(RecordingTransport(_Upstream(), Cassette(tmp_path))).get_raw({"reportName": "X", "pageNumber": 1})
+    for latency_ms, low, high in ((None, 0.015, 0.5), (0, 0.0, 0.015)):
+        t0 = time.perf_counter()
+        ReplayTransport(Cassette(tmp_path), latency_ms=latency_ms).get("http://any/api/data/v1/get", {"reportName": "X", "pageNumber": 1}, {}, 1)
+        assert low <= time.perf_counter() - t0 < high
+
+
+def test_activate_configures_clients_and_pins_clock(tmp_path, monkeypatch):
+    for name in ("EASTMONEY_CASSETTE", "EASTMONEY_CASSETTE_MODE", NOW_ENV):
+        monkeypatch.delenv(name, raising=False)
+    (tmp_path / "cassette.json").write_text(json.dumps({"recorded_at": "2026-10-16T18:00:00+08:00"}))
+    cassette.activate(tmp_path, "replay")
+    assert isinstance(make_transport(EastMoneyConfig()), ReplayTransport)
+    assert CALENDAR.now() == dt.datetime(2026, 10, 16, 18, tzinfo=BEIJING)
+    assert CALENDAR.as_of("RPT_ORGANIZATION_TRADE_DETAILSNEW") == dt.date(2026, 10, 16)
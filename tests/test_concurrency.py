@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+
+from eastmoney_tool.concurrency import FAILED, OK, THROTTLED, AIMDLimiter
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.datacenter import EastMoneyDataCenter
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.transport import HttpResponse, Transport
+
+
+class _ScriptedTransport(Transport):
+    """Answers page requests; `plan` maps a page number to a list of per-attempt behaviours."""
+
+    def __init__(self, pages=1, plan=None):
+        self.pages = pages
+        self.plan = {k: list(v) for k, v in (plan or {}).items()}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params, headers, timeout):
+        page = int((params or {}).get("pageNumber", 1))
+        with self._lock:
+            self.calls.append(page)
+            step = self.plan.get(page, []).pop(0) if self.plan.get(page) else "ok"
+        if step == "reset":
+            raise ConnectionResetError("peer reset")
+        if isinstance(step, float):
+            time.sleep(step)
+        elif isinstance(step, int):
+            return HttpResponse(step, "{}", url)
+        body = {"result": {"pages": self.pages, "data": [{"SECURITY_CODE": f"{page:06d}", "PAGE": page}]}}
+        return HttpResponse(200, json.dumps(body), url)
+
+
+def _client(transport, **cfg):
+    cfg.setdefault("retry_backoff_s", 0.0)
+    return HttpClient(EastMoneyConfig(base_url="http://standin/", **cfg), min_interval_s=0.0, transport=transport)
+
+
+def test_aimd_grows_on_success_and_halves_on_throttle():
+    limiter = AIMDLimiter(initial=4, max_limit=8, cooldown_s=60.0)
+    for _ in range(12):
+        assert limiter.acquire(block=False)
+        limiter.release(0.01, OK)
+    assert 6 < limiter.limit <= 8
+    grown = limiter.limit
+    for outcome in (THROTTLED, FAILED):  # one congestion event per cooldown
+        limiter.acquire()
+        limiter.release(0.01, outcome)
+    assert limiter.limit == grown / 2
+    # slots are enforced
+    held = [limiter.acquire(block=False) for _ in range(int(limiter.limit))]
+    assert all(held) and not limiter.acquire(block=False)
+
+
+def test_transient_failures_are_retried():
+    transport = _ScriptedTransport(plan={1: ["reset", 503]})
+    http = _client(transport, max_attempts=3)
+    resp = http.get("http://standin/", params={"pageNumber": 1})
+    assert resp.status_code == 200 and transport.calls == [1, 1, 1]
+    assert http.stats()["retries"] == 2 and http.stats()["throttled"] == 1
+
+    # the last attempt's answer is returned as is
+    transport = _ScriptedTransport(plan={1: [500, 500]})
+    assert _client(transport, max_attempts=2).get("http://standin/", params={"pageNumber": 1}).status_code == 500
+
+
+def test_hedge_races_a_straggler():
+    transport = _ScriptedTransport(plan={1: [1.0]})
+    http = _client(transport, hedge_percentile=0.9)
+    for _ in range(20):  # latency history for the percentile
+        http.limiter.acquire()
+        http.limiter.release(0.01, OK)
+    t0 = time.monotonic()
+    assert http.get("http://standin/", params={"pageNumber": 1}).status_code == 200
+    assert time.monotonic() - t0 < 0.5
+    assert http.stats()["hedges"] == 1 and http.stats()["hedge_wins"] == 1
+
+
+def test_pages_after_the_first_are_fetched_in_parallel_and_kept_in_order():
+    transport = _ScriptedTransport(pages=6, plan={p: [0.2] for p in range(2, 7)})
+    dc = EastMoneyDataCenter(http=_client(transport, max_concurrency=8))
+    t0 = time.monotonic()
+    df = dc.get_all_pages_df({"reportName": "X"}, page_size=1)
+    assert time.monotonic() - t0 < 0.6
+    assert df["PAGE"].tolist() == [1, 2, 3, 4, 5, 6]
+
+
+def test_one_fast_outlier_does_not_make_normal_latencies_slow():
+    limiter = AIMDLimiter(initial=4, cooldown_s=0.0)
+    for latency in [0.05] * 20 + [0.001] + [0.05] * 20:  # the outlier would be the window minimum
+        limiter.acquire()
+        limiter.release(latency, OK)
+    assert limiter.counts["slow"] == 0 and limiter.counts["decreases"] == 0
+    limiter.acquire()
+    limiter.release(1.0, OK)  # far above the recent low percentile
+    assert limiter.counts["slow"] == 1
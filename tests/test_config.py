@@ -0,0 +1,10 @@
+from eastmoney_tool.config import BASE_URL_ENV, DEFAULT_BASE_URL, EastMoneyConfig
+
+
+def test_base_url_env_override(monkeypatch):
+    monkeypatch.delenv(BASE_URL_ENV, raising=False)
+    assert EastMoneyConfig().base_url == DEFAULT_BASE_URL
+
+    monkeypatch.setenv(BASE_URL_ENV, "http://127.0.0.1:8765/api/data/v1/get")
+    assert EastMoneyConfig().base_url == "http://127.0.0.1:8765/api/data/v1/get"
+    assert EastMoneyConfig(base_url="http://other").base_url == "http://other"  # explicit wins
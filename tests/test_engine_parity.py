@@ -0,0 +1,114 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("polars")
+
+from eastmoney_tool.securities import SECURITIES
+from eastmoney_tool.tables.t1_survey import aggregate_survey_events
+from eastmoney_tool.tables.t2_seat import seat_topk_from_index
+from eastmoney_tool.tables.t3_trade import aggregate_trade_windows
+from eastmoney_tool.transforms.ranking import RankingIndex
+
+
+def _snapshot(codes, amounts, times, ratios):
+    return SECURITIES.encode(pd.DataFrame({
+        "SECURITY_CODE": codes,
+        "NET_BUY_AMT": amounts,
+        "BUY_TIMES": times,
+        "RATIO": ratios,
+    }))
+
+
+def _same(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+
+def test_polars_seat_topk_matches_pandas():
+    index = RankingIndex(
+        _snapshot(["000001", "600000", "300750", "002594", "601318"],
+                  [5e7, 3e8, 3e8, -1e6, 2e7], [3, 9, 1, 9, 4], [1, 2, 3, 4, 5]),
+        metrics=("NET_BUY_AMT", "BUY_TIMES"),
+    )
+    for a, b in zip(seat_topk_from_index(index, k=3, engine="polars"), seat_topk_from_index(index, k=3)):
+        _same(a, b)
+
+
+def test_polars_trade_windows_match_pandas():
+    import datetime as dt
+
+    history = SECURITIES.encode(pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "000001", "300750", "000001", "600000"],
+        "TRADE_DATE": ["2024-05-10 00:00:00", "2024-05-10 00:00:00", "2024-05-08 00:00:00",
+                       "2024-05-08 00:00:00", "2024-05-08 00:00:00", "2024-04-20 00:00:00"],
+        "NET_BUY_AMT": [1, 2, 3, 4, 5, 6],
+        "RATIO": ["12.5", "3.1", "25%", "11", "30", "40"],
+    }))
+    today = dt.date(2024, 5, 10)
+    _same(
+        aggregate_trade_windows(history, today=today, engine="polars"),
+        aggregate_trade_windows(history, today=today),
+    )
+
+
+def test_polars_survey_aggregate_matches_pandas():
+    events = SECURITIES.encode(pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "000001"],
+        "SECUCODE": ["000001.SZ", "600000.SH", "000001.SZ"],
+        "SECURITY_NAME_ABBR": ["平安银行", "浦发银行", "平安银行"],
+        "SUM": [3, 10, 5],
+        "RECEIVE_START_DATE": ["2024-05-01", "2024-05-02", "2024-05-03"],
+        "CLOSE_PRICE": [10.0, 8.0, 10.5],
+        "CHANGE_RATE": [1.0, -1.0, 2.0],
+        "RECEIVE_WAY_EXPLAIN": ["特定对象调研", "电话会议", "电话会议"],
+    }))
+    _same(
+        aggregate_survey_events(events, "SECURITY_CODE", engine="polars"),
+        aggregate_survey_events(events, "SECURITY_CODE"),
+    )
+
+
+def test_polars_empty_results_keep_the_arrow_container():
+    import pyarrow as pa
+
+    no_rows = pa.table({"SECURITY_CODE": pa.array([], pa.string()), "TRADE_DATE": pa.array([], pa.string()),
+                        "RATIO": pa.array([], pa.string())})
+    no_ratio = pa.table({"SECURITY_CODE": ["000001"], "TRADE_DATE": ["2024-05-10"]})
+    for history in (no_rows, no_ratio):
+        assert isinstance(aggregate_trade_windows(history, engine="polars"), pa.Table)
+        assert isinstance(aggregate_trade_windows(history), pa.Table)
+
+    index = RankingIndex(pa.Table.from_pandas(_snapshot([], [], [], []), preserve_index=False), metrics=("NET_BUY_AMT",))
+    assert all(isinstance(t, pa.Table) for t in seat_topk_from_index(index, engine="polars"))
+
+
+def test_polars_t4_is_a_graph_node_over_the_sources():
+    from eastmoney_tool.sources import trade_daily
+    from eastmoney_tool.tables.graph import NODES, TableGraph
+    from eastmoney_tool.trading_calendar import CALENDAR
+
+    fetched = []
+    day = CALENDAR.as_of(trade_daily.REPORT_NAME).isoformat()
+
+    class _Upstream:
+        cache_namespace = ("stand-in", "pandas")
+
+        def get_all_pages(self, params, page_size=500, **kwargs):
+            fetched.append(params["reportName"])
+            return pd.DataFrame({
+                "SECURITY_CODE": ["000001", "600000", "300750"],
+                "TRADE_DATE": [day] * 3,
+                "RATIO": [12.0, 30.0, 5.0],
+                "NET_BUY_AMT": [1e7, 3e7, 2e7],
+                "BUY_TIMES": [3, 2, 1],
+            })
+
+    dc, g = _Upstream(), TableGraph(NODES)
+    fused = g.compute(dc, "t4", k=2, engine="polars")
+    assert list(fused["SECURITY_CODE"]) == ["600000"]
+    assert sorted(g.last_run["computed"]) == ["seat_panel", "t4", "trade_history"]
+    _same(fused, g.compute(dc, "t4", k=2))
+    assert sorted(g.last_run["reused"]) == ["seat_panel", "trade_history"]  # same sources, no refetch
+
+    count = len(fetched)
+    assert g.compute(dc, "t4", k=2, engine="polars") is fused
+    assert len(fetched) == count and not g.freshness(dc, "t4", k=2, engine="polars").stale
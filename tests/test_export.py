@@ -0,0 +1,45 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from eastmoney_tool.export import iter_chunks, iter_export, write_export
+
+FRAME = pd.DataFrame(
+    {
+        "SECURITY_CODE": [f"{i:06d}" for i in range(10)],
+        "NET_BUY_AMT": [i * 1e4 for i in range(10)],
+        "TRADE_DATE": pd.Timestamp("2026-10-16"),
+        "SECURITY_ID": range(10),
+    }
+)
+
+
+def test_chunks_are_formatted_slices():
+    for frame in (FRAME, pa.Table.from_pandas(FRAME, preserve_index=False)):
+        chunks = list(iter_chunks(frame, chunk_rows=4))
+        assert [len(c) for c in chunks] == [4, 4, 2]
+        assert list(chunks[0].columns) == ["SECURITY_CODE", "NET_BUY_AMT(万元)", "TRADE_DATE"]
+        assert chunks[2]["NET_BUY_AMT(万元)"].tolist() == [8.0, 9.0]
+
+
+def test_csv_and_parquet_round_trip_in_chunks():
+    blocks = list(iter_export(FRAME, "csv", chunk_rows=4))
+    assert len(blocks) == 4  # BOM + 3 chunks
+    df = pd.read_csv(io.BytesIO(b"".join(blocks)), encoding="utf-8-sig", dtype={"SECURITY_CODE": str})
+    assert len(df) == 10 and df["SECURITY_CODE"][1] == "000001"
+
+    body = b"".join(iter_export(FRAME, "parquet", chunk_rows=4))
+    assert pq.ParquetFile(io.BytesIO(body)).num_row_groups == 3
+    assert pq.read_table(io.BytesIO(body)).column("NET_BUY_AMT(万元)").to_pylist() == list(map(float, range(10)))
+
+
+def test_xlsx_export(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    pytest.importorskip("xlsxwriter")
+    path = write_export(FRAME, "xlsx", tmp_path / "t.xlsx", chunk_rows=3)
+    rows = list(openpyxl.load_workbook(path, read_only=True).active.values)
+    assert rows[0] == ("SECURITY_CODE", "NET_BUY_AMT(万元)", "TRADE_DATE")
+    assert rows[2][:2] == ("000001", 1.0) and len(rows) == 11
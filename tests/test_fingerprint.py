@@ -0,0 +1,52 @@
+import pandas as pd
+import pyarrow as pa
+
+from eastmoney_tool.fingerprint import diff_frames, fingerprint, row_hashes, stamp
+from eastmoney_tool.securities import SECURITIES
+from eastmoney_tool.transforms.ranking import RankingIndex
+
+
+def _frame():
+    return pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "300750"],
+        "TRADE_DATE": ["2024-05-10", "2024-05-10", "2024-05-09"],
+        "NET_BUY_AMT": [1e7, -2e6, 3.5e6],
+    })
+
+
+def test_fingerprint_ignores_column_order_and_security_ids():
+    df = _frame()
+    assert fingerprint(df) == fingerprint(df[df.columns[::-1]].copy())
+    assert fingerprint(df) == fingerprint(SECURITIES.encode(df.copy()))
+    assert (row_hashes(df) == row_hashes(df[df.columns[::-1]])).all()
+
+    changed = df.copy()
+    changed.loc[1, "NET_BUY_AMT"] = 0.0
+    assert fingerprint(changed) != fingerprint(df)
+    assert fingerprint(df.iloc[::-1].reset_index(drop=True)) != fingerprint(df)  # row order counts
+
+
+def test_stamped_frames_and_containers():
+    df = stamp(_frame())
+    index = RankingIndex(df)
+    assert index.df is df  # RangeIndex frames are shared, stamp included
+    assert fingerprint(index) == fingerprint(df)
+    assert fingerprint((df, 3)) == fingerprint((_frame(), 3)) != fingerprint((df, 4))
+    table = pa.Table.from_pandas(_frame(), preserve_index=False)
+    assert fingerprint(table) == fingerprint(table)
+
+
+def test_diff_frames_by_key():
+    old = _frame()
+    new = pd.concat([old.iloc[[0]], old.iloc[[1]].assign(NET_BUY_AMT=5e6)], ignore_index=True)
+    new.loc[2] = ["002594", "2024-05-10", 1.0]
+    d = diff_frames(old, new, key=("SECURITY_CODE", "TRADE_DATE"))
+    assert list(d.added["SECURITY_CODE"]) == ["002594"]
+    assert list(d.changed["SECURITY_CODE"]) == ["600000"]
+    assert list(d.removed["SECURITY_CODE"]) == ["300750"]
+    assert d.unchanged == 1
+
+    # without a key a changed row is one removal plus one addition
+    d = diff_frames(old, new)
+    assert sorted(d.added["SECURITY_CODE"]) == ["002594", "600000"] and d.changed.empty
+    assert diff_frames(old, old.copy()).empty
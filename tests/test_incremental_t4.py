@@ -0,0 +1,90 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from eastmoney_tool.tables.t2_seat import seat_topk_from_index
+from eastmoney_tool.tables.t3_trade import aggregate_trade_windows
+from eastmoney_tool.tables.t4_intersection import IncrementalT4
+from eastmoney_tool.transforms.ranking import RankingIndex
+from eastmoney_tool.transforms.set_ops import intersect_by_key
+
+TODAY = dt.date(2024, 5, 10)
+CODES = [f"{i:06d}" for i in range(40)]
+
+
+def _trade(rng, days, n):
+    return pd.DataFrame({
+        "SECURITY_CODE": rng.choice(CODES, n),
+        "TRADE_DATE": [f"{TODAY - dt.timedelta(days=int(d))} 00:00:00" for d in rng.choice(days, n)],
+        "NET_BUY_AMT": rng.normal(0, 1e7, n),
+        "RATIO": rng.uniform(0, 30, n),
+    })
+
+
+def _seat(rng, codes):
+    return pd.DataFrame({
+        "SECURITY_CODE": codes,
+        "NET_BUY_AMT": rng.normal(0, 1e8, len(codes)),
+        "BUY_TIMES": rng.integers(0, 20, len(codes)),
+    })
+
+
+def _full(trade, seat, today, k=8):
+    t3 = aggregate_trade_windows(trade, threshold=10.0, today=today)
+    t4 = intersect_by_key(t3, seat_topk_from_index(RankingIndex(seat), k=k)[2])
+    return t4.sort_values("SECURITY_CODE").reset_index(drop=True)
+
+
+def _check(inc, expected):
+    got = inc.table().sort_values("SECURITY_CODE").reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected[list(got.columns)], check_dtype=False)
+
+
+def test_incremental_t4_matches_full_rebuild():
+    rng = np.random.default_rng(7)
+    trade = _trade(rng, range(1, 31), 300)
+    seat = _seat(rng, CODES[:30])
+    inc = IncrementalT4(trade, seat, k=8, today=TODAY)
+    _check(inc, _full(trade, seat, TODAY))
+
+    # a new trading day, plus a re-pulled day replacing its earlier rows
+    new_day = _trade(rng, [0], 40)
+    repulled = trade.loc[trade["TRADE_DATE"].str.startswith(str(TODAY - dt.timedelta(days=1)))].copy()
+    repulled["RATIO"] = rng.uniform(0, 30, len(repulled))
+    delta = pd.concat([new_day, repulled], ignore_index=True)
+    # seat: some values change, two new stocks appear
+    seat_delta = _seat(rng, CODES[5:10] + CODES[30:32])
+
+    before = set(inc.table()["SECURITY_CODE"])
+    change = inc.update(trade_rows=delta, seat_rows=seat_delta)
+
+    base = trade.loc[~trade["TRADE_DATE"].str.startswith(str(TODAY - dt.timedelta(days=1)))]
+    full_trade = pd.concat([base, delta], ignore_index=True)
+    full_seat = pd.concat([seat.loc[~seat["SECURITY_CODE"].isin(seat_delta["SECURITY_CODE"])], seat_delta])
+    full_seat = full_seat.set_index("SECURITY_CODE").reindex(CODES[:32]).reset_index()
+    _check(inc, _full(full_trade, full_seat, TODAY))
+
+    after = set(inc.table()["SECURITY_CODE"])
+    assert set(change.added["SECURITY_CODE"]) == after - before
+    assert set(change.removed["SECURITY_CODE"]) == before - after
+
+
+def test_incremental_t4_advancing_days_and_untouched_topk():
+    rng = np.random.default_rng(3)
+    trade = _trade(rng, range(0, 31), 300)
+    seat = _seat(rng, CODES)
+    inc = IncrementalT4(trade, seat, k=8, today=TODAY)
+
+    next_session = TODAY + dt.timedelta(days=3)  # Friday -> Monday
+    change = inc.update(today=next_session)
+    _check(inc, _full(trade, seat, next_session))
+    assert 0 < change.affected < len(CODES)
+
+    # lowering a stock outside both TopK sets keeps them without a re-rank
+    top = inc.table()
+    outsider = seat.loc[~seat["SECURITY_CODE"].isin(inc._top["NET_BUY_AMT"] + inc._top["BUY_TIMES"])].iloc[[0]].copy()
+    outsider["NET_BUY_AMT"] = -1e12
+    change = inc.update(seat_rows=outsider)
+    assert change.empty and change.affected == 0
+    pd.testing.assert_frame_equal(inc.table(), top)
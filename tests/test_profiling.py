@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from eastmoney_tool import profiling
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _fan_out(seconds):
+    # work in other threads (like the datacenter's page fetch pool) is sampled too
+    workers = [threading.Thread(target=_busy, args=(seconds,)) for _ in range(2)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return "ok"
+
+
+@pytest.fixture
+def enabled(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_DIR_ENV, str(tmp_path))
+    # stacks are kept from the first package frame; count this test module as the package
+    monkeypatch.setattr(profiling, "_PACKAGE_DIR", str(Path(__file__).parent) + os.sep)
+    profiling.set_enabled(True)
+    profiling.RUNS.clear()
+    yield tmp_path
+    profiling.set_enabled(False)
+    profiling.RUNS.clear()
+
+
+def test_profiled_call_writes_collapsed_and_speedscope(enabled):
+    fn = profiling.profiled(_fan_out)
+    assert fn(0.2) == "ok"
+
+    run = profiling.RUNS[-1]
+    assert run.label == "test_profiling._fan_out"
+    assert run.total > 0 and run.duration_s >= 0.2
+    assert any("_busy" in line for line in run.collapsed().splitlines())
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in run.collapsed().strip().splitlines())
+
+    top = run.top(5)
+    assert list(top.columns) == ["function", "self", "total", "self_%", "total_%", "self_s"]
+    assert top["function"].iloc[0].startswith("_busy")
+
+    assert sorted(p.name.split(".", 1)[1] for p in run.paths) == ["collapsed", "speedscope.json"]
+    assert all(p.parent == enabled and p.exists() for p in run.paths)
+    doc = json.loads(run.paths[1].read_text(encoding="utf-8"))
+    profile = doc["profiles"][0]
+    assert profile["type"] == "sampled" and len(profile["samples"]) == len(profile["weights"])
+    assert max(i for s in profile["samples"] for i in s) < len(doc["shared"]["frames"])
+
+
+def test_nested_and_disabled_calls_pass_through(enabled):
+    inner = profiling.profiled(_busy)
+    outer = profiling.profiled(lambda: inner(0.05))
+    outer()
+    assert len(profiling.RUNS) == 1  # the inner call was sampled as part of the outer run
+
+    profiling.set_enabled(False)
+    assert inner(0.01) > 0
+    assert len(profiling.RUNS) == 1
+    assert not any(enabled.glob("*_busy*"))
@@ -0,0 +1,81 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from eastmoney_tool.query import QueryLayer
+from eastmoney_tool.securities import SECURITIES, drop_ids
+from eastmoney_tool.store import SEAT, TRADE, SnapshotStore
+from eastmoney_tool.tables.t2_seat import seat_topk_from_index
+from eastmoney_tool.tables.t3_trade import aggregate_trade_windows
+from eastmoney_tool.transforms.ranking import RankingIndex
+
+TODAY = dt.date(2024, 5, 10)
+
+
+def _trade():
+    days_ago = [0, 0, 2, 4, 8, 20, 20, 40]
+    codes = ["000001", "600000", "300750", "000001", "002594", "601318", "600000", "000002"]
+    return pd.DataFrame({
+        "SECURITY_CODE": codes,
+        "SECUCODE": [f"{c}.SZ" for c in codes],
+        "SECURITY_NAME_ABBR": [f"N{c}" for c in codes],
+        "TRADE_DATE": [f"{TODAY - dt.timedelta(days=d)} 00:00:00" for d in days_ago],
+        "NET_BUY_AMT": [9e7, 8e7, 7e7, 6e7, 5e7, 4e7, 3e7, 2e7],
+        "RATIO": ["12.5", "3.1", "25%", "11", "10.5", None, "30", "50"],
+    })
+
+
+def _seat():
+    return pd.DataFrame({
+        "SECURITY_CODE": ["000001", "600000", "300750", "002594", "601318"],
+        "NET_BUY_AMT": [5e7, 3e8, 3e8, -1e6, 2e7],
+        "BUY_TIMES": [3, 9, 1, 9, 4],
+    })
+
+
+@pytest.fixture
+def layer(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.write(TRADE, _trade(), TODAY)
+    store.write(SEAT, _seat(), TODAY, STATISTICSCYCLE="02")
+    with QueryLayer(store) as q:
+        yield q
+
+
+def _same(a, b):
+    a = a.reset_index(drop=True)
+    b = drop_ids(b).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a[list(b.columns)], b, check_dtype=False)
+
+
+def test_sql_t2_matches_python(layer):
+    index = RankingIndex(SECURITIES.encode(_seat()), metrics=("NET_BUY_AMT", "BUY_TIMES"))
+    _same(layer.table("t2", cycle="02", k=3), seat_topk_from_index(index, k=3)[2])
+
+
+def test_sql_t3_matches_python_windows(layer):
+    expected = aggregate_trade_windows(SECURITIES.encode(_trade()), threshold=10.0, today=TODAY)
+    got = layer.table("t3", threshold=10.0)
+    _same(got.sort_values("SECURITY_CODE"), expected.sort_values("SECURITY_CODE"))
+    assert list(layer.table("t4", k=3)["SECURITY_CODE"]) == ["600000"]
+    assert list(layer.table("t4", k=5, threshold=1.0)["SECURITY_CODE"]) == ["000001", "600000", "300750", "002594"]
+
+
+def test_user_sql_is_read_only_sandboxed_and_limited(layer):
+    df, truncated = layer.read_query("WITH x AS (SELECT * FROM trade) SELECT SECURITY_CODE FROM x;", max_rows=3)
+    assert len(df) == 3 and truncated
+    assert layer.read_query("SELECT count(*) AS n FROM trade")[0]["n"].tolist() == [8]
+
+    for sql in ("CREATE OR REPLACE MACRO num(x) AS 0", "SELECT 1; DROP VIEW trade", "SET lock_configuration = false"):
+        with pytest.raises(ValueError):
+            layer.read_query(sql)
+    with pytest.raises(Exception, match="Permission"):
+        layer.read_query("SELECT * FROM read_csv('/etc/passwd')")
+    with pytest.raises(Exception):
+        layer.query("SET enable_external_access = true")  # configuration is locked
+    with pytest.raises(TimeoutError):
+        layer.read_query("SELECT sum(a.range * b.range) FROM range(100000) a, range(100000) b", timeout_s=0.2)
+    assert list(layer.table("t4", k=3)["SECURITY_CODE"]) == ["600000"]  # macros untouched
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from eastmoney_tool.transforms.ranking import RankingIndex
+from eastmoney_tool.transforms.topk import topk
+from eastmoney_tool.transforms.trade_filters import filter_netbuy_ratio
+
+
+def _frame(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "SECURITY_CODE": [f"{i:06d}" for i in range(n)],
+        "NET_BUY_AMT": rng.integers(-5, 5, n) * 1e6,
+        "RATIO": rng.normal(5, 8, n).round(1),
+    })
+    df.loc[7, "RATIO"] = np.nan
+    return df
+
+
+def test_topk_matches_sort_based_topk():
+    df = _frame()
+    idx = RankingIndex(df, metrics=["NET_BUY_AMT"])
+    for k in (1, 10, 50):
+        assert idx.topk("NET_BUY_AMT", k).equals(topk(df, "NET_BUY_AMT", k=k))
+
+
+def test_above_matches_filter_and_curve():
+    df = _frame()
+    idx = RankingIndex(df)
+    for t in (0.0, 10.0, 12.3):
+        expected = filter_netbuy_ratio(df, ratio_col="RATIO", threshold=t)
+        assert idx.above("RATIO", t, keep_order=True).equals(expected)
+        assert idx.count_above("RATIO", t) == len(expected)
+    curve = idx.count_curve("RATIO", [0.0, 10.0])
+    assert curve["count"].tolist() == [idx.count_above("RATIO", 0.0), idx.count_above("RATIO", 10.0)]
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from eastmoney_tool.results import ResultStore, nbytes
+from eastmoney_tool.transforms.ranking import RankingIndex
+
+
+def _frame(rows):
+    return pd.DataFrame({"SECURITY_CODE": [f"{i:06d}" for i in range(rows)], "NET_BUY_AMT": np.arange(rows, dtype=float)})
+
+
+def test_nbytes_counts_frames_and_shared_objects_once():
+    df = _frame(1000)
+    size = nbytes(df)
+    assert size >= df["NET_BUY_AMT"].nbytes + 1000 * 6  # deep: the code strings are counted
+    index = RankingIndex(df, metrics=("NET_BUY_AMT",))
+    assert nbytes(index) > size  # the frame plus the sort orders
+    assert nbytes((df, df)) < 2 * size  # the same frame twice is counted once
+
+
+def test_lru_eviction_under_budget_and_transparent_rebuild():
+    one = nbytes(_frame(1000))
+    store = ResultStore(budget_bytes=int(2.5 * one))
+    builds = []
+
+    def build(name):
+        builds.append(name)
+        return _frame(1000)
+
+    refs = {name: store.put(name, lambda name=name: build(name)) for name in ("a", "b")}
+    store.get(refs["a"])  # a is now the most recently used
+    refs["c"] = store.put("c", lambda: build("c"))
+    assert "b" not in store and "a" in store and "c" in store
+    assert store.used_bytes <= store.budget_bytes and store.stats()["evictions"] == 1
+
+    assert len(store.get(refs["b"])) == 1000  # evicted -> rebuilt from the recipe
+    assert builds == ["a", "b", "c", "b"]
+
+    huge = ResultStore(budget_bytes=one // 2)
+    ref = huge.put("x", lambda: _frame(1000))
+    assert len(huge) == 0 and len(huge.get(ref)) == 1000  # larger than the budget: returned, not kept
+
+
+def test_concurrent_builds_of_one_key_run_once():
+    store = ResultStore(budget_bytes=10 * 1024 * 1024)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return _frame(10)
+
+    threads = [threading.Thread(target=store.get_or_build, args=("k", slow)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and store.stats()["hits"] >= 7
+
+
+def test_ttl_caches_and_graph_memos_are_bounded_by_the_store_budget():
+    import gc
+    import tracemalloc
+
+    from eastmoney_tool.cache import TTLCache
+    from eastmoney_tool.results import RESULTS
+    from eastmoney_tool.tables import t1_survey, t2_seat, t3_trade, t5_flows
+    from eastmoney_tool.tables.graph import TABLES, Node, TableGraph
+
+    # the process-wide caches all keep their values in RESULTS
+    for cache in (t1_survey._SURVEY_CACHE, t2_seat._SEAT_CACHE, t3_trade._TRADE_CACHE, t5_flows._FLOW_CACHE,
+                  TABLES.memo, TABLES.content_memo, TABLES.last_good):
+        assert cache.store is RESULTS
+
+    class _Dc:
+        cache_namespace = ("stand-in", "pandas")
+
+    def history(n):  # numpy-backed, so tracemalloc sees every buffer
+        return pd.DataFrame({"NET_BUY_AMT": np.full(20_000, float(n)), "RATIO": np.arange(20_000, dtype=float)})
+
+    store = ResultStore(budget_bytes=4 * nbytes(history(0)))
+    fetched = TTLCache(store=store)  # like t3's index cache
+    graph = TableGraph({
+        "src": Node(lambda dc, p: fetched.get_or_compute(p["n"], lambda: history(p["n"])), defaults={"n": 0}, source=True),
+        "top": Node(lambda dc, p, df: df.head(10_000).copy(), defaults={"n": 0}, deps=lambda p: [("src", p)]),
+    }, store=store)
+
+    tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in range(20):  # 20 sources + 20 derived frames: ~7x the budget if the caches kept them all
+        assert len(graph.compute(_Dc(), "top", n=n)) == 10_000
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    assert store.used_bytes <= store.budget_bytes
+    assert retained < 1.5 * store.budget_bytes
+    assert store.stats()["evictions"] > 0
+    assert graph.compute(_Dc(), "top", n=0)["NET_BUY_AMT"].iloc[0] == 0  # evicted everywhere -> computed again
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from eastmoney_tool.transforms.rolling import FlowGrid
+
+
+def _history():
+    return pd.DataFrame({
+        "SECURITY_CODE": ["000001", "000001", "600000", "000001", "600000", "600000"],
+        "SECURITY_NAME_ABBR": ["平安银行", "平安银行", "浦发银行", "平安银行", "浦发银行", "浦发银行"],
+        "TRADE_DATE": ["2024-05-01 00:00:00", "2024-05-03 00:00:00", "2024-05-03 00:00:00",
+                       "2024-05-10 00:00:00", "2024-05-10 00:00:00", "2024-05-10 00:00:00"],
+        "NET_BUY_AMT": [1e7, 2e7, 3e7, 4e7, 5e7, -1e7],
+        "RATIO": ["10", "20%", None, "5", "7", "9"],
+    })
+
+
+def test_snapshot_matches_window_groupby():
+    grid = FlowGrid(_history(), end=pd.Timestamp("2024-05-12"))
+    snap = grid.snapshot([("today", 0), ("3d", 3), ("10d", 10)]).set_index("SECURITY_CODE")
+
+    assert snap.loc["000001", "NET_BUY_AMT_today"] == 0
+    assert snap.loc["000001", "DAYS_ON_LIST_3d"] == 1
+    assert snap.loc["600000", "NET_BUY_AMT_3d"] == 5e7  # two rows on the same day: the first counts
+    assert snap.loc["600000", "MAX_RATIO_3d"] == 7
+    assert snap.loc["000001", "NET_BUY_AMT_10d"] == 6e7  # 05-01 falls outside [05-02, 05-12]
+    assert snap.loc["000001", "MAX_RATIO_10d"] == 20
+    assert list(snap.index) == ["600000", "000001"]  # sorted by the widest window's net buy (8e7 > 6e7)
+
+
+def test_series_is_rolling_window_per_date():
+    grid = FlowGrid(_history())
+    s = grid.series("000001", [("2d", 2)])["2d"]
+    expected = pd.Series(1e7 * np.array([1, 1, 3, 2, 2, 0, 0, 0, 0, 4]), index=grid.dates, name="2d")
+    pd.testing.assert_series_equal(s, expected)
+    assert grid.series("600000", [("2d", 2)], metric="DAYS_ON_LIST")["2d"].max() == 1
+
+
+
+def test_unparseable_dates_give_an_empty_grid():
+    history = _history().assign(TRADE_DATE=["--", "", None, "n/a", "x", "?"])
+    grid = FlowGrid(history, end=pd.Timestamp("2024-05-12"))
+    assert grid.empty
+    assert grid.snapshot([("3d", 3)]).empty
+
+def test_arrow_history_builds_the_same_grid():
+    import pyarrow as pa
+
+    windows = [("today", 0), ("3d", 3), ("10d", 10)]
+    end = pd.Timestamp("2024-05-12")
+    pd.testing.assert_frame_equal(
+        FlowGrid(pa.Table.from_pandas(_history()), end=end).snapshot(windows),
+        FlowGrid(_history(), end=end).snapshot(windows),
+    )
+
+
+def test_window_net_buy_matches_t3_aggregate():
+    from eastmoney_tool.tables.t3_trade import aggregate_trade_windows
+
+    history = pd.DataFrame({
+        "SECURITY_CODE": ["000001", "000001", "600000", "600000", "600000", "000001"],
+        "TRADE_DATE": ["2024-05-06", "2024-05-06", "2024-05-07", "2024-05-08", "2024-05-08", "2024-05-10"],
+        "NET_BUY_AMT": [1e7, 9e7, 3e7, 5e7, -1e7, 2e7],
+        "RATIO": [11, 30, 12, 15, 40, 20],
+    })
+    t3 = aggregate_trade_windows(history, threshold=10.0, windows=[("all", 20)], today=pd.Timestamp("2024-05-10").date())
+    snap = FlowGrid(history).snapshot([("all", 10)])
+    merged = snap.merge(t3, on="SECURITY_CODE")
+    assert len(merged) == 2
+    np.testing.assert_array_equal(merged["NET_BUY_AMT_all"], merged["NET_BUY_AMT"])  # 3e7 / 8e7
+    np.testing.assert_array_equal(merged["MAX_RATIO_all"], merged["MAX_RATIO"])
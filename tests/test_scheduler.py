@@ -0,0 +1,79 @@
+import threading
+import time
+
+from eastmoney_tool.scheduler import BACKFILL, INTERACTIVE, RequestScheduler, request_class
+
+
+class _FakeHttp:
+    cfg = None
+
+    def __init__(self):
+        self.order = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def get(self, url, params=None, headers=None):
+        if params["tag"] == "hold":
+            self.started.set()
+            assert self.gate.wait(5)
+        self.order.append(params["tag"])
+
+
+def _call(sched, cls, tag):
+    with request_class(cls, tenant=tag):
+        sched.get("u", params={"tag": tag})
+
+
+def _until(predicate, timeout_s=5.0):
+    """Wait for a scheduler state change (no fixed sleeps: ordering does not depend on timing)."""
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline, "scheduler state not reached"
+        threading.Event().wait(0.001)
+
+
+def _start(sched, cls, tag):
+    t = threading.Thread(target=_call, args=(sched, cls, tag))
+    t.start()
+    return t
+
+
+def test_interactive_jumps_queued_backfill():
+    http = _FakeHttp()
+    sched = RequestScheduler(http, capacity=1)
+    threads = [_start(sched, BACKFILL, "hold")]
+    assert http.started.wait(5)  # holds the only slot
+    threads.append(_start(sched, BACKFILL, "bg"))
+    _until(lambda: sched.stats()[BACKFILL]["queued"] == 1)
+    threads.append(_start(sched, INTERACTIVE, "ui"))
+    _until(lambda: sched.stats()[INTERACTIVE]["queued"] == 1)
+
+    http.gate.set()
+    for t in threads:
+        t.join(5)
+    assert http.order == ["hold", "ui", "bg"]
+    assert sched.stats()[INTERACTIVE]["granted"] == 1
+
+
+def test_slots_follow_the_limiter_and_keep_room_for_interactive():
+    from types import SimpleNamespace
+
+    http = _FakeHttp()
+    http.limiter = SimpleNamespace(limit=2.0)  # AIMD limit below the scheduler's capacity
+    sched = RequestScheduler(http, capacity=8)
+    assert sched.stats()[INTERACTIVE]["limit"] == 2 and sched.stats()[BACKFILL]["limit"] == 1
+    threads = [_start(sched, BACKFILL, "hold"), _start(sched, BACKFILL, "hold")]
+    _until(lambda: sched.stats()[BACKFILL]["in_flight"] == 1 and sched.stats()[BACKFILL]["queued"] == 1)
+
+    # the second upstream slot is still free: interactive work runs past the queued backfill
+    ui = _start(sched, INTERACTIVE, "ui")
+    ui.join(5)
+    assert http.order == ["ui"]
+
+    http.limiter.limit = 1.0  # limit shrank: nothing beyond it is granted
+    ui = _start(sched, INTERACTIVE, "ui")
+    _until(lambda: sched.stats()[INTERACTIVE]["queued"] == 1)
+    http.gate.set()
+    for t in threads + [ui]:
+        t.join(5)
+    assert http.order == ["ui", "hold", "ui", "hold"]
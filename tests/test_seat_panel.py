@@ -0,0 +1,31 @@
+import pandas as pd
+
+from eastmoney_tool.sources.seat_track import CYCLE_1M, CYCLE_3M
+from eastmoney_tool.tables.t2_seat import SeatPanel, seat_topk_from_index
+from eastmoney_tool.transforms.ranking import RankingIndex
+
+
+def _index(codes, netbuy, times):
+    return RankingIndex(pd.DataFrame({
+        "SECURITY_CODE": codes,
+        "SECURITY_NAME_ABBR": [f"N{c}" for c in codes],
+        "NET_BUY_AMT": netbuy,
+        "BUY_TIMES": times,
+    }))
+
+
+def test_panel_ranks_and_persistence_match_per_cycle_t2():
+    panel = SeatPanel({
+        CYCLE_1M.code: _index(["A", "B", "C", "D"], [4e7, 3e7, None, 1e7], [9, 1, 5, 8]),
+        CYCLE_3M.code: _index(["B", "A", "E"], [5e7, 6e7, 1e7], [3, 7, 9]),
+    })
+    frame = panel.frame().set_index("SECURITY_CODE")
+    assert frame.loc["A", "NET_BUY_AMT_RANK_1M"] == 1 and frame.loc["A", "NET_BUY_AMT_RANK_3M"] == 1
+    assert pd.isna(frame.loc["C", "NET_BUY_AMT_RANK_1M"]) and frame.loc["C", "BUY_TIMES_RANK_1M"] == 3
+    assert pd.isna(frame.loc["E", "BUY_TIMES_1M"]) and frame.loc["E", "SECURITY_NAME_ABBR"] == "NE"
+
+    persistence = panel.persistence(k=2).set_index("SECURITY_CODE")
+    for cycle, sfx in ((CYCLE_1M, "1M"), (CYCLE_3M, "3M")):
+        inter = seat_topk_from_index(panel.index(cycle), k=2)[2]
+        assert set(persistence.index[persistence[f"IN_T2_{sfx}"]]) == set(inter["SECURITY_CODE"])
+    assert persistence["T2_CYCLES"].to_dict() == {"A": 2, "B": 0, "C": 0, "D": 0, "E": 0}
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from eastmoney_tool.securities import SECURITIES, intersect_ids
+from eastmoney_tool.transforms.set_ops import difference_by_key, intersect_by_key, union_by_key
+
+
+def _frames():
+    a = pd.DataFrame({"SECURITY_CODE": ["000001", "600000", "300750", "000001"], "V": [1, 2, 3, 4]})
+    b = pd.DataFrame({"SECURITY_CODE": ["300750", "000001", "002594"], "SECUCODE": ["300750.SZ", "000001.SZ", "002594.SZ"]})
+    return a, b
+
+
+def test_id_set_ops_match_string_set_ops():
+    a, b = _frames()
+    ea, eb = SECURITIES.encode(a), SECURITIES.encode(b)
+    assert ea["SECURITY_ID"].dtype == "int32"
+    assert intersect_by_key(ea, eb).drop(columns="SECURITY_ID").equals(intersect_by_key(a, b))
+    assert difference_by_key(ea, eb).drop(columns="SECURITY_ID").equals(difference_by_key(a, b))
+    assert union_by_key([ea, eb]).drop(columns="SECURITY_ID").equals(union_by_key([a, b]))
+
+
+def test_intersect_ids_and_side_table():
+    a, b = _frames()
+    ids = intersect_ids(SECURITIES.encode(a)["SECURITY_ID"], SECURITIES.encode(b)["SECURITY_ID"])
+    assert sorted(SECURITIES.codes(ids)) == ["000001", "300750"]
+    side = SECURITIES.side_table().set_index("SECURITY_CODE")
+    assert side.loc["300750", "MARKET"] == "SZ"
+
+
+def test_concurrent_intern_is_consistent():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from eastmoney_tool.securities import SecurityDictionary
+
+    d = SecurityDictionary()
+    batches = [[f"{(i * 37 + j) % 5000:06d}" for j in range(800)] for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(d.intern, batches))
+    for codes, ids in zip(batches, results):
+        assert list(d.codes(ids)) == codes
+
+
+def test_readers_never_see_a_short_side_table_while_encoding():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from eastmoney_tool.securities import SecurityDictionary
+
+    d = SecurityDictionary()
+    frames = [
+        pd.DataFrame({"SECURITY_CODE": [f"{i * 500 + j:06d}" for j in range(500)], "SECUCODE": [f"{i * 500 + j:06d}.SZ" for j in range(500)]})
+        for i in range(20)
+    ]
+
+    def encode_and_read(df):
+        ids = d.encode(df)["SECURITY_ID"].to_numpy()
+        side = d.side_table()
+        assert len(side) >= ids.max() + 1 and d.bitmap(ids).sum() == len(ids)
+        assert list(d.codes(ids)) == df["SECURITY_CODE"].tolist()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(encode_and_read, frames))
+    assert (d.side_table()["SECUCODE"] != "").all()
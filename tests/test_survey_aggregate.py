@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+import pytest
+
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.datacenter import EastMoneyDataCenter, PageLimitWarning
+from eastmoney_tool.http import HttpClient
+from eastmoney_tool.sources.survey import RANGE_1W
+from eastmoney_tool.tables.t1_survey import aggregate_survey_events, filter_survey_sum, get_survey_events
+from eastmoney_tool.transport import HttpResponse, Transport
+
+
+def test_aggregate_survey_events():
+    events = pd.DataFrame({
+        "SECURITY_CODE": ["000001", "000001", "600000"],
+        "SECURITY_NAME_ABBR": ["平安银行", "平安银行", "浦发银行"],
+        "RECEIVE_START_DATE": ["2024-01-02 00:00:00", "2024-01-05 00:00:00", "2024-01-03 00:00:00"],
+        "RECEIVE_WAY_EXPLAIN": ["电话会议", "特定对象调研", "电话会议"],
+        "SUM": ["30", "45", "60"],
+    })
+    out = aggregate_survey_events(events)
+    assert out["SECURITY_CODE"].tolist() == ["000001", "600000"]
+    row = out.iloc[0]
+    assert row["SUM"] == 75
+    assert row["SURVEY_TIMES"] == 2
+    assert row["LATEST_RECEIVE_DATE"] == "2024-01-05 00:00:00"
+    assert set(row["RECEIVE_WAYS"].split("、")) == {"电话会议", "特定对象调研"}
+    assert filter_survey_sum(out, 70)["SECURITY_CODE"].tolist() == ["000001"]
+
+
+class _ThreePages(Transport):
+    def get(self, url, params, headers, timeout):
+        page = int(params["pageNumber"])
+        body = {"result": {"pages": 3, "data": [{"SECURITY_CODE": f"00000{page}", "SUM": "1"}]}}
+        return HttpResponse(200, json.dumps(body), url)
+
+
+def test_window_beyond_max_pages_is_not_silently_truncated():
+    cfg = EastMoneyConfig(cassette=None)
+    dc = EastMoneyDataCenter(cfg, http=HttpClient(cfg, min_interval_s=0.0, transport=_ThreePages()))
+    with pytest.raises(RuntimeError, match="reports 3 pages"):
+        get_survey_events(dc, RANGE_1W, page_size=1, max_pages=2)
+    assert len(get_survey_events(dc, RANGE_1W, page_size=1, max_pages=3)) == 3
+
+    with pytest.warns(PageLimitWarning):
+        assert len(dc.get_all_pages_df({"reportName": "X"}, page_size=1, max_pages=2)) == 2
@@ -0,0 +1,184 @@
+import threading
+import time
+
+from eastmoney_tool.tables.graph import Node, TableGraph
+
+
+class _Dc:
+    cache_namespace = ("stand-in", "pandas")
+
+
+def _graph(calls):
+    lock = threading.Lock()
+
+    def source(name):
+        def fn(dc, p):
+            with lock:
+                calls.append(name)
+            time.sleep(0.05)
+            return {"a": [1, 2, 3], "b": [2, 3, 4]}[name]
+        return fn
+
+    def above(dc, p, xs):
+        calls.append("above")
+        return [x for x in xs if x > p["threshold"]]
+
+    return TableGraph({
+        "a": Node(source("a"), source=True),
+        "b": Node(source("b"), source=True),
+        "above": Node(above, defaults={"threshold": 0}, deps=lambda p: [("a", p)]),
+        "both": Node(lambda dc, p, xs, ys: sorted(set(xs) & set(ys)), defaults={"threshold": 0},
+                     deps=lambda p: [("above", p), ("b", p)]),
+    })
+
+
+def test_graph_memoizes_and_runs_independent_sources_in_parallel():
+    calls = []
+    g = _graph(calls)
+    t0 = time.perf_counter()
+    assert g.compute(_Dc(), "both", threshold=1) == [2, 3]
+    assert time.perf_counter() - t0 < 0.095  # a and b slept concurrently
+    assert sorted(calls) == ["a", "above", "b"]
+
+    calls.clear()
+    assert g.compute(_Dc(), "both", threshold=1) == [2, 3]
+    assert calls == [] and g.last_run["computed"] == []
+
+    # a new threshold re-runs only the nodes that read it
+    assert g.compute(_Dc(), "both", threshold=2) == [3]
+    assert calls == ["above"]
+    assert sorted(g.last_run["reused"]) == ["a", "b"]
+
+
+def test_graph_reuses_results_when_refetched_sources_are_unchanged():
+    calls = []
+    g = _graph(calls)
+    assert g.compute(_Dc(), "both", threshold=1) == [2, 3]
+
+    # memo expired / invalidated: sources are fetched again but return the same content
+    calls.clear()
+    g.invalidate()
+    assert g.compute(_Dc(), "both", threshold=1) == [2, 3]
+    assert sorted(calls) == ["a", "b"]
+    assert sorted(g.last_run["unchanged"]) == ["above", "both"]
+
+
+def test_expired_results_are_served_stale_while_one_refresh_runs():
+    state = {"value": 1, "fail": False, "calls": 0}
+
+    def source(dc, p):
+        state["calls"] += 1
+        time.sleep(0.2)
+        if state["fail"]:
+            raise ConnectionError("upstream down")
+        return state["value"]
+
+    g = TableGraph({"s": Node(source, source=True)}, ttl_s=0.05, retry_s=0.0)
+    assert g.compute(_Dc(), "s") == 1
+    assert not g.freshness(_Dc(), "s").stale
+
+    time.sleep(0.1)
+    state["value"] = 2
+    t0 = time.perf_counter()
+    assert [g.compute(_Dc(), "s") for _ in range(3)] == [1, 1, 1]  # no waiting, one refresh
+    assert time.perf_counter() - t0 < 0.1
+    fresh = g.freshness(_Dc(), "s")
+    assert fresh.stale and fresh.refreshing and fresh.age_s >= 0.1
+    assert g.last_run["stale"] == ["s"]
+    time.sleep(0.3)
+    assert state["calls"] == 2 and g.compute(_Dc(), "s") == 2
+
+    # a failed refresh keeps serving the last good result
+    time.sleep(0.1)
+    state["fail"] = True
+    assert g.compute(_Dc(), "s") == 2
+    time.sleep(0.3)
+    fresh = g.freshness(_Dc(), "s")
+    assert fresh.stale and not fresh.refreshing and "upstream down" in fresh.error
+    assert g.compute(_Dc(), "s") == 2
+
+
+def test_memo_entry_evicted_inside_its_ttl_is_rebuilt_not_served_stale():
+    from eastmoney_tool.results import ResultStore
+
+    calls = []
+
+    def source(dc, p):
+        calls.append(p)
+        return [len(calls)]
+
+    store = ResultStore()
+    g = TableGraph({"s": Node(source, source=True)}, ttl_s=60.0, store=store)
+    assert g.compute(_Dc(), "s") == [1]
+
+    # what the store's byte budget does to a least recently used memo entry
+    keys, _, _ = g._expand(_Dc(), ("s", ()))
+    store.invalidate((id(g.memo), keys[("s", ())]))
+    assert not g.freshness(_Dc(), "s").stale
+
+    assert g.compute(_Dc(), "s") == [2]  # rebuilt in the calling thread
+    assert g.last_run["stale"] == [] and g.last_run["computed"] == ["s"]
+    assert not g._refreshing and len(calls) == 2
+
+
+def test_bookkeeping_is_bounded_by_the_last_good_results():
+    g = TableGraph({"s": Node(lambda dc, p: [p["n"]], defaults={"n": 0}, source=True)}, max_entries=4)
+    for n in range(20):
+        g.compute(_Dc(), "s", n=n)
+    assert len(g._good_at) <= 4
+    assert g.freshness(_Dc(), "s", n=19) is not None
+
+
+def test_compute_many_shares_inputs_and_reports_each_target_when_ready():
+    calls = []
+    g = _graph(calls)
+    ready = []
+    t0 = time.perf_counter()
+    out = g.compute_many(
+        _Dc(),
+        {"A": ("a", {}), "above": ("above", {"threshold": 1}), "both": ("both", {"threshold": 1})},
+        on_ready=lambda label, value: ready.append(label),
+    )
+    assert time.perf_counter() - t0 < 0.095  # one run: a and b fetched once, concurrently
+    assert out == {"A": [1, 2, 3], "above": [2, 3], "both": [2, 3]}
+    assert sorted(calls) == ["a", "above", "b"]
+    assert ready[-1] == "both" and sorted(ready) == ["A", "above", "both"]
+    assert set(g.last_run["seconds"]) == {"a", "b", "above", "both"}
+
+    # memo hits are reported right away
+    ready.clear()
+    assert g.compute_many(_Dc(), {"x": ("both", {"threshold": 1})}, on_ready=lambda label, value: ready.append(label)) == {"x": [2, 3]}
+    assert ready == ["x"] and g.last_run["computed"] == []
+
+
+def test_refresh_fetches_sources_upstream_again():
+    import pandas as pd
+
+    from eastmoney_tool.tables.graph import NODES
+
+    fetched = []
+
+    class _Upstream(_Dc):
+        def get_all_pages(self, params, page_size=500, **kwargs):
+            fetched.append(params["reportName"])
+            return pd.DataFrame({"SECURITY_CODE": ["000001"], "RATIO": [12.0], "NET_BUY_AMT": [1e7], "BUY_TIMES": [3]})
+
+    dc = _Upstream()
+    g = TableGraph(NODES)
+    sources = {"trade": ("trade_history", {}), "seat": ("seat_panel", {}), "survey": ("survey_events", {})}
+    g.compute_many(dc, sources)
+    first = len(fetched)
+    assert first == 5  # trade, survey and the three seat cycles
+
+    # an explicit refresh refetches instead of reusing the fetchers' own TTL caches
+    g.invalidate()
+    g.compute_many(dc, sources)
+    assert len(fetched) == 2 * first
+
+    # so does the background revalidation of an expired result
+    g.memo.invalidate()
+    g.compute_many(dc, sources)
+    deadline = time.monotonic() + 5
+    while len(fetched) < 3 * first and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(fetched) == 3 * first
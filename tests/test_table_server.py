@@ -0,0 +1,116 @@
+import gzip
+import io
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")  # starlette.testclient
+
+from starlette.testclient import TestClient
+
+from eastmoney_tool.securities import SECURITIES
+from eastmoney_tool.server import ARROW_STREAM, TableService, create_app, decode, etag_matches
+from eastmoney_tool.tables.graph import Node, TableGraph
+
+
+class _Dc:
+    cache_namespace = ("stand-in", "pandas")
+
+
+def _service(calls):
+    def t3(dc, p):
+        calls.append(p["threshold"])
+        df = pd.DataFrame({"SECURITY_CODE": ["000001", "600000"], "RATIO": [12.5, 30.0]})
+        return SECURITIES.encode(df.loc[df["RATIO"] > p["threshold"]].reset_index(drop=True))
+
+    service = TableService(dc=_Dc())
+    service.graph = TableGraph({"t3": Node(t3, defaults={"threshold": 10.0}, source=True)})
+    return service
+
+
+def test_server_etag_formats_and_params():
+    calls = []
+    client = TestClient(create_app(_service(calls)))
+
+    r = client.get("/tables/t3", params={"threshold": "20"}, headers={"Accept": ARROW_STREAM})
+    assert r.status_code == 200 and r.headers["content-type"] == ARROW_STREAM
+    df = decode(r.content, r.headers["content-type"])
+    assert list(df["SECURITY_CODE"]) == ["600000"] and "SECURITY_ID" not in df.columns
+
+    etag = r.headers["etag"]
+    r = client.get("/tables/t3", params={"threshold": "20"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+    assert calls == [20.0]  # computed once
+    assert "age" in r.headers and "warning" not in r.headers
+
+    r = client.get("/tables/t3", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    df = decode(r.content, r.headers["content-type"])  # the test client already inflated the body
+    assert list(df["SECURITY_CODE"]) == ["000001", "600000"]
+    assert r.headers["etag"] != etag
+
+    assert client.get("/tables/t3", params={"k": "3"}).status_code == 400
+    assert client.get("/tables/t9").status_code == 404
+
+
+def test_if_none_match_compares_whole_entity_tags():
+    assert etag_matches('"a1", W/"b2"', '"b2"')
+    assert etag_matches("*", '"b2"')
+    assert not etag_matches('"b2x", "ab2"', '"b2"')
+    assert not etag_matches("", '"b2"')
+
+    client = TestClient(create_app(_service([])))
+    etag = client.get("/tables/t3").headers["etag"]
+    assert client.get("/tables/t3", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/tables/t3", headers={"If-None-Match": etag[:-1] + '0"'}).status_code == 200
+
+
+def test_out_of_domain_parameters_are_rejected_before_computing():
+    client = TestClient(create_app(TableService(dc=_Dc())))  # the real table nodes; nothing is fetched
+    for table, params in [("t1", {"days": "5"}), ("t2", {"cycle": "09"}), ("t2", {"part": "all"}),
+                          ("t4", {"engine": "spark"}), ("t4", {"k": "0"})]:
+        r = client.get(f"/tables/{table}", params=params)
+        assert r.status_code == 400, (table, params)
+
+
+def test_single_flight_locks_are_released():
+    service = _service([])
+    for threshold in range(20):
+        service.compute("t3", {"threshold": float(threshold)})
+    assert service._locks == {}
+
+
+def test_json_body_keeps_codes_as_strings():
+    service = _service([])
+    _, body = service.body("t3", {"threshold": 0.0}, "json", compress=True)
+    df = decode(gzip.decompress(body), "application/json")
+    assert list(df["SECURITY_CODE"]) == ["000001", "600000"]
+
+
+def test_expired_table_is_served_stale_with_warning():
+    calls = []
+    service = _service(calls)
+    service.graph.memo.ttl_s = 0.05
+    client = TestClient(create_app(service))
+    assert "warning" not in client.get("/tables/t3").headers
+    time.sleep(0.1)
+    r = client.get("/tables/t3")
+    assert r.status_code == 200 and r.headers["warning"] == '110 - "Response is Stale"'
+    assert list(decode(r.content, r.headers["content-type"])["SECURITY_CODE"]) == ["000001", "600000"]
+
+
+def test_export_streams_csv_and_parquet():
+    client = TestClient(create_app(_service([])))
+
+    r = client.get("/tables/t3/export", params={"format": "csv", "threshold": "0"}, headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200 and r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-disposition"] == 'attachment; filename="t3.csv"'
+    assert r.content.decode("utf-8-sig").splitlines() == ["SECURITY_CODE,RATIO", "000001,12.5", "600000,30.0"]
+
+    r = client.get("/tables/t3/export", params={"format": "parquet", "threshold": "20"})
+    df = pd.read_parquet(io.BytesIO(r.content))
+    assert list(df["SECURITY_CODE"]) == ["600000"] and "SECURITY_ID" not in df.columns
+
+    assert client.get("/tables/t3/export", params={"format": "pdf"}).status_code == 400
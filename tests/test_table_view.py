@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from eastmoney_tool.ui.table_view import row_order, summarize, take_page
+
+FRAME = pd.DataFrame(
+    {
+        "SECURITY_CODE": ["000001", "600000", "300750", "000002"],
+        "SECURITY_NAME_ABBR": ["平安银行", "浦发银行", "宁德时代", "万科A"],
+        "NET_BUY_AMT": [3e4, None, 9e4, -1e4],
+    }
+)
+
+
+def test_order_filter_and_page_match_between_pandas_and_arrow():
+    for frame in (FRAME, pa.Table.from_pandas(FRAME)):
+        np.testing.assert_array_equal(row_order(frame, sort_by="NET_BUY_AMT"), [2, 0, 3, 1])  # nulls last
+        np.testing.assert_array_equal(row_order(frame, sort_by="NET_BUY_AMT", descending=False), [3, 0, 2, 1])
+        np.testing.assert_array_equal(row_order(frame, search="银行"), [0, 1])
+        np.testing.assert_array_equal(row_order(frame, search="00000", sort_by="SECURITY_CODE"), [1, 3, 0])
+
+        positions = row_order(frame, sort_by="NET_BUY_AMT")
+        assert summarize(frame, positions) == {"行数": 4, "NET_BUY_AMT合计(万元)": 11.0}
+        page = take_page(frame, positions, page=2, page_size=3)
+        assert page["SECURITY_CODE"].tolist() == ["600000"]
+        assert list(page.columns)[-1] == "NET_BUY_AMT(万元)"
@@ -0,0 +1,49 @@
+import datetime as dt
+
+import numpy as np
+
+from eastmoney_tool.cache import TTLCache
+from eastmoney_tool.sources.trade_daily import REPORT_NAME as TRADE
+from eastmoney_tool.trading_calendar import BEIJING, CALENDAR
+
+
+def _at(day, hour, minute=0):
+    return dt.datetime(*day, hour, minute, tzinfo=BEIJING)
+
+
+def test_sessions_skip_weekends_and_holidays():
+    # 2024-05-01..03 Labour Day, 2024-05-04/05 weekend
+    assert not CALENDAR.is_session(dt.date(2024, 5, 2))
+    assert CALENDAR.latest_session(dt.date(2024, 5, 5)) == dt.date(2024, 4, 30)
+    assert CALENDAR.next_session(dt.date(2024, 4, 30)) == dt.date(2024, 5, 6)
+    assert CALENDAR.window_start(dt.date(2024, 5, 10), 1) == dt.date(2024, 5, 10)
+    assert CALENDAR.window_start(dt.date(2024, 5, 10), 6) == dt.date(2024, 4, 30)
+    assert CALENDAR.window_cutoff(dt.date(2024, 5, 10), 5) == dt.date(2024, 4, 30)
+
+    age = CALENDAR.session_age(["2024-05-10", "2024-05-06", "2024-05-03", "2024-04-30", None], dt.date(2024, 5, 10))
+    np.testing.assert_array_equal(age[:4], [1, 5, 5, 6])
+    assert np.isnan(age[4])
+    assert CALENDAR.calendar_windows([("today", 1), ("6d", 6)], dt.date(2024, 5, 10)) == [("today", 0), ("6d", 10)]
+
+
+def test_as_of_and_expiry_follow_publication_window():
+    monday = (2026, 10, 19)
+    # before the close: yesterday's (Friday's) data, valid until today's publication starts
+    assert CALENDAR.as_of(TRADE, _at(monday, 10)) == dt.date(2026, 10, 16)
+    assert CALENDAR.expires_at(TRADE, _at(monday, 10)) == _at(monday, 15, 30)
+    # inside the window: today's data, re-checked every poll interval
+    assert CALENDAR.as_of(TRADE, _at(monday, 16)) == dt.date(2026, 10, 19)
+    assert CALENDAR.ttl_s(TRADE, _at(monday, 16)) == 600.0
+    assert CALENDAR.expires_at(TRADE, _at(monday, 19, 55)) == _at(monday, 20)
+    # weekend and the National Day holiday: valid until the next session's publication
+    assert CALENDAR.as_of(TRADE, _at((2026, 10, 17), 12)) == dt.date(2026, 10, 16)
+    assert CALENDAR.expires_at(TRADE, _at((2026, 10, 17), 12)) == _at(monday, 15, 30)
+    assert CALENDAR.expires_at(TRADE, _at((2026, 9, 30), 21)) == _at((2026, 10, 8), 15, 30)
+
+
+def test_cache_entry_ttl_overrides_default():
+    cache = TTLCache(ttl_s=600.0)
+    cache.set("short", 1, ttl_s=0.0)
+    cache.set("long", 2)
+    assert cache.get("short") is None
+    assert cache.get_or_compute("long", lambda: 3) == 2
@@ -0,0 +1,51 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from eastmoney_tool.config import EastMoneyConfig
+from eastmoney_tool.transport import HttpxTransport, RequestsTransport, Transport, Urllib3Transport, make_transport
+
+
+class _Echo(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"path": self.path, "ua": self.headers.get("User-Agent")}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Echo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("name, cls", [("requests", RequestsTransport), ("urllib3", Urllib3Transport), ("httpx", HttpxTransport)])
+def test_backends_return_the_same_response(server_url, name, cls):
+    transport = make_transport(EastMoneyConfig(transport=name, cassette=None))
+    assert type(transport) is cls
+    try:
+        r = transport.get(server_url, {"reportName": "X", "pageNumber": 2}, {"User-Agent": "t"}, timeout=5)
+    finally:
+        transport.close()
+    assert r.status_code == 200 and r.url.endswith("/api?reportName=X&pageNumber=2")
+    assert json.loads(r.text) == {"path": "/api?reportName=X&pageNumber=2", "ua": "t"}
+
+
+def test_unknown_backend_and_disabled_keepalive():
+    with pytest.raises(ValueError, match="Unknown transport"):
+        make_transport(EastMoneyConfig(transport="curl", cassette=None))
+    with pytest.raises(TypeError):
+        Transport()
+
+    pool = HttpxTransport(keepalive_s=0, http2=False)._client._transport._pool
+    assert pool._max_keepalive_connections == 0 and pool._keepalive_expiry == 0